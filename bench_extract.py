@@ -0,0 +1,158 @@
+"""
+Micro-benchmark for answer extraction
+
+Times extract_clean_response, extract_pinyin and extract_result
+(response_extract.py) over a corpus of model outputs, next to the
+per-call re.sub / split / blacklist-list implementations they replaced,
+and checks that both give the same answer for every output.
+
+The corpus is either recorded outputs (JSONL with an "output" per line, the
+same format as --stub-answers) or, by default, answers synthesized from the
+lesson files in the shapes the model actually replies with.
+
+    python bench_extract.py --corpus recorded_outputs.jsonl --repeat 20
+"""
+
+import argparse
+import glob
+import json
+import re
+import timeit
+
+from lesson_data import iter_sentences
+from response_extract import extract_clean_response, extract_pinyin, extract_result
+
+DEFAULT_FILES = 'public/data/integrated/*.json'
+
+# Reply shapes seen from the verifier, filled with a real field value
+OUTPUT_SHAPES = [
+    '{value}',
+    'Answer: {value}',
+    '**{value}**',
+    '`{value}`',
+    '\n\n{value}\n',
+    '{value}\n\nThe original was already correct, no changes are needed.',
+    'I cannot verify this without more context. Could you provide the full sentence?',
+    "I'd be happy to help! However, the {field} looks correct:\n{value}",
+]
+
+
+def legacy_clean_response(text):
+    text = text.strip()
+    text = re.sub(r'^(Your answer|Pinyin|Answer|Response|Korean|English|Japanese|Chinese)[:\s]*', '', text,
+                  flags=re.IGNORECASE)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    if not lines:
+        return ""
+    first_line = re.sub(r'`', '', re.sub(r'\*\*', '', lines[0])).strip()
+    if (len(first_line) >= 1 and
+        not any(word in first_line.lower() for word in [
+            'verify', 'check', 'please', 'respond', 'provide',
+            'however', 'happy', 'help', 'want', 'could', 'would', 'should'
+        ])):
+        return first_line
+    return ""
+
+
+def legacy_pinyin(text):
+    text = text.strip()
+    text = re.sub(r'^(Your answer|Pinyin|Answer|Response)[:\s]*', '', text, flags=re.IGNORECASE)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    if not lines:
+        return ""
+    first_line = re.sub(r'`', '', re.sub(r'\*\*', '', lines[0])).strip()
+    if (re.match(r'^[a-zA-Zāáǎàēéěèīíǐìōóǒòūúǔùǖǘǚǜ\s\']+$', first_line) and
+        ' ' in first_line and
+        len(first_line) >= 3 and
+        not any(word in first_line.lower() for word in [
+            'verify', 'check', 'correct', 'chinese', 'sentence', 'please',
+            'respond', 'answer', 'provide', 'matches', 'however', 'happy',
+            'help', 'want', 'could', 'would', 'should', 'message'
+        ])):
+        return first_line
+    return ""
+
+
+def legacy_result(text, field):
+    text = text.strip()
+    text = re.sub(r'^(Your answer|Answer|Response)[:\s]*', '', text, flags=re.IGNORECASE)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    if not lines:
+        return ""
+    first_line = re.sub(r'`', '', re.sub(r'\*\*', '', lines[0])).strip()
+    if field == 'pinyin':
+        if (re.match(r'^[a-zA-Zāáǎàēéěèīíǐìōóǒòūúǔùǖǘǚǜ\s\']+$', first_line) and len(first_line) >= 3 and
+            not any(word in first_line.lower() for word in [
+                'verify', 'check', 'correct', 'chinese', 'sentence', 'please',
+                'respond', 'answer', 'provide', 'matches', 'however', 'happy',
+                'help', 'want', 'could', 'would', 'should', 'message'
+            ])):
+            return first_line
+        return ""
+    if field == 'sentence':
+        return first_line if re.search(r'[\u4e00-\u9fff]', first_line) else ""
+    if (len(first_line) >= 2 and
+        not any(word in first_line.lower() for word in [
+            'verify', 'check', 'please', 'respond', 'however',
+            'want', 'could', 'would', 'should', 'sorry', 'cannot'
+        ])):
+        return first_line
+    return ""
+
+
+def synthesize_corpus(patterns, fields, limit):
+    """(field, output) pairs built from lesson values in every OUTPUT_SHAPES form"""
+    corpus = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for _, sentence in iter_sentences(data, path):
+                for field in fields:
+                    value = sentence.get(field)
+                    if value:
+                        corpus.extend((field, shape.format(value=value, field=field)) for shape in OUTPUT_SHAPES)
+                if limit and len(corpus) >= limit:
+                    return corpus[:limit]
+    return corpus
+
+
+def load_corpus(path, field):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(field, json.loads(line)['output']) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark verifier answer extraction")
+    parser.add_argument('files', nargs='*', default=[DEFAULT_FILES], help="lesson files or globs for the corpus")
+    parser.add_argument('--corpus', default=None, help="JSONL of recorded outputs instead of a synthesized corpus")
+    parser.add_argument('--field', default='pinyin', help="field the recorded outputs answer (with --corpus)")
+    parser.add_argument('--limit', type=int, default=20000, help="outputs in the synthesized corpus (0 = all)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed passes over the corpus")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus, args.field)
+    else:
+        corpus = synthesize_corpus(args.files, ('pinyin', 'korean', 'english', 'sentence'), args.limit)
+    print(f"🧪 {len(corpus)} outputs, {args.repeat} passes\n")
+
+    cases = [
+        ('extract_clean_response', lambda field, text: extract_clean_response(text),
+         lambda field, text: legacy_clean_response(text)),
+        ('extract_pinyin', lambda field, text: extract_pinyin(text), lambda field, text: legacy_pinyin(text)),
+        ('extract_result', extract_result, legacy_result),
+    ]
+    print(f"{'extractor':<24} {'new µs':>8} {'old µs':>8} {'speedup':>8} {'diffs':>6}")
+    for name, new, old in cases:
+        diffs = sum(1 for field, text in corpus if new(field, text) != old(field, text))
+        timings = []
+        for fn in (new, old):
+            seconds = min(timeit.repeat(lambda: [fn(field, text) for field, text in corpus],
+                                        number=1, repeat=args.repeat))
+            timings.append(seconds / max(1, len(corpus)) * 1e6)
+        print(f"{name:<24} {timings[0]:>8.2f} {timings[1]:>8.2f} {timings[1] / timings[0]:>7.1f}x {diffs:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Offline throughput benchmark for the verification pipeline
+
+Runs the same batch worker + concurrent runner that p_all.py uses over real
+lesson files, against the stub backend by default, for several worker/batch
+size combinations. Nothing is written back to the lesson files.
+
+    python bench_verify.py --workers 1,4,8 --batch-sizes 1,10 --stub-latency 0.3
+"""
+
+import argparse
+import glob
+import json
+
+import p_all
+from lesson_data import iter_sentences
+from response_extract import extract_clean_response
+from verifier_backend import add_backend_arguments, backend_from_args
+from verify_batch import chunk_tasks, make_batch_worker
+from verify_engine import ThroughputStats, build_prompt_context, get_backend, run_concurrent, set_backend
+
+DEFAULT_FILES = 'public/data/integrated/*.json'
+
+
+def load_tasks(patterns, prompt_template, limit=None):
+    """Tasks for every sentence of the matching lesson files (optionally only the first limit)"""
+    tasks = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, sentence in iter_sentences(data, path):
+                if sentence.get('sentence'):
+                    tasks.append({'index': len(tasks), 'key': key, 'sentence': sentence,
+                                  'prompt': prompt_template.format(**build_prompt_context(sentence))})
+    return tasks[:limit] if limit else tasks
+
+
+def run_once(tasks, field_key, prompt_template, workers, batch_size):
+    stats = ThroughputStats()
+    worker = make_batch_worker(prompt_template, extract_clean_response, field_key)
+    validated = 0
+    for _, result in run_concurrent(chunk_tasks(tasks, batch_size), worker, max_workers=workers, stats=stats):
+        validated += sum(1 for item in result['items'] if item['value'])
+    return stats, validated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the verification pipeline offline")
+    parser.add_argument('files', nargs='*', default=[DEFAULT_FILES], help="lesson files or globs")
+    parser.add_argument('--field', default='pinyin',
+                        choices=[option['key'] for option in p_all.FIELD_OPTIONS.values()])
+    parser.add_argument('--workers', default='1,4,8', help="comma-separated worker counts")
+    parser.add_argument('--batch-sizes', default='1,10', help="comma-separated batch sizes")
+    parser.add_argument('--limit', type=int, default=200, help="sentences per run (0 = all)")
+    add_backend_arguments(parser)
+    parser.set_defaults(backend='stub', stub_latency=0.2)
+    args = parser.parse_args()
+
+    set_backend(backend_from_args(args))
+    prompt_template = next(option['prompt_template'] for option in p_all.FIELD_OPTIONS.values()
+                           if option['key'] == args.field)
+    tasks = load_tasks(args.files, prompt_template, args.limit or None)
+    print(f"🧪 {len(tasks)} sentences, field '{args.field}', backend '{args.backend}'\n")
+    print(f"{'workers':>7} {'batch':>5} {'calls':>6} {'sent/s':>8} {'p50':>7} {'p95':>7} {'valid':>6}")
+
+    for workers in (int(w) for w in args.workers.split(',')):
+        for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+            stats, validated = run_once(tasks, args.field, prompt_template, workers, batch_size)
+            elapsed = stats.elapsed()
+            rate = stats.sentences / elapsed if elapsed > 0 else 0.0
+            print(f"{workers:>7} {batch_size:>5} {len(stats.latencies):>6} {rate:>8.1f} "
+                  f"{stats.percentile(50):>6.2f}s {stats.percentile(95):>6.2f}s {validated:>6}")
+
+    backend = get_backend()
+    if hasattr(backend, 'report'):
+        print(f"\n{backend.report()}")
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Compiled dictionary store
+
+Compiles the word lexicon (dictionaries/word_dict.tsv, WORD_DICT and
+optionally a CC-CEDICT file) and TRANSLATION_DICT into compact sorted
+binary files that are memory-mapped on load. Only the header is read at
+startup; lookups binary-search the fixed-size index in the mapping and
+decode just the entry they hit, so startup time and memory stay flat no
+matter how large the lexicon grows.
+
+Each store has a '<store>.sources' sidecar listing the files it was
+compiled from. is_stale() reports a store older than any of them, so
+enhance_translations.py falls back to the in-memory dictionaries
+instead of serving entries that were edited after the last build.
+
+File layout (little endian):
+    header  MAGIC, entry count, longest key (characters), index offset
+    data    UTF-8 keys and compact JSON values, back to back
+    index   per entry: key offset, key length, value offset, value length,
+            sorted by key bytes
+
+    python dict_store.py                          # build dictionaries/*.dict
+    python dict_store.py --cedict cedict_ts.u8    # also import CC-CEDICT
+    python dict_store.py --check 我们 一边         # time loading and look words up
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import time
+
+from word_dict import DEFAULT_WORD_DICT_FILE, load_word_dict, segment_longest
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dictionaries')
+DEFAULT_WORD_STORE = os.path.join(DICTIONARY_DIR, 'words.dict')
+DEFAULT_TRANSLATION_STORE = os.path.join(DICTIONARY_DIR, 'translations.dict')
+
+MAGIC = b'CSDICT01'
+HEADER = struct.Struct('<8sIII')
+INDEX_ENTRY = struct.Struct('<IIII')
+
+
+class DictStore:
+    """Read-only memory-mapped dictionary; values are decoded per lookup"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"Not a dictionary store: {path}")
+        magic, self.count, self.max_key_length, self._index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a dictionary store: {path}")
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + position * INDEX_ENTRY.size)
+
+    def _find(self, key_bytes):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = self._entry(middle)
+            found = self._map[key_offset:key_offset + key_length]
+            if found == key_bytes:
+                return value_offset, value_length
+            if found < key_bytes:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get(self, key, default=None):
+        location = self._find(key.encode('utf-8'))
+        if location is None:
+            return default
+        value_offset, value_length = location
+        return json.loads(self._map[value_offset:value_offset + value_length].decode('utf-8'))
+
+    def __contains__(self, key):
+        return self._find(key.encode('utf-8')) is not None
+
+    def __len__(self):
+        return self.count
+
+    def keys(self):
+        for position in range(self.count):
+            key_offset, key_length, _, _ = self._entry(position)
+            yield self._map[key_offset:key_offset + key_length].decode('utf-8')
+
+    def longest_match(self, text, start=0):
+        """(length, entry) of the longest key starting at text[start], or (0, None)"""
+        for length in range(min(self.max_key_length, len(text) - start), 0, -1):
+            entry = self.get(text[start:start + length])
+            if entry is not None:
+                return length, entry
+        return 0, None
+
+    def segment(self, text):
+        return segment_longest(self, text)
+
+    def close(self):
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def sources_path(path):
+    """Sidecar listing the files a store was compiled from"""
+    return path + '.sources'
+
+
+def build_store(path, entries, sources=()):
+    """
+    Write {key: JSON-serializable value} as a store file (atomically),
+    recording the source files it was compiled from for is_stale()
+    """
+    items = sorted((key.encode('utf-8'), json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                   for key, value in entries.items())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        index = []
+        offset = HEADER.size
+        for key, value in items:
+            f.write(key)
+            f.write(value)
+            index.append((offset, len(key), offset + len(key), len(value)))
+            offset += len(key) + len(value)
+        for entry in index:
+            f.write(INDEX_ENTRY.pack(*entry))
+        max_key_length = max((len(key) for key in entries), default=0)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(items), max_key_length, offset))
+    with open(sources_path(path), 'w', encoding='utf-8') as f:
+        json.dump([os.path.abspath(source) for source in sources], f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def is_stale(path):
+    """
+    True if the store has not been built, predates its source list, or is
+    older than any of the files it was compiled from
+    """
+    try:
+        built = os.path.getmtime(path)
+        with open(sources_path(path), 'r', encoding='utf-8') as f:
+            sources = json.load(f)
+    except (OSError, ValueError):
+        return True
+    # A source that has since been removed does not invalidate what was compiled from it
+    return any(os.path.exists(source) and os.path.getmtime(source) > built for source in sources)
+
+
+def open_store(path):
+    """DictStore for path, or None if it has not been built"""
+    if not os.path.exists(path):
+        return None
+    return DictStore(path)
+
+
+# CC-CEDICT: "傳統 传统 [chuan2 tong3] /tradition/traditional/"
+CEDICT_LINE_PATTERN = re.compile(r'^(\S+) (\S+) \[([^\]]*)\] /(.*)/\s*$')
+TONE_MARKS = {'a': 'āáǎà', 'e': 'ēéěè', 'i': 'īíǐì', 'o': 'ōóǒò', 'u': 'ūúǔù', 'ü': 'ǖǘǚǜ'}
+NUMBERED_SYLLABLE_PATTERN = re.compile(r'^([a-zü:]+)([1-5])$', re.IGNORECASE)
+
+
+def numbered_to_marks(syllable):
+    """'hao3' -> 'hǎo', 'lu:4' -> 'lǜ'; other tokens are returned unchanged"""
+    match = NUMBERED_SYLLABLE_PATTERN.match(syllable.replace('u:', 'ü').replace('U:', 'Ü'))
+    if not match:
+        return syllable
+    letters, tone = match.group(1), int(match.group(2))
+    if tone == 5:
+        return letters
+    lower = letters.lower()
+    # 'a' and 'e' take the mark, then the 'o' of 'ou', otherwise the last vowel
+    if 'a' in lower:
+        position = lower.index('a')
+    elif 'e' in lower:
+        position = lower.index('e')
+    elif 'ou' in lower:
+        position = lower.index('o')
+    else:
+        position = max(lower.rfind(vowel) for vowel in 'iouü')
+        if position < 0:
+            return letters
+    marked = TONE_MARKS[lower[position]][tone - 1]
+    if letters[position].isupper():
+        marked = marked.upper()
+    return letters[:position] + marked + letters[position + 1:]
+
+
+def load_cedict(path):
+    """{simplified: entry} from a CC-CEDICT file; Korean fields are left empty"""
+    entries = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            match = CEDICT_LINE_PATTERN.match(line)
+            if not match:
+                continue
+            traditional, simplified, pinyin, glosses = match.groups()
+            if simplified in entries:
+                continue  # Keep the first (most common) reading
+            entries[simplified] = {
+                'pinyin': ' '.join(numbered_to_marks(syllable) for syllable in pinyin.split()),
+                'korean': '',
+                'traditional': traditional,
+                'meaning': '',
+                'english': '; '.join(glosses.split('/')[:3])
+            }
+    return entries
+
+
+def main():
+    import enhance_translations
+    from enhance_translations import TRANSLATION_DICT, WORD_DICT
+
+    parser = argparse.ArgumentParser(description="Compile the enhancement dictionaries into memory-mapped stores")
+    parser.add_argument('--word-dict', default=DEFAULT_WORD_DICT_FILE, help="word_dict.tsv to compile")
+    parser.add_argument('--cedict', default=None, help="CC-CEDICT file to merge in (lowest priority)")
+    parser.add_argument('--output-dir', default=DICTIONARY_DIR, help="directory for words.dict/translations.dict")
+    parser.add_argument('--check', nargs='*', default=None, metavar='WORD',
+                        help="skip building; time opening the word store and look up WORDs")
+    args = parser.parse_args()
+
+    word_store = os.path.join(args.output_dir, os.path.basename(DEFAULT_WORD_STORE))
+    translation_store = os.path.join(args.output_dir, os.path.basename(DEFAULT_TRANSLATION_STORE))
+
+    if args.check is not None:
+        started = time.perf_counter()
+        with DictStore(word_store) as store:
+            opened = time.perf_counter() - started
+            print(f"📖 {store.count} words, opened in {opened * 1000:.2f}ms")
+            for word in args.check:
+                print(f"   {word}: {store.get(word)}")
+        return
+
+    started = time.perf_counter()
+    # Lowest to highest priority: CC-CEDICT, word_dict.tsv, WORD_DICT
+    entries = load_cedict(args.cedict) if args.cedict else {}
+    entries.update(load_word_dict(args.word_dict))
+    entries.update(WORD_DICT)
+    # enhance_translations.py holds WORD_DICT and TRANSLATION_DICT
+    word_sources = [args.word_dict, enhance_translations.__file__] + ([args.cedict] if args.cedict else [])
+    build_store(word_store, entries, sources=word_sources)
+    build_store(translation_store, TRANSLATION_DICT, sources=[enhance_translations.__file__])
+    print(f"📖 Compiled {len(entries)} words to {word_store} ({os.path.getsize(word_store) / 1024:.1f} KB)")
+    print(f"📖 Compiled {len(TRANSLATION_DICT)} sentences to {translation_store}")
+    print(f"⏱️ Built in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
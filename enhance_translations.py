@@ -4,8 +4,29 @@
 Enhanced translation system for Chinese lessons
 """
 
+import argparse
+import collections
+import glob
+import hashlib
 import json
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dict_store import DEFAULT_TRANSLATION_STORE, DEFAULT_WORD_STORE, DictStore, is_stale
+from lesson_data import iter_lesson_sentences
+from lesson_stream import LessonStreamWriter, iter_document
+from word_dict import WordTrie, load_word_dict
+
+DEFAULT_FILES = ['public/data/integrated/05_패턴_제1-90과.json']
+DEFAULT_LESSON_RANGES = [(31, float('inf'))]  # Only enhance lessons 31-90 of the pattern course by default
+DEFAULT_DIFF_FILE = 'enhance_diff.jsonl'
+FINGERPRINT_CACHE_DIR = '.enhance_cache'
+FINGERPRINT_VERSION = 1  # Bump when the enhancement output changes for the same inputs
+ENHANCED_FIELDS = ('pinyin', 'korean', 'english', 'words')
+# '(word_pinyin)' style word placeholders and the English stand-in of generate_enhanced_translations
+PLACEHOLDER_PATTERN = re.compile(r'_(?:pinyin|korean|meaning)\)|\(English translation needed for: ')
 
 # Enhanced translation dictionary for common patterns
 TRANSLATION_DICT = {
@@ -105,12 +126,61 @@ WORD_DICT = {
     "说话": {"pinyin": "shuō huà", "korean": "이야기하다", "traditional": "說話", "meaning": "말씀 설, 말 화"},
 }
 
+_word_dictionary = None
+_translations = None
+
+def get_word_dictionary():
+    """
+    Word lookup used for enhancement, opened on first use: the compiled
+    dictionaries/words.dict (dict_store.py) if it is newer than every file
+    it was built from, otherwise a trie over the word dictionary file plus
+    WORD_DICT (which wins)
+    """
+    global _word_dictionary
+    if _word_dictionary is None:
+        if not is_stale(DEFAULT_WORD_STORE):
+            _word_dictionary = DictStore(DEFAULT_WORD_STORE)
+        else:
+            entries = load_word_dict()
+            entries.update(WORD_DICT)
+            _word_dictionary = WordTrie(entries)
+    return _word_dictionary
+
+def lookup_translation(chinese_sentence):
+    """Whole-sentence entry from the compiled translations store, or TRANSLATION_DICT if it is stale"""
+    global _translations
+    if _translations is None:
+        stale = is_stale(DEFAULT_TRANSLATION_STORE)
+        _translations = TRANSLATION_DICT if stale else DictStore(DEFAULT_TRANSLATION_STORE)
+    return _translations.get(chinese_sentence)
+
+def lookup_word(word):
+    """Dictionary entry of a word, composed from its longest known sub-words if needed (None if unknown)"""
+    dictionary = get_word_dictionary()
+    entry = dictionary.get(word)
+    if entry is not None:
+        return entry
+    pieces = dictionary.segment(word)
+    if len(pieces) < 2 or any(piece_entry is None for _, piece_entry in pieces):
+        return None
+    entries = [piece_entry for _, piece_entry in pieces]
+    return {
+        "pinyin": " ".join(e["pinyin"] for e in entries),
+        "korean": " ".join(e["korean"] for e in entries),
+        "traditional": "".join(e["traditional"] for e in entries),
+        "meaning": ", ".join(e["meaning"] for e in entries)
+    }
+
+def segment_sentence(chinese_sentence):
+    """Longest-match word breakdown for a sentence without one (punctuation dropped)"""
+    return [piece for piece, _ in get_word_dictionary().segment(chinese_sentence) if re.match(r'\w', piece)]
+
 def generate_enhanced_translations(chinese_sentence, word_breakdown):
     """Generate enhanced translations with better quality"""
     
     # Check if we have a direct translation
-    if chinese_sentence in TRANSLATION_DICT:
-        translation_data = TRANSLATION_DICT[chinese_sentence]
+    translation_data = lookup_translation(chinese_sentence)
+    if translation_data:
         result = {
             "pinyin": translation_data["pinyin"],
             "korean": translation_data["korean"],
@@ -125,10 +195,10 @@ def generate_enhanced_translations(chinese_sentence, word_breakdown):
     english_parts = []
     
     for word in word_breakdown:
-        if word in WORD_DICT:
-            word_data = WORD_DICT[word]
+        word_data = lookup_word(word)
+        if word_data:
             pinyin_parts.append(word_data["pinyin"])
-            korean_parts.append(word_data["korean"])
+            korean_parts.append(word_data["korean"] or f"({word}_korean)")  # CC-CEDICT entries have no Korean
             english_parts.append(word)  # Keep Chinese for now if no English pattern
         else:
             pinyin_parts.append(f"({word}_pinyin)")
@@ -156,12 +226,12 @@ def generate_word_analysis_enhanced(word_breakdown):
     }
     
     for word in word_breakdown:
-        if word in WORD_DICT:
-            word_data = WORD_DICT[word]
+        word_data = lookup_word(word)
+        if word_data:
             words_data["pinyin"].append(word_data["pinyin"])
-            words_data["korean"].append(word_data["korean"])
+            words_data["korean"].append(word_data["korean"] or f"({word}_korean)")
             words_data["traditional"].append(word_data["traditional"])
-            words_data["meaning_and_reading"].append(word_data["meaning"])
+            words_data["meaning_and_reading"].append(word_data["meaning"] or f"({word}_meaning)")
         else:
             words_data["pinyin"].append(f"({word}_pinyin)")
             words_data["korean"].append(f"({word}_korean)")
@@ -170,51 +240,279 @@ def generate_word_analysis_enhanced(word_breakdown):
     
     return words_data
 
-def enhance_json_translations(json_file_path):
-    """Enhance translations in the existing JSON file"""
-    
-    print("Loading JSON file...")
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    enhanced_count = 0
-    
-    print("Enhancing translations...")
-    for lesson in data["contents"]:
-        if lesson["lesson"] >= 31:  # Only enhance lessons 31-90
-            for content in lesson["content"]:
-                for subcategory in content["subcategories"]:
-                    for sentence in subcategory["sentences"]:
-                        chinese_sentence = sentence["sentence"]
-                        
-                        # Extract word breakdown from existing words array
-                        word_breakdown = sentence["words"]["words"]
-                        
-                        # Generate enhanced translations
-                        enhanced = generate_enhanced_translations(chinese_sentence, word_breakdown)
-                        
-                        # Update the sentence data
-                        sentence["pinyin"] = enhanced["pinyin"]
-                        sentence["korean"] = enhanced["korean"]
-                        sentence["english"] = enhanced["english"]
-                        sentence["words"] = enhanced["words"]
-                        
-                        enhanced_count += 1
-    
-    print(f"Enhanced {enhanced_count} sentences")
-    
-    # Save the enhanced JSON
-    enhanced_file_path = json_file_path.replace(".json", "_enhanced.json")
-    with open(enhanced_file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    
-    print(f"Saved enhanced file: {enhanced_file_path}")
-    return enhanced_file_path
+def parse_lesson_ranges(text):
+    """'31-90,95' -> [(31, 90), (95, 95)]; an open end ('31-') runs to the last lesson"""
+    ranges = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        low, sep, high = part.partition('-')
+        low = int(low) if low else 1
+        high = (int(high) if high else float('inf')) if sep else low
+        ranges.append((low, high))
+    return ranges
+
+def in_lesson_ranges(lesson_number, lesson_ranges):
+    return any(low <= lesson_number <= high for low, high in lesson_ranges)
+
+def sentence_fingerprint(chinese_sentence, word_breakdown):
+    """Hash of everything an enhancement result depends on: text, segmentation and the dictionary entries used"""
+    inputs = [FINGERPRINT_VERSION, chinese_sentence, word_breakdown, lookup_translation(chinese_sentence),
+              [lookup_word(word) for word in word_breakdown]]
+    return hashlib.sha1(json.dumps(inputs, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def count_placeholders(value):
+    """Number of generated placeholders in a field value"""
+    return len(PLACEHOLDER_PATTERN.findall(json.dumps(value, ensure_ascii=False))) if value else 0
+
+def has_placeholders(sentence):
+    """True if a generated placeholder is left in any enhanced field of the sentence"""
+    return any(count_placeholders(sentence.get(field)) for field in ENHANCED_FIELDS)
+
+def may_replace(old, new):
+    """
+    Whether a generated value may fill old in a sentence whose inputs did
+    not change: only empty fields and fields that still hold placeholders
+    are filled, and never with more placeholders than they had
+    """
+    if not old or (isinstance(old, dict) and not old.get('words')):
+        return not count_placeholders(new)
+    placeholders = count_placeholders(old)
+    return placeholders > 0 and count_placeholders(new) < placeholders
+
+def enhance_lesson(lesson, lesson_ranges, file_name='', fingerprints=None):
+    """
+    Enhance the sentences of one lesson in range.
+
+    fingerprints ({sentence key: fingerprint} from the last run) turns on
+    incremental mode. A sentence whose fingerprint changed since the last
+    run is re-enhanced like in a full run. A sentence whose fingerprint is
+    unchanged (or seen for the first time) is only re-enhanced while it
+    still has placeholders, and then only gets values may_replace allows,
+    so hand-written text is never replaced. Returns a dict with the 'lesson',
+    counts of 'sentences' enhanced, 'skipped' and 'placeholders' (words
+    without a dictionary entry), the new 'fingerprints' and the 'changes'
+    made ({'key', 'field', 'old', 'new'} per changed field).
+    """
+    result = {'lesson': lesson, 'sentences': 0, 'skipped': 0, 'placeholders': 0, 'fingerprints': {}, 'changes': []}
+    if not in_lesson_ranges(lesson["lesson"], lesson_ranges):
+        return result
+    for key, sentence in iter_lesson_sentences(lesson, file_name):
+        chinese_sentence = sentence["sentence"]
+        
+        # Extract word breakdown from existing words array, or segment the sentence
+        breakdown = sentence.get("words")
+        if isinstance(breakdown, dict) and breakdown.get("words"):
+            word_breakdown = breakdown["words"]
+        else:
+            word_breakdown = segment_sentence(chinese_sentence)
+        
+        fingerprint_key = json.dumps(list(key), ensure_ascii=False)
+        fingerprint = sentence_fingerprint(chinese_sentence, word_breakdown)
+        result['fingerprints'][fingerprint_key] = fingerprint
+        # Only sentences whose inputs changed may have filled fields overwritten
+        changed = fingerprints is None or fingerprints.get(fingerprint_key, fingerprint) != fingerprint
+        if not changed and not has_placeholders(sentence):
+            result['skipped'] += 1
+            continue
+        
+        # Generate enhanced translations
+        enhanced = generate_enhanced_translations(chinese_sentence, word_breakdown)
+        
+        # Update the sentence data
+        for field in ENHANCED_FIELDS:
+            old = sentence.get(field)
+            if old == enhanced[field] or (not changed and not may_replace(old, enhanced[field])):
+                continue
+            result['changes'].append({'key': list(key), 'field': field, 'old': old, 'new': enhanced[field]})
+            sentence[field] = enhanced[field]
+        
+        result['sentences'] += 1
+        result['placeholders'] += sum(1 for pinyin in enhanced["words"]["pinyin"] if pinyin.endswith("_pinyin)"))
+    return result
+
+def enhanced_path(json_file_path, in_place=False):
+    if in_place:
+        return json_file_path
+    root, ext = os.path.splitext(json_file_path)
+    return f"{root}_enhanced{ext or '.json'}"
+
+def fingerprint_cache_path(json_file_path):
+    digest = hashlib.sha1(os.path.abspath(json_file_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(FINGERPRINT_CACHE_DIR, f"{os.path.basename(json_file_path)}.{digest}.json")
+
+def load_fingerprints(json_file_path):
+    """{lesson number (str): {sentence key: fingerprint}} stored for a file by the last run ({} if none)"""
+    try:
+        with open(fingerprint_cache_path(json_file_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_fingerprints(json_file_path, fingerprints):
+    path = fingerprint_cache_path(json_file_path)
+    os.makedirs(FINGERPRINT_CACHE_DIR, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def enhance_json_translations(json_file_path, lesson_ranges=DEFAULT_LESSON_RANGES, output_path=None,
+                              executor=None, window=None, incremental=False):
+    """
+    Enhance translations in a lesson file and write the result to output_path
+    (default: <file>_enhanced.json). Returns a stats dict with 'file',
+    'output', 'sentences', 'skipped', 'placeholders', 'changes' and 'seconds'.
+
+    With an executor, lessons are enhanced in its worker processes while
+    this process keeps reading ahead and writes the results in document
+    order, so the output is identical to a serial run.
+
+    Incremental runs continue from output_path if it exists (it holds the
+    earlier runs' changes) and only re-enhance sentences whose inputs
+    changed since the last run or that still have placeholders (see
+    enhance_lesson); the output is not written at all when nothing changed.
+    """
+    started = time.perf_counter()
+    output_path = output_path or enhanced_path(json_file_path)
+    source_path = output_path if incremental and os.path.exists(output_path) else json_file_path
+    stats = {'file': json_file_path, 'output': output_path, 'sentences': 0, 'skipped': 0, 'placeholders': 0,
+             'changes': []}
+    fingerprints = load_fingerprints(output_path)
+
+    def lesson_fingerprints(lesson):
+        return fingerprints.get(str(lesson.get('lesson')), {}) if incremental else None
+
+    def record(result):
+        for name in ('sentences', 'skipped', 'placeholders', 'changes'):
+            stats[name] += result[name]
+        if result['fingerprints']:
+            fingerprints[str(result['lesson'].get('lesson'))] = result['fingerprints']
+        return result['lesson']
+
+    # Stream lesson by lesson: only one lesson (or one window of lessons) is held in memory at a time
+    writer = LessonStreamWriter(output_path)
+    try:
+        pending = collections.deque()
+        for kind, item in iter_document(source_path):
+            if kind == 'lesson':
+                if executor is None:
+                    writer.write_lesson(record(enhance_lesson(item, lesson_ranges, json_file_path,
+                                                              lesson_fingerprints(item))))
+                    continue
+                pending.append(executor.submit(enhance_lesson, item, lesson_ranges, json_file_path,
+                                               lesson_fingerprints(item)))
+                if len(pending) >= (window or 8):
+                    writer.write_lesson(record(pending.popleft().result()))
+                continue
+            while pending:
+                writer.write_lesson(record(pending.popleft().result()))
+            if item[0] == 'contents':
+                writer.open_contents()
+            else:
+                writer.write_field(*item)
+        while pending:
+            writer.write_lesson(record(pending.popleft().result()))
+    except BaseException:
+        writer.abort()
+        raise
+    if incremental and not stats['changes']:
+        writer.abort()
+    else:
+        writer.close()
+    save_fingerprints(output_path, fingerprints)
+
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+def _enhance_file_job(json_file_path, lesson_ranges, output_path, incremental):
+    """Process pool entry point for --shard file"""
+    return enhance_json_translations(json_file_path, lesson_ranges, output_path, incremental=incremental)
+
+def write_diff(path, results):
+    """Append one JSON line per changed field ({'file', 'key', 'field', 'old', 'new'}) to path"""
+    with open(path, 'a', encoding='utf-8') as f:
+        for stats in results:
+            for change in stats['changes']:
+                f.write(json.dumps(dict(file=stats['file'], **change), ensure_ascii=False) + '\n')
+
+def describe_changes(changes):
+    """'3 sentences changed (pinyin 2, words 3)'"""
+    sentences = len({json.dumps(change['key'], ensure_ascii=False) for change in changes})
+    fields = collections.Counter(change['field'] for change in changes)
+    return f"{sentences} sentences changed ({', '.join(f'{field} {fields[field]}' for field in ENHANCED_FIELDS if fields[field]) or 'none'})"
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Enhance pinyin/Korean/word breakdowns of lesson files")
+    parser.add_argument('files', nargs='*', default=DEFAULT_FILES, help="lesson files or globs")
+    parser.add_argument('--lessons', type=parse_lesson_ranges, default=DEFAULT_LESSON_RANGES,
+                        help="lesson ranges to enhance, e.g. '31-90' or '1-10,31-' (default 31-)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (1 = serial, default: CPU count)")
+    parser.add_argument('--shard', choices=('file', 'lesson'), default='file',
+                        help="give each worker whole files (default) or single lessons")
+    parser.add_argument('--in-place', action='store_true', help="overwrite the input files instead of *_enhanced.json")
+    parser.add_argument('--incremental', action='store_true',
+                        help="continue from the last output, re-enhancing only sentences whose text, segmentation "
+                             "or dictionary entries changed since the last run or that still have placeholders "
+                             "(which only fill empty fields and fields with placeholders)")
+    parser.add_argument('--diff', default=None, metavar='FILE',
+                        help=f"append every changed field as JSONL to FILE (default with --incremental: "
+                             f"{DEFAULT_DIFF_FILE})")
+    return parser.parse_args()
 
 def main():
-    json_file_path = r"D:\Coding\chinesestudy\public\data\integrated\05_패턴_제1-90과.json"
-    enhanced_file = enhance_json_translations(json_file_path)
-    print(f"Enhancement complete: {enhanced_file}")
+    args = parse_args()
+    files = []
+    for pattern in args.files:
+        matches = sorted(glob.glob(pattern))
+        files.extend(path for path in matches if not path.endswith('_enhanced.json') and
+                     os.path.basename(path) != 'manifest.json')
+        if not matches:
+            print(f"⚠️ No files match {pattern}")
+    files = list(dict.fromkeys(files))
+    if not files:
+        return
+
+    started = time.perf_counter()
+    workers = max(1, args.workers)
+    in_place = args.in_place
+    mode = "incrementally " if args.incremental else ""
+    print(f"Enhancing translations {mode}in {len(files)} files with {workers} workers (per {args.shard})...")
+    results = []
+    if workers == 1:
+        results = [enhance_json_translations(path, args.lessons, enhanced_path(path, in_place),
+                                             incremental=args.incremental) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            if args.shard == 'file':
+                futures = [executor.submit(_enhance_file_job, path, args.lessons, enhanced_path(path, in_place),
+                                           args.incremental)
+                           for path in files]
+                results = [future.result() for future in futures]
+            else:
+                results = [enhance_json_translations(path, args.lessons, enhanced_path(path, in_place),
+                                                     executor=executor, window=workers * 2,
+                                                     incremental=args.incremental) for path in files]
+
+    # Reported in input order, whatever order the workers finished in
+    for stats in results:
+        if args.incremental:
+            target = f"→ {stats['output']}" if stats['changes'] else "(not rewritten)"
+            print(f"  {stats['file']}: {stats['sentences']} re-enhanced, {stats['skipped']} unchanged, "
+                  f"{describe_changes(stats['changes'])}, {stats['placeholders']} words without a dictionary "
+                  f"entry, {stats['seconds']:.2f}s {target}")
+        else:
+            print(f"  {stats['file']}: {stats['sentences']} sentences, {stats['placeholders']} words without a "
+                  f"dictionary entry, {stats['seconds']:.2f}s → {stats['output']}")
+    diff_path = args.diff or (DEFAULT_DIFF_FILE if args.incremental else None)
+    if diff_path and any(stats['changes'] for stats in results):
+        write_diff(diff_path, results)
+        print(f"📝 {sum(len(stats['changes']) for stats in results)} field changes written to {diff_path}")
+    print(f"Enhancement complete: {sum(s['sentences'] for s in results)} sentences in "
+          f"{time.perf_counter() - started:.2f}s")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,306 @@
+"""
+Debounced, atomic saving of lesson files
+
+Instead of re-dumping the whole lesson file after every changed sentence,
+changes are coalesced and written every N changes or T seconds (and on
+exit) through a temp file + os.replace, so a killed run never leaves a
+truncated JSON behind. Optionally each change is also appended to a small
+patch log next to the file; the log is compacted into the JSON on every
+flush and replayed on the next load if the process died in between.
+
+BackgroundSaver does the same for interactive tools, but off the caller's
+thread: changes are queued as (key, field, value) patches and a save
+thread applies them to its own copy of the file, coalescing everything
+that arrives within a short delay into one atomic write. The caller's
+data is never read by the save thread, so it can keep changing while a
+write is in progress, and marking a change costs one patch-log line.
+"""
+
+import atexit
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+
+from sentence_index import SentenceIndex
+
+FLUSH_EVERY = 20  # 변경 N건마다 저장
+FLUSH_INTERVAL = 10.0  # 마지막 저장 후 T초가 지나면 저장
+BACKGROUND_FLUSH_DELAY = 1.0  # 첫 변경 후 T초 동안 모아서 한 번에 저장
+SAVE_RETRY_INTERVAL = 5.0  # 저장 실패 시 재시도 간격
+
+_CLOSE = object()  # Tells the save thread to write what is left and stop
+
+
+def atomic_write_json(path, data):
+    """Write data as indented JSON to a temp file in the same directory, then rename it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def patch_log_path(path):
+    return path + '.patch.jsonl'
+
+
+class DebouncedSaver:
+    """Write-behind saver for one loaded lesson file"""
+
+    def __init__(self, path, data, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL, use_patch_log=True):
+        self.path = path
+        self.data = data
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.use_patch_log = use_patch_log
+        self.pending = 0
+        self.flushes = 0
+        self.last_flush = time.monotonic()
+        self._patch_file = None
+        atexit.register(self.close)
+
+    def recover(self):
+        """Replay a patch log left behind by a killed run into data; returns the number of patches applied"""
+        log_path = patch_log_path(self.path)
+        if not os.path.exists(log_path):
+            return 0
+        index = SentenceIndex.from_data(self.data, self.path)
+        applied = 0
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    patch = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial last line
+                entry = index.get(patch['key'])
+                if entry is not None:
+                    entry['sentence_obj'][patch['field']] = patch['value']
+                    applied += 1
+        if applied:
+            self.pending += applied
+            self.flush()
+        else:
+            os.remove(log_path)
+        return applied
+
+    def mark_changed(self, key=None, field=None, value=None):
+        """
+        Record that data changed; returns True if this call triggered a flush.
+
+        key/field/value describe the change for the patch log and can be
+        omitted when the patch log is disabled.
+        """
+        self.pending += 1
+        if self.use_patch_log and key is not None:
+            if self._patch_file is None:
+                self._patch_file = open(patch_log_path(self.path), 'a', encoding='utf-8')
+            self._patch_file.write(json.dumps({'key': list(key), 'field': field, 'value': value},
+                                              ensure_ascii=False) + '\n')
+            self._patch_file.flush()
+        return self.maybe_flush()
+
+    def maybe_flush(self):
+        """Flush if enough changes piled up or the interval elapsed"""
+        if not self.pending:
+            return False
+        if self.pending >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Write the whole file atomically and compact the patch log"""
+        if not self.pending:
+            return
+        atomic_write_json(self.path, self.data)
+        self.pending = 0
+        self.flushes += 1
+        self.last_flush = time.monotonic()
+        if self._patch_file is not None:
+            self._patch_file.close()
+            self._patch_file = None
+        log_path = patch_log_path(self.path)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+
+    def close(self):
+        """Flush outstanding changes (also runs at interpreter exit)"""
+        self.flush()
+        if self._patch_file is not None:
+            self._patch_file.close()
+            self._patch_file = None
+        atexit.unregister(self.close)
+
+
+class BackgroundSaver:
+    """
+    Write-behind saver for one loaded lesson file, running on its own thread.
+
+    mark_changed() only appends to the patch log and queues the patch. The
+    save thread loads the file from disk on the first change, applies
+    patches to that copy by sentence key, and writes it atomically once no
+    new patch has arrived for flush_delay seconds (or on close). The
+    unsaved and error attributes describe the current state for display.
+    """
+
+    def __init__(self, path, flush_delay=BACKGROUND_FLUSH_DELAY, use_patch_log=True):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.use_patch_log = use_patch_log
+        self.unsaved = 0  # Changes marked but not written yet
+        self.flushes = 0
+        self.error = None  # Last write failure, cleared by the next successful write
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._patch_file = None
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=f"save {os.path.basename(path)}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def recover(self, index):
+        """
+        Replay a patch log left behind by a killed run into the sentences of
+        index (a SentenceIndex of the loaded data) and queue the patches for
+        writing; returns the number of patches applied
+        """
+        log_path = patch_log_path(self.path)
+        if not os.path.exists(log_path):
+            return 0
+        patches = []
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    patch = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial last line
+                entry = index.get(patch['key'])
+                if entry is not None:
+                    entry['sentence_obj'][patch['field']] = patch['value']
+                    patches.append((tuple(patch['key']), patch['field'], patch['value']))
+        if not patches:
+            os.remove(log_path)
+            return 0
+        with self._lock:
+            # Already in the log; it is removed once they are written
+            self.unsaved += len(patches)
+            for patch in patches:
+                self._queue.put(patch)
+        return len(patches)
+
+    def mark_changed(self, key, field, value):
+        """Queue a change (the caller has already applied it to its own data)"""
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError(f"Saver for {os.path.basename(self.path)} is closed")
+            if self.use_patch_log:
+                if self._patch_file is None:
+                    self._patch_file = open(patch_log_path(self.path), 'a', encoding='utf-8')
+                self._patch_file.write(json.dumps({'key': list(key), 'field': field, 'value': value},
+                                                  ensure_ascii=False) + '\n')
+                self._patch_file.flush()
+            self.unsaved += 1
+            self._queue.put((tuple(key), field, value))
+
+    def _run(self):
+        """Save thread: collect patches, apply them to the file's data, write it"""
+        document = index = None
+        waiting = []  # Patches taken from the queue but not applied yet
+        applied = 0  # Patches applied to document but not written yet
+        closing = False
+        while not closing:
+            try:
+                item = self._queue.get(timeout=SAVE_RETRY_INTERVAL if waiting or applied else None)
+            except queue.Empty:
+                item = None  # Retry a failed write
+            if item is _CLOSE:
+                closing = True
+            elif item is not None:
+                waiting.append(item)
+                # Coalesce: keep collecting until the changes pause for flush_delay
+                while True:
+                    try:
+                        item = self._queue.get(timeout=self.flush_delay)
+                    except queue.Empty:
+                        break
+                    if item is _CLOSE:
+                        closing = True
+                        break
+                    waiting.append(item)
+            if not waiting and not applied:
+                continue
+            try:
+                if document is None:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        document = json.load(f)
+                    index = SentenceIndex.from_data(document, self.path)
+                for key, field, value in waiting:
+                    entry = index.get(key)
+                    if entry is not None:
+                        entry['sentence_obj'][field] = value
+                applied += len(waiting)
+                waiting = []
+                atomic_write_json(self.path, document)
+            except Exception as e:
+                self.error = e
+                continue
+            self._written(applied)
+            applied = 0
+
+    def _written(self, count):
+        with self._lock:
+            self.unsaved -= count
+            self.flushes += 1
+            self.error = None
+            if self.unsaved:
+                return
+            # Everything logged is on disk now
+            if self._patch_file is not None:
+                self._patch_file.close()
+                self._patch_file = None
+            log_path = patch_log_path(self.path)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+
+    def stop(self):
+        """
+        Ask the save thread to write outstanding changes and exit, without
+        waiting for it; poll stopped() and then call close() for the result
+        """
+        with self._lock:
+            if self._stopping:
+                return
+            self._stopping = True
+        self._queue.put(_CLOSE)
+
+    def stopped(self):
+        """True once the save thread has exited (close() no longer blocks)"""
+        return not self._thread.is_alive()
+
+    def close(self):
+        """
+        Write outstanding changes and stop the save thread (also runs at
+        interpreter exit); raises the write error if changes could not be
+        saved. They stay in the patch log and are recovered on the next load.
+        """
+        self.stop()
+        self._thread.join()
+        with self._lock:
+            if self._patch_file is not None:
+                self._patch_file.close()
+                self._patch_file = None
+        atexit.unregister(self.close)
+        if self.unsaved and self.error is not None:
+            raise self.error
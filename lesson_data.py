@@ -0,0 +1,31 @@
+"""
+Helpers for walking lesson files
+
+Lesson files nest sentences as contents -> content -> subcategories -> sentences.
+Every sentence gets a stable key (file, lesson, category, subcategory, id)
+that survives re-ordering and re-saving, unlike a running sentence index.
+"""
+
+import os
+
+
+def sentence_key(file_name, lesson, category, subcategory, sentence, position):
+    """Stable key of a sentence; falls back to its 1-based position when it has no id"""
+    return (os.path.basename(file_name), lesson, category, subcategory, sentence.get('id', position))
+
+
+def iter_lesson_sentences(content, file_name):
+    """Yield (key, sentence) for every sentence of one entry of data['contents']"""
+    lesson = content.get('lesson')
+    for lesson_content in content['content']:
+        category = lesson_content.get('category', '')
+        for subcategory in lesson_content['subcategories']:
+            subcategory_name = subcategory.get('subcategory', '')
+            for position, sentence in enumerate(subcategory['sentences'], start=1):
+                yield sentence_key(file_name, lesson, category, subcategory_name, sentence, position), sentence
+
+
+def iter_sentences(data, file_name):
+    """Yield (key, sentence) for every sentence in a loaded lesson file, in document order"""
+    for content in data['contents']:
+        yield from iter_lesson_sentences(content, file_name)
@@ -0,0 +1,216 @@
+"""
+Streaming reader/writer for lesson files
+
+A lesson file is one JSON object whose 'contents' array holds one entry per
+lesson. The reader parses the small top-level fields normally but decodes
+'contents' one lesson at a time from a chunked buffer, and the writer
+re-emits the document lesson by lesson in the same indent=4 layout as
+json.dump. Peak memory stays proportional to one lesson, not the course.
+"""
+
+import json
+import os
+import tempfile
+
+from lesson_data import iter_lesson_sentences
+
+CHUNK_SIZE = 64 * 1024
+INDENT = 4
+
+_decoder = json.JSONDecoder()
+
+
+class _Scanner:
+    """Chunked character buffer with just enough JSON tokenizing for the top level"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what was already consumed so the buffer only holds the current lesson
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed lesson file: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next JSON value, reading more input until it is complete"""
+        self.peek()
+        grow = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(grow):
+                    raise
+                grow *= 2  # Large lessons: fewer re-parse attempts
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not isinstance(value, (dict, list, str)) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_document(path, chunk_size=CHUNK_SIZE):
+    """
+    Yield ('field', (name, value)) for top-level fields and ('lesson', lesson)
+    for each entry of 'contents', in document order.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        scanner = _Scanner(f, chunk_size)
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            name = scanner.value()
+            scanner.expect(':')
+            if name == 'contents' and scanner.peek() == '[':
+                scanner.expect('[')
+                yield 'field', (name, None)
+                if scanner.peek() != ']':
+                    while True:
+                        yield 'lesson', scanner.value()
+                        if scanner.peek() == ',':
+                            scanner.expect(',')
+                            continue
+                        break
+                scanner.expect(']')
+            else:
+                yield 'field', (name, scanner.value())
+            if scanner.peek() == ',':
+                scanner.expect(',')
+                continue
+            scanner.expect('}')
+            return
+
+
+def iter_lessons(path, chunk_size=CHUNK_SIZE):
+    """Yield each lesson (entry of 'contents') of a lesson file lazily"""
+    for kind, item in iter_document(path, chunk_size):
+        if kind == 'lesson':
+            yield item
+
+
+def iter_sentence_records(path, chunk_size=CHUNK_SIZE):
+    """Yield (key, sentence) for every sentence of a lesson file, parsing one lesson at a time"""
+    for lesson in iter_lessons(path, chunk_size):
+        yield from iter_lesson_sentences(lesson, path)
+
+
+class LessonStreamWriter:
+    """
+    Write a lesson file lesson by lesson, byte-identical to json.dump(indent=4).
+
+    Output goes to a temp file that replaces path on close(), so readers
+    never see a half-written document.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, self._tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp',
+                                              dir=directory)
+        self._f = os.fdopen(fd, 'w', encoding='utf-8')
+        self._fields = 0
+        self._lessons = None  # None until 'contents' is opened
+        self._f.write('{')
+
+    def _dump(self, value, level):
+        text = json.dumps(value, ensure_ascii=False, indent=INDENT)
+        return text.replace('\n', '\n' + ' ' * (INDENT * level))
+
+    def _open_field(self, name):
+        self._close_contents()
+        self._f.write(',' if self._fields else '')
+        self._f.write('\n' + ' ' * INDENT + json.dumps(name, ensure_ascii=False) + ': ')
+        self._fields += 1
+
+    def write_field(self, name, value):
+        self._open_field(name)
+        self._f.write(self._dump(value, 1))
+
+    def write_lesson(self, lesson):
+        if self._lessons is None:
+            self._open_field('contents')
+            self._f.write('[')
+            self._lessons = 0
+        self._f.write(',' if self._lessons else '')
+        self._f.write('\n' + ' ' * (INDENT * 2) + self._dump(lesson, 2))
+        self._lessons += 1
+
+    def open_contents(self):
+        """Start 'contents' at this position even if no lesson follows"""
+        if self._lessons is None:
+            self._open_field('contents')
+            self._f.write('[')
+            self._lessons = 0
+
+    def _close_contents(self):
+        if self._lessons is not None and self._lessons >= 0:
+            self._f.write('\n' + ' ' * INDENT + ']' if self._lessons else ']')
+            self._lessons = -1  # Closed
+
+    def close(self):
+        self._close_contents()
+        self._f.write('\n}' if self._fields else '}')
+        self._f.close()
+        if os.path.exists(self.path):
+            os.chmod(self._tmp_path, os.stat(self.path).st_mode & 0o777)
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._f.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def rewrite_lessons(src_path, dst_path, transform):
+    """
+    Stream src_path to dst_path, passing every lesson through transform(lesson).
+
+    transform may modify the lesson in place and return None, or return a
+    replacement. src_path and dst_path may be the same file.
+    """
+    with LessonStreamWriter(dst_path) as writer:
+        for kind, item in iter_document(src_path):
+            if kind == 'lesson':
+                result = transform(item)
+                writer.write_lesson(item if result is None else result)
+            elif item[0] == 'contents':
+                writer.open_contents()
+            else:
+                writer.write_field(*item)
@@ -1,13 +1,27 @@
+import argparse
 import json
-import subprocess
 import sys
-import re
+
+from json_saver import DebouncedSaver
+from lesson_data import iter_sentences
+from rate_limiter import REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE
+from response_extract import extract_clean_response
+from run_journal import RunJournal
+from verify_batch import chunk_tasks, make_batch_worker
+from verify_cache import ResponseCache
+from verify_multi import make_multi_worker
+from verifier_backend import add_backend_arguments, backend_from_args
+from verify_engine import (ThroughputStats, build_prompt_context, get_backend, make_scheduler, run_concurrent,
+                           set_backend)
 
 # Configuration
-START_INDEX = 0  # 시작할 문장 인덱스 (예: 50번째부터 시작하려면 49로 설정)
 INPUT_FILE = 'public/data/integrated/03_고급반_제26-40과.json'
 OUTPUT_FILE = 'public/data/integrated/03_고급반_제26-40과.json'
 DEBUG_PROMPT = True  # 프롬프트 디버깅 모드
+MAX_WORKERS = 4  # 동시에 실행할 검증 프로세스 수 (1이면 순차 실행)
+BATCH_SIZE = 10  # 한 번의 호출에 묶어 보낼 문장 수 (1이면 문장별 호출)
+SAVE_EVERY = 20  # 변경 N건마다 저장 (SAVE_INTERVAL초가 지나도 저장)
+SAVE_INTERVAL = 10.0
 
 # Field configuration with menu options
 FIELD_OPTIONS = {
@@ -45,173 +59,282 @@ def get_field_selection():
 
         print("❌ Invalid choice. Please select 0-7.")
 
-# Load the JSON file
-with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-# Get field selection from user
-selected_field = get_field_selection()
-field_key = selected_field['key']
-field_name = selected_field['name']
-prompt_template = selected_field['prompt_template']
-
-print(f"\n✅ Selected field: {field_name}")
-print(f"📝 Starting verification from sentence index {START_INDEX}...\n")
-
-# Function to extract clean response from Claude's output
-def extract_clean_response(text):
-    """
-    Extract clean response from Claude's output, removing explanations and formatting
-    """
-    text = text.strip()
-
-    # Remove common prefixes
-    text = re.sub(r'^(Your answer|Pinyin|Answer|Response|Korean|English|Japanese|Chinese)[:\s]*', '', text, flags=re.IGNORECASE)
-
-    # Split into lines and get first non-empty line
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-
-    if not lines:
-        return ""
-
-    # Take the first line as it should be the answer
-    first_line = lines[0]
-
-    # Remove markdown formatting
-    first_line = re.sub(r'\*\*', '', first_line)
-    first_line = re.sub(r'`', '', first_line)
-    first_line = first_line.strip()
-
-    # Basic validation: should not be empty and not contain meta-language
-    if (len(first_line) >= 1 and
-        not any(word in first_line.lower() for word in [
-            'verify', 'check', 'please', 'respond', 'provide',
-            'however', 'happy', 'help', 'want', 'could', 'would', 'should'
-        ])):
-        return first_line
 
-    return ""
-
-# Loop through sentences with counter
-count = 0
-sentence_index = 0
-should_exit = False
+def collect_tasks(data, prompt_template, field_key, journal):
+    """Turn every sentence not yet verified according to the journal into a task"""
+    tasks = []
+    skipped = 0
+
+    for sentence_index, (key, sentence) in enumerate(iter_sentences(data, INPUT_FILE)):
+        # Already verified in an earlier run
+        if journal.is_done(field_key, key):
+            skipped += 1
+            continue
+
+        if not sentence.get('sentence', ''):
+            print(f"No Chinese sentence found for sentence #{sentence_index + 1}")
+            continue
+
+        tasks.append({
+            'index': sentence_index,
+            'key': key,
+            'sentence': sentence,
+            'prompt': prompt_template.format(**build_prompt_context(sentence))
+        })
+
+    return tasks, skipped
+
+def collect_multi_tasks(data, fields, journal):
+    """One task per sentence with the fields the journal has not marked verified yet"""
+    tasks = []
+    skipped = 0
+
+    for sentence_index, (key, sentence) in enumerate(iter_sentences(data, INPUT_FILE)):
+        remaining = [field for field in fields if not journal.is_done(field, key)]
+        if not remaining:
+            skipped += 1
+            continue
+
+        if not sentence.get('sentence', ''):
+            print(f"No Chinese sentence found for sentence #{sentence_index + 1}")
+            continue
+
+        tasks.append({
+            'index': sentence_index,
+            'key': key,
+            'sentence': sentence,
+            'fields': remaining,
+            'context': build_prompt_context(sentence)
+        })
+
+    return tasks, skipped
+
+def verify_fields(data, saver, journal, cache, scheduler, fields):
+    """Verify several fields per sentence with one combined call; returns (updated, should_exit, stats)"""
+    templates = {option['key']: option['prompt_template'] for option in FIELD_OPTIONS.values()}
+    tasks, skipped = collect_multi_tasks(data, fields, journal)
+    print(f"📝 Verifying {', '.join(fields)} in one call per sentence: {skipped} sentences already verified, "
+          f"{len(tasks)} to go with {MAX_WORKERS} workers...\n")
+
+    # Workers are built per field set, since resumed sentences may only miss some fields; all of them up
+    # front, because the pool threads only read the dict
+    workers = {field_set: make_multi_worker(field_set, templates, extract_clean_response, cache=cache,
+                                            scheduler=scheduler)
+               for field_set in {tuple(task['fields']) for task in tasks}}
+
+    def worker(task):
+        return workers[tuple(task['fields'])](task)
+
+    count = 0
+    should_exit = False
+    stats = ThroughputStats()
+
+    for task, result in run_concurrent(tasks, worker, max_workers=MAX_WORKERS, stats=stats):
+        item = result['items'][0]
+        sentence = task['sentence']
+        print(f"\n[Sentence #{task['index'] + 1}] {sentence.get('sentence', '')}")
+        if item['error']:
+            print(f"Error: {item['error']}")
+
+        for field in task['fields']:
+            via = item['via'].get(field)
+            if via == 'rate_limit':
+                print(f"\n⚠️ Rate limit still in effect after waiting, stopping at sentence #{task['index'] + 1}")
+                should_exit = True
+                break
 
-for content in data['contents']:
-    if should_exit:
-        break
-    for lesson_content in content['content']:
+            current_value = sentence.get(field, '')
+            value = item['values'].get(field, '')
+            outcome = 'error' if item['error'] and not value else 'failed'
+            if value:
+                outcome = 'updated'
+                if value != current_value:
+                    sentence[field] = value
+                    print(f"✏️ Updated {field} ({via}): {current_value} → {value}")
+                    count += 1
+                    if saver.mark_changed(task['key'], field, value):
+                        print(f"💾 Saved after updating sentence #{task['index'] + 1}")
+                else:
+                    outcome = 'unchanged'
+                    print(f"✓ {field} is correct ({via})")
+            else:
+                print(f"⚠️ Failed to extract valid {field}, skipping update")
+            journal.record(field, task['key'], outcome)
+
+        saver.maybe_flush()
         if should_exit:
             break
-        for subcategory in lesson_content['subcategories']:
-            if should_exit:
+
+    verified = sum(len(task['fields']) for task in tasks)
+    print(f"\n💡 Multi-field: {verified} field verifications in {len(stats.latencies)} calls "
+          f"(one call per field would have taken {verified})")
+    return count, should_exit, stats
+
+def verify_field(data, saver, journal, cache, scheduler, selected_field):
+    """Verify one field of every sentence in batched calls; returns (updated, should_exit, stats)"""
+    field_key = selected_field['key']
+    field_name = selected_field['name']
+    prompt_template = selected_field['prompt_template']
+
+    tasks, skipped = collect_tasks(data, prompt_template, field_key, journal)
+    print(f"📝 Starting verification: {skipped} sentences already verified in {journal.path}, {len(tasks)} to go "
+          f"with {MAX_WORKERS} workers, {BATCH_SIZE} sentences per call...\n")
+    batches = chunk_tasks(tasks, BATCH_SIZE)
+    worker = make_batch_worker(prompt_template, extract_clean_response, field_key, cache=cache, scheduler=scheduler)
+
+    count = 0
+    should_exit = False
+    stats = ThroughputStats()
+
+    # Results arrive in sentence order, so updates and saves stay on this thread
+    for batch, result in run_concurrent(batches, worker, max_workers=MAX_WORKERS, stats=stats):
+        for task, item in zip(batch, result['items']):
+            sentence_index = task['index']
+            sentence = task['sentence']
+            chinese_sentence = sentence.get('sentence', '')
+            current_value = sentence.get(field_key, '')
+
+            print(f"\n[Sentence #{sentence_index + 1}]")
+            print(f"Chinese: {chinese_sentence}")
+            print(f"Current {field_name}: {current_value}")
+
+            if DEBUG_PROMPT and sentence_index < 2:
+                print(f"\n📝 Debug - Full prompt being sent:")
+                print(f"'{task['prompt']}'")
+                print(f"📝 End of prompt\n")
+                print(f"📝 Debug - stderr: {item['stderr']}")
+                print(f"📝 Debug - returncode: {item['returncode']}")
+
+            # Check for rate limit message
+            if item['via'] == 'rate_limit':
+                print(f"Claude raw output: {item['output']}")
+                print(f"\n⚠️ Rate limit still in effect after waiting, stopping at sentence #{sentence_index + 1}")
+                should_exit = True
                 break
-            for sentence in subcategory['sentences']:
-                # Skip sentences before START_INDEX
-                if sentence_index < START_INDEX:
-                    sentence_index += 1
-                    continue
-
-                # Get the Chinese sentence and current field value
-                chinese_sentence = sentence.get('sentence', '')
-                current_value = sentence.get(field_key, '')
-                current_pinyin = sentence.get('pinyin', '')
-
-                if not chinese_sentence:
-                    print(f"No Chinese sentence found for sentence #{sentence_index + 1}")
-                    sentence_index += 1
-                    continue
-
-                print(f"\n[Sentence #{sentence_index + 1}]")
-                print(f"Chinese: {chinese_sentence}")
-                print(f"Current {field_name}: {current_value}")
-
-                # Prepare context data for prompt template
-                context = {
-                    'chinese_sentence': chinese_sentence,
-                    'current_pinyin': sentence.get('pinyin', ''),
-                    'current_korean': sentence.get('korean', ''),
-                    'current_english': sentence.get('english', ''),
-                    'current_japanese': sentence.get('japanese', ''),
-                    'current_japanese_romaji': sentence.get('japanese_romaji', ''),
-                    'current_translation': sentence.get('translation', '')
-                }
-
-                # Create prompt using the template
-                prompt = prompt_template.format(**context)
-
-                if DEBUG_PROMPT and sentence_index < 2:
-                    print(f"\n📝 Debug - Full prompt being sent:")
-                    print(f"'{prompt}'")
-                    print(f"📝 End of prompt\n")
-
-                try:
-                    # Try using stdin instead of -p flag
-                    result = subprocess.run(['claude.cmd'],
-                                            input=prompt,
-                                            capture_output=True, text=True,
-                                            encoding='utf-8', errors='ignore')
-
-                    if DEBUG_PROMPT and sentence_index < 2:
-                        print(f"📝 Debug - stderr: {result.stderr}")
-                        print(f"📝 Debug - returncode: {result.returncode}")
-
-                    if result.stdout:
-                        output = result.stdout.strip()
-                        print(f"Claude raw output: {output}")
-
-                        # Check for rate limit message
-                        if "5-hour limit reached" in output or "resets" in output:
-                            print(f"\n⚠️ Rate limit reached at sentence index {sentence_index}")
-                            print(f"Resume from index {sentence_index} by setting START_INDEX = {sentence_index}")
-                            should_exit = True
-                            break
-
-                        # Extract clean response
-                        clean_result = extract_clean_response(output)
-                        print(f"Extracted result: {clean_result}")
-
-                        # Only update if we got a valid result AND it's different
-                        if clean_result:
-                            if clean_result != current_value:
-                                sentence[field_key] = clean_result
-                                print(f"✏️ Updated {field_name}: {current_value} → {clean_result}")
-                                count += 1
-
-                                # Save the updated data after each update
-                                with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                                    json.dump(data, f, ensure_ascii=False, indent=4)
-                                print(f"💾 Saved after updating sentence #{sentence_index + 1}")
-                            else:
-                                print(f"✓ {field_name} is correct, no update needed")
-                        else:
-                            print(f"⚠️ Failed to extract valid result, skipping update")
-                    else:
-                        print("Error: No output received")
 
-                except (FileNotFoundError, UnicodeDecodeError) as e:
-                    print(f"Error: {e}")
+            outcome = 'error'
+            if item['error']:
+                print(f"Error: {item['error']}")
+            elif item['output']:
+                print(f"Claude raw output ({item['via']}): {item['output']}")
+
+                # Extracted in the worker with extract_clean_response
+                clean_result = item['value']
+                print(f"Extracted result: {clean_result}")
+
+                # Only update if we got a valid result AND it's different
+                outcome = 'failed'
+                if clean_result:
+                    outcome = 'updated'
+                    if clean_result != current_value:
+                        sentence[field_key] = clean_result
+                        print(f"✏️ Updated {field_name}: {current_value} → {clean_result}")
+                        count += 1
+
+                        if saver.mark_changed(task['key'], field_key, clean_result):
+                            print(f"💾 Saved after updating sentence #{sentence_index + 1}")
+                    else:
+                        outcome = 'unchanged'
+                        print(f"✓ {field_name} is correct, no update needed")
+                else:
+                    print(f"⚠️ Failed to extract valid result, skipping update")
+            else:
+                print("Error: No output received")
 
-                if should_exit:
-                    break
+            journal.record(field_key, task['key'], outcome)
+            saver.maybe_flush()
+            print("---")
 
-                sentence_index += 1
-                print("---")
+        if should_exit:
+            break
 
-                # Uncomment to stop after N sentences for testing
-                # if count >= 3:
-                #     print(f"\n⏹️ Stopping after {count} sentences for testing")
-                #     should_exit = True
-                #     break
+    return count, should_exit, stats
+
+def parse_field_list(value):
+    """argparse type for --fields: comma-separated field keys from FIELD_OPTIONS"""
+    known = [option['key'] for option in FIELD_OPTIONS.values()]
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in known]
+    if not fields:
+        raise argparse.ArgumentTypeError("no field given")
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown field(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+def parse_args():
+    """Parse command line options"""
+    fields = [option['key'] for option in FIELD_OPTIONS.values()]
+    parser = argparse.ArgumentParser(description="Verify one field of every sentence with Claude")
+    parser.add_argument('--fields', type=parse_field_list, default=None,
+                        help=f"comma-separated fields to verify together in one call per sentence "
+                             f"(any of {', '.join(fields)}); skips the field menu")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignore the response cache and ask Claude about every sentence")
+    parser.add_argument('--restart', action='store_true',
+                        help="forget journaled progress for this file/field and verify every sentence again")
+    parser.add_argument('--rpm', type=int, default=REQUESTS_PER_MINUTE,
+                        help=f"maximum verifier requests per minute (default {REQUESTS_PER_MINUTE})")
+    parser.add_argument('--tpm', type=int, default=TOKENS_PER_MINUTE,
+                        help=f"maximum estimated prompt tokens per minute (default {TOKENS_PER_MINUTE})")
+    add_backend_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    set_backend(backend_from_args(args))
+
+    # Load the JSON file
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    fields = args.fields
+    if fields:
+        print(f"\n✅ Selected fields: {', '.join(fields)}")
+    else:
+        # Get field selection from user
+        selected_field = get_field_selection()
+        fields = [selected_field['key']]
+        print(f"\n✅ Selected field: {selected_field['name']}")
+
+    # Changes are coalesced and written atomically; a patch log covers a kill in between
+    saver = DebouncedSaver(OUTPUT_FILE, data, flush_every=SAVE_EVERY, flush_interval=SAVE_INTERVAL)
+    recovered = saver.recover()
+    if recovered:
+        print(f"♻️ Recovered {recovered} unsaved updates from the last run")
+
+    journal = RunJournal()
+    if args.restart:
+        for field in fields:
+            journal.reset(field, INPUT_FILE)
+
+    cache = ResponseCache(enabled=not args.no_cache)
+    scheduler = make_scheduler(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    if args.fields:
+        count, should_exit, stats = verify_fields(data, saver, journal, cache, scheduler, fields)
+    else:
+        count, should_exit, stats = verify_field(data, saver, journal, cache, scheduler, selected_field)
+
+    # Save any pending updates back to the JSON file
+    saver.close()
+
+    print(f"\n{stats.report()}")
+    print(cache.report())
+    if scheduler:
+        print(scheduler.report())
+    backend = get_backend()
+    if hasattr(backend, 'report'):
+        print(backend.report())
+    backend.close()
+    cache.close()
+    journal.close()
 
-# Save the updated data back to the JSON file
-with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=4)
+    if should_exit:
+        print(f"\n❗ Execution stopped after recording {journal.recorded} sentences.")
+        print(f"📌 Progress is journaled in {journal.path}; run the script again to resume")
+    else:
+        print(f"\n✅ File processing completed! Updated {count} sentences.")
 
-if should_exit:
-    print(f"\n❗ Execution stopped after processing {sentence_index} sentences.")
-    print(f"📌 To resume, set START_INDEX = {sentence_index} in the script")
-else:
-    print(f"\n✅ File processing completed! Updated {count} sentences.")
+    print(f"💾 File saved: {OUTPUT_FILE}")
 
-print(f"💾 File saved: {OUTPUT_FILE}")
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,87 @@
+import argparse
+import collections
 import json
-import subprocess
-import re
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 from threading import Thread
 import os
 import glob
+import re
+import time
+
+from json_saver import BackgroundSaver
+from sentence_index import SentenceIndex
+from request_loop import MAX_CONCURRENT, RequestLoop
+from response_extract import extract_result, validate_chinese, validate_pinyin, validate_translation
+from verify_cache import ResponseCache, make_cache_key
+from verifier_backend import add_backend_arguments, backend_from_args
+from verify_engine import get_backend, make_scheduler, set_backend
+
+FILE_CACHE_SIZE = 4  # 파싱해 둔 파일 수 (전환 시 재파싱 방지)
+SAVE_POLL_INTERVAL = 100  # 닫는 중인 저장 스레드 확인 간격(ms)
+BATCH_RANGE_PATTERN = re.compile(r'^(\d+)(?:\s*-\s*(\d*))?$')
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def parse_batch_range(text, entries):
+    """
+    Indices of the index entries selected by '1-50, 80' (1-based sentence
+    numbers) or 'L3-5' (lessons); an open end ('30-') runs to the last one,
+    an empty text selects everything. Raises ValueError on anything else.
+    """
+    text = text.strip()
+    if not text:
+        return list(range(len(entries)))
+    by_lesson = text[0] in 'Ll'
+    if by_lesson:
+        text = text[1:]
+    ranges = []
+    for part in text.split(','):
+        match = BATCH_RANGE_PATTERN.match(part.strip())
+        if not match:
+            raise ValueError(f"Invalid range: {part.strip()!r} (use e.g. 1-50, 80 or L3-5)")
+        low = int(match.group(1))
+        high = low if match.group(2) is None else int(match.group(2) or 10 ** 9)
+        ranges.append((low, high))
+    if by_lesson:
+        return [index for index, entry in enumerate(entries)
+                if isinstance(entry['lesson'], int) and any(low <= entry['lesson'] <= high for low, high in ranges)]
+    return [index for index in range(len(entries)) if any(low <= index + 1 <= high for low, high in ranges)]
+
 
 class UniversalDataVerifierUI:
-    def __init__(self, root):
+    def __init__(self, root, use_cache=True, lookahead=0, max_concurrent=MAX_CONCURRENT):
         self.root = root
         self.root.title("Universal Data Verifier")
         self.root.geometry("1000x850")
 
         # Data
         self.data = None
+        self.index = None  # SentenceIndex of the loaded file
         self.sentences = []
         self.current_index = 0
-        self.pending_requests = {}  # Track async requests
+        self.prefetched = {}  # Results that arrived for sentences or fields not on screen, by request key
+        self.lookahead_var = tk.IntVar(value=lookahead)  # Sentences ahead to keep requests in flight for
+        self.batch = None  # Running "verify range" job
+        self.batch_range_var = tk.StringVar(value='')
+        self.batch_workers_var = tk.IntVar(value=4)
         self.current_file = None
+        self.file_cache = collections.OrderedDict()  # Parsed files by path (LRU), see _cached_file
+        self.load_generation = 0  # Bumped per load so a superseded background load is not shown
+        self.saver = None  # Background atomic saver for the loaded file
+        self.closing_savers = {}  # Savers of released files still writing, by path (see _poll_closing_savers)
+        self.window_closing = False
+        self.response_cache = ResponseCache(enabled=use_cache)  # Shared with p_all.py / p_pinyin.py
+        # Request budget, retries and usage-limit waits (none for an offline stub); messages go to the status label
+        self.scheduler = make_scheduler(log=lambda msg: self.root.after(
+            0, lambda: self.status_label.config(text=msg, foreground="orange")))
+        # Every request runs on one background asyncio loop; results come back through root.after
+        self.requests = RequestLoop(max_concurrent=max_concurrent, scheduler=self.scheduler,
+                                    cache=self.response_cache, dispatch=lambda callback: self.root.after(0, callback))
 
         # Field configuration
         self.available_fields = [
@@ -48,32 +111,98 @@ class UniversalDataVerifierUI:
             self.file_combo.set(os.path.basename(self.json_files[0]))
             self.load_data()
 
+        # Changes are written by the saver's thread; show its state, and flush it on close
+        self.root.after(500, self._save_indicator_tick)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def load_data(self):
-        """Load JSON data and flatten sentences"""
+        """Load the selected file: from the parsed-file cache if unchanged on disk, else in the background"""
+        selected_file = self.file_combo.get()
+        path = os.path.join('public/data/integrated', selected_file)
+        self.load_generation += 1
+
+        cached = self._cached_file(path)
+        if cached is not None:
+            self._activate_file(path, cached)
+            return
+
+        self.status_label.config(text=f"⏳ Loading {selected_file}...", foreground="orange")
+        Thread(target=self._load_file_thread, args=(path, self.load_generation), daemon=True).start()
+
+    def _load_file_thread(self, path, generation):
+        """Parse a lesson file and build its sentence index (background thread)"""
         try:
-            # Get selected file from combobox
-            selected_file = self.file_combo.get()
-            self.current_file = os.path.join('public/data/integrated', selected_file)
-
-            with open(self.current_file, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
-
-            # Flatten sentences with references to original objects
-            self.sentences = []
-            for content in self.data['contents']:
-                for lesson_content in content['content']:
-                    for subcategory in lesson_content['subcategories']:
-                        for sentence in subcategory['sentences']:
-                            self.sentences.append({
-                                'sentence_obj': sentence,  # Reference to original
-                                'chinese': sentence.get('sentence', ''),
-                                'pinyin': sentence.get('pinyin', ''),
-                                'translation': sentence.get('translation', '')
-                            })
-
-            # Load first sentence if available
+            stamp = file_stamp(path)  # Taken first: a write during the read makes the entry stale
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Flat entries with stable keys and references to the original sentence objects
+            index = SentenceIndex.from_data(data, path)
+        except Exception as e:
+            error_msg = str(e)
+            self.root.after(0, lambda: self._handle_load_error(error_msg, generation))
+            return
+        self.root.after(0, lambda: self._on_file_loaded(path, generation, stamp, data, index))
+
+    def _on_file_loaded(self, path, generation, stamp, data, index):
+        """Cache a parsed file and show it unless another file was selected meanwhile (main thread)"""
+        entry = {'stamp': stamp, 'data': data, 'index': index, 'position': 0}
+        self.file_cache[path] = entry
+        self.file_cache.move_to_end(path)
+        while len(self.file_cache) > FILE_CACHE_SIZE:
+            oldest = next(iter(self.file_cache))
+            if oldest == self.current_file:
+                self.file_cache.move_to_end(oldest)
+                continue
+            del self.file_cache[oldest]
+        if generation == self.load_generation:
+            self._activate_file(path, entry)
+
+    def _handle_load_error(self, error_msg, generation):
+        if generation != self.load_generation:
+            return
+        self.status_label.config(text="❌ Load failed", foreground="red")
+        messagebox.showerror("Error", f"Failed to load data: {error_msg}")
+        if not self.current_file:
+            self.root.quit()
+
+    def _cached_file(self, path):
+        """Parsed entry of path if its mtime and size still match, else None"""
+        entry = self.file_cache.get(path)
+        if entry is None:
+            return None
+        try:
+            if file_stamp(path) != entry['stamp']:
+                del self.file_cache[path]
+                return None
+        except OSError:
+            return None
+        self.file_cache.move_to_end(path)
+        return entry
+
+    def _activate_file(self, path, entry):
+        """Make a parsed file the one on screen"""
+        if path in self.closing_savers:
+            self._activate_when_saved(path, entry)
+            return
+        try:
+            self._release_file()
+            if path in self.closing_savers:
+                # Reloading the file on screen: its own saver has to finish first
+                self._activate_when_saved(path, entry)
+                return
+
+            self.current_file = path
+            self.data = entry['data']
+            self.index = entry['index']
+            self.sentences = self.index.entries
+
+            self.saver = BackgroundSaver(self.current_file)
+            self.saver.recover(self.index)  # Patches are applied to the indexed sentence objects in place
+            self.status_label.config(text="")
+
+            # Back to where the operator left this file
             if self.sentences:
-                self.load_sentence(0)
+                self.load_sentence(min(entry['position'], len(self.sentences) - 1))
             else:
                 messagebox.showinfo("Info", "No sentences found in this file")
 
@@ -82,6 +211,53 @@ class UniversalDataVerifierUI:
             if not self.current_file:
                 self.root.quit()
 
+    def _activate_when_saved(self, path, entry):
+        """Activate path once its previous saver (which owns the patch log) has finished writing"""
+        generation = self.load_generation
+        self.status_label.config(text=f"⏳ Saving {os.path.basename(path)}...", foreground="orange")
+        self.root.after(SAVE_POLL_INTERVAL,
+                        lambda: generation == self.load_generation and self._activate_file(path, entry))
+
+    def _release_file(self):
+        """Stop work on the file on screen and write out its pending changes"""
+        # A running batch job verifies sentences of the previous file
+        if self.batch:
+            self.cancel_batch()
+        # Requests and look-ahead results refer to sentences of the previous file
+        previous_file = self.current_file
+        self.requests.cancel_where(lambda key: key[0] == previous_file)
+        self.prefetched.clear()
+
+        # The saver's thread writes out pending changes of the previous file without blocking the UI
+        if self.saver:
+            entry = self.file_cache.get(self.current_file)
+            if entry is not None:
+                entry['position'] = self.current_index
+            self.saver.stop()
+            self.closing_savers[self.current_file] = self.saver
+            self.saver = None
+            if len(self.closing_savers) == 1:
+                self.root.after(SAVE_POLL_INTERVAL, self._poll_closing_savers)
+
+    def _poll_closing_savers(self):
+        """Finish the savers of released files whose threads have exited (runs while any are left)"""
+        for path, saver in list(self.closing_savers.items()):
+            if not saver.stopped():
+                continue
+            del self.closing_savers[path]
+            try:
+                saver.close()
+            except Exception as e:
+                # The changes stay in the patch log and are replayed when the file is loaded again
+                messagebox.showerror("Save Error", f"Failed to save {os.path.basename(path)}: {e}")
+                self.file_cache.pop(path, None)
+                continue
+            entry = self.file_cache.get(path)
+            if entry is not None and saver.flushes:
+                entry['stamp'] = file_stamp(path)  # The file on disk is our data again
+        if self.closing_savers:
+            self.root.after(SAVE_POLL_INTERVAL, self._poll_closing_savers)
+
     def create_ui(self):
         """Create the user interface"""
         # Main container
@@ -124,6 +300,11 @@ class UniversalDataVerifierUI:
         # Custom prompt button
         ttk.Button(field_frame, text="Edit Prompt", command=self.edit_prompt).pack(side=tk.LEFT, padx=(0, 10))
 
+        # Look-ahead: verify the next N sentences in the background
+        ttk.Label(field_frame, text="Look-ahead:").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Spinbox(field_frame, from_=0, to=20, width=4, textvariable=self.lookahead_var,
+                    command=self._prefetch_ahead).pack(side=tk.LEFT, padx=(0, 10))
+
         # Current prompt label (truncated)
         self.prompt_preview = ttk.Label(field_frame, text="", foreground="gray", font=('Arial', 9))
         self.prompt_preview.pack(side=tk.LEFT, padx=(0, 10))
@@ -168,6 +349,10 @@ class UniversalDataVerifierUI:
         self.status_label = ttk.Label(button_frame, text="", foreground="blue", font=('Arial', 13))
         self.status_label.pack(side=tk.LEFT, padx=10)
 
+        # Save state of the loaded file: saved / N unsaved / failed
+        self.save_label = ttk.Label(button_frame, text="", foreground="gray", font=('Arial', 11))
+        self.save_label.pack(side=tk.LEFT, padx=10)
+
         # Result section
         ttk.Label(main_frame, text="Claude Response:", font=('Arial', 13, 'bold')).grid(
             row=10, column=0, sticky=tk.W, pady=(10, 2))
@@ -186,6 +371,32 @@ class UniversalDataVerifierUI:
                                       width=18, style='Large.TButton')
         self.next_button.pack(side=tk.LEFT, padx=5)
 
+        # Batch job: verify a range of sentences in the background
+        batch_frame = ttk.Frame(main_frame)
+        batch_frame.grid(row=13, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+
+        ttk.Label(batch_frame, text="Verify range:", font=('Arial', 12, 'bold')).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Entry(batch_frame, textvariable=self.batch_range_var, width=12).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Label(batch_frame, text="(e.g. 1-50, 80 or L3-5; empty = all)", foreground="gray",
+                  font=('Arial', 9)).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(batch_frame, text="Workers:").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Spinbox(batch_frame, from_=1, to=16, width=4,
+                    textvariable=self.batch_workers_var).pack(side=tk.LEFT, padx=(0, 10))
+
+        self.batch_start_button = ttk.Button(batch_frame, text="Start", command=self.start_batch)
+        self.batch_start_button.pack(side=tk.LEFT, padx=2)
+        self.batch_pause_button = ttk.Button(batch_frame, text="Pause", command=self.toggle_batch_pause,
+                                             state=tk.DISABLED)
+        self.batch_pause_button.pack(side=tk.LEFT, padx=2)
+        self.batch_cancel_button = ttk.Button(batch_frame, text="Cancel", command=self.cancel_batch,
+                                              state=tk.DISABLED)
+        self.batch_cancel_button.pack(side=tk.LEFT, padx=2)
+
+        self.batch_progress = ttk.Progressbar(batch_frame, orient=tk.HORIZONTAL, length=180, mode='determinate')
+        self.batch_progress.pack(side=tk.LEFT, padx=(10, 5))
+        self.batch_label = ttk.Label(batch_frame, text="", font=('Arial', 10))
+        self.batch_label.pack(side=tk.LEFT, padx=5)
+
         # Configure text widget row to expand
         main_frame.rowconfigure(4, weight=1)
         main_frame.rowconfigure(6, weight=1)
@@ -267,8 +478,8 @@ class UniversalDataVerifierUI:
         ttk.Button(button_frame, text="Save", command=save_prompt).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
 
-    def load_sentence(self, index):
-        """Load sentence at given index"""
+    def load_sentence(self, index, keep_result=False):
+        """Load sentence at given index (keep_result: refresh without clearing the response shown)"""
         if index < 0 or index >= len(self.sentences):
             return
 
@@ -310,17 +521,22 @@ class UniversalDataVerifierUI:
         self.context_text.insert(1.0, "\n".join(context_parts))
         self.context_text.config(state=tk.DISABLED)
 
-        # Clear result if not pending
-        if index not in self.pending_requests:
-            self.result_text.delete(1.0, tk.END)
-            self.status_label.config(text="")
-        else:
-            self.status_label.config(text="⏳ Request pending...", foreground="orange")
-
         # Update button states
         self.prev_button.config(state=tk.NORMAL if index > 0 else tk.DISABLED)
         self.next_button.config(state=tk.NORMAL if index < len(self.sentences) - 1 else tk.DISABLED)
 
+        # Clear result if not pending; show a result fetched ahead right away
+        if self.requests.pending(self._request_key(index, selected_field)):
+            self.status_label.config(text="⏳ Request pending...", foreground="orange")
+            self.send_button.config(state=tk.DISABLED)
+        elif not self._take_prefetched(index, selected_field):
+            if not keep_result:
+                self.result_text.delete(1.0, tk.END)
+                self.status_label.config(text="")
+            self.send_button.config(state=tk.NORMAL)
+
+        self._prefetch_ahead()
+
     def previous_sentence(self):
         """Go to previous sentence"""
         if self.current_index > 0:
@@ -333,14 +549,36 @@ class UniversalDataVerifierUI:
 
     def send_to_claude(self):
         """Send current sentence to Claude for verification (async)"""
-        sentence_data = self.sentences[self.current_index]
-        sentence_obj = sentence_data['sentence_obj']
         selected_field = self.field_combo.get()
+        if self.requests.pending(self._request_key(self.current_index, selected_field)):
+            return
+        if self._take_prefetched(self.current_index, selected_field):
+            return
+
+        try:
+            prompt, request = self._build_request(self.current_index, selected_field)
+        except ValueError as e:
+            messagebox.showwarning("Warning", str(e))
+            return
+        except KeyError as e:
+            messagebox.showerror("Error", f"Invalid placeholder in template: {e}")
+            return
+
+        self.status_label.config(text="⏳ Sending request...", foreground="orange")
+        self.send_button.config(state=tk.DISABLED)
+        self._start_request(self.current_index, prompt, request)
+
+    def _build_request(self, index, selected_field):
+        """
+        (prompt, request info) for verifying a field of a sentence. Raises
+        ValueError if there is no template or value, KeyError for a bad
+        placeholder in the template.
+        """
+        sentence_obj = self.sentences[index]['sentence_obj']
 
         # Get template for selected field
         if selected_field not in self.prompt_templates:
-            messagebox.showwarning("Warning", f"No prompt template for field: {selected_field}")
-            return
+            raise ValueError(f"No prompt template for field: {selected_field}")
 
         # Prepare context data for prompt template
         context = {
@@ -355,105 +593,131 @@ class UniversalDataVerifierUI:
 
         current_field_value = sentence_obj.get(selected_field, '')
         if not current_field_value:
-            messagebox.showwarning("Warning", f"No value found for field: {selected_field}")
-            return
+            raise ValueError(f"No value found for field: {selected_field}")
 
         # Format prompt with context
-        try:
-            prompt = self.prompt_templates[selected_field].format(**context)
-        except KeyError as e:
-            messagebox.showerror("Error", f"Invalid placeholder in template: {e}")
-            return
+        prompt = self.prompt_templates[selected_field].format(**context)
 
-        # Mark as pending
-        self.pending_requests[self.current_index] = {
+        cache_key = make_cache_key(selected_field, self.prompt_templates[selected_field],
+                                   context['chinese_sentence'], current_field_value)
+        return prompt, {
+            'key': self._request_key(index, selected_field),
+            'index': index,
             'field': selected_field,
-            'original_value': current_field_value
+            'original_value': current_field_value,
+            'cache_key': cache_key
         }
-        self.status_label.config(text="⏳ Sending request...", foreground="orange")
-        self.send_button.config(state=tk.DISABLED)
-
-        # Run async request in background thread
-        Thread(target=self._send_request_thread, args=(prompt, self.current_index), daemon=True).start()
-
-    def _send_request_thread(self, prompt, sentence_index):
-        """Background thread to send request to Claude"""
-        try:
-            result = subprocess.run(['claude.cmd'],
-                                    input=prompt,
-                                    capture_output=True,
-                                    text=True,
-                                    encoding='utf-8',
-                                    errors='ignore',
-                                    timeout=30)
 
-            output = result.stdout.strip() if result.stdout else "No response received"
+    def _request_key(self, index, field):
+        """(file, sentence key, field) identifying requests and results for a sentence of the loaded file"""
+        return self.current_file, self.sentences[index]['key'], field
 
-            # Schedule UI update on main thread
-            self.root.after(0, lambda: self._handle_response(output, sentence_index))
+    def _start_request(self, index, prompt, request):
+        """Run a request on the request loop; False if one for the same sentence and field is in flight"""
+        return self.requests.submit(request['key'], prompt, lambda result: self._on_result(request, result),
+                                    cache_key=request['cache_key'])
 
-        except subprocess.TimeoutExpired:
-            self.root.after(0, lambda: self._handle_error("Request timed out", sentence_index))
-        except Exception as e:
-            self.root.after(0, lambda: self._handle_error(str(e), sentence_index))
-
-    def _handle_response(self, output, sentence_index):
-        """Handle Claude response (called on main thread)"""
-        # Get pending request info
-        pending_info = self.pending_requests.get(sentence_index)
-        if not pending_info:
+    def _prefetch_ahead(self):
+        """Keep requests in flight for the next N sentences (look-ahead mode)"""
+        try:
+            lookahead = max(0, self.lookahead_var.get())
+        except tk.TclError:  # Spinbox being edited
+            return
+        if not self.sentences:
+            return
+        field = self.field_combo.get()
+        for index in range(self.current_index + 1, min(len(self.sentences), self.current_index + 1 + lookahead)):
+            if self.requests.pending(self._request_key(index, field)) or self._prefetched_entry(index, field):
+                continue
+            try:
+                prompt, request = self._build_request(index, field)
+            except (ValueError, KeyError):
+                continue  # Nothing to verify; the operator sees why when they get there
+            self._start_request(index, prompt, request)
+
+    def _prefetched_entry(self, index, field):
+        """Early result for a sentence and field, unless the value changed since it was requested"""
+        key = self._request_key(index, field)
+        entry = self.prefetched.get(key)
+        if entry is None:
+            return None
+        if self.sentences[index]['sentence_obj'].get(field, '') != entry['request']['original_value']:
+            del self.prefetched[key]
+            return None
+        return entry
+
+    def _take_prefetched(self, index, field):
+        """Show a result that arrived before the operator reached the sentence; False if there is none"""
+        entry = self._prefetched_entry(index, field)
+        if entry is None:
+            return False
+        del self.prefetched[entry['request']['key']]
+        self._handle_response(entry['output'], entry['request'], from_cache=entry['from_cache'])
+        return True
+
+    def _on_result(self, request, result):
+        """Result of a request from the request loop (called on main thread)"""
+        if request['key'][0] != self.current_file:
             return
+        if result.get('error'):
+            self._handle_error(result['error'], request)
+            return
+        self._handle_response(result['output'] or "No response received", request, from_cache=result['from_cache'])
 
-        field = pending_info['field']
-        original_value = pending_info['original_value']
+    def _handle_response(self, output, request, from_cache=False):
+        """Handle Claude response (called on main thread)"""
+        sentence_index = request['index']
+        field = request['field']
+        original_value = request['original_value']
 
-        # Remove from pending
-        del self.pending_requests[sentence_index]
+        # Keep results for other sentences or fields until the operator gets there
+        if sentence_index != self.current_index or field != self.field_combo.get():
+            self.prefetched[request['key']] = {'request': request, 'output': output, 'from_cache': from_cache}
+            return
 
-        # Only update UI if still on the same sentence
-        if sentence_index == self.current_index:
-            self.result_text.delete(1.0, tk.END)
-            self.result_text.insert(1.0, f"Raw Response:\n{output}\n\n")
+        self.result_text.delete(1.0, tk.END)
+        source = " (cached)" if from_cache else ""
+        self.result_text.insert(1.0, f"Raw Response{source}:\n{output}\n\n")
 
-            # Extract result based on field type
-            extracted_result = self.extract_result(output, field)
+        # Extract result based on field type
+        extracted_result = self.extract_result(output, field)
 
-            if extracted_result:
-                self.result_text.insert(tk.END, f"Extracted {field.title()}:\n{extracted_result}\n\n")
+        if extracted_result:
+            if not from_cache:
+                self.response_cache.put(request['cache_key'], field, output)
 
-                sentence_data = self.sentences[sentence_index]
+            self.result_text.insert(tk.END, f"Extracted {field.title()}:\n{extracted_result}\n\n")
 
-                if extracted_result != original_value:
-                    # Update the data
-                    sentence_data['sentence_obj'][field] = extracted_result
+            sentence_data = self.sentences[sentence_index]
 
-                    # Save to file
-                    self.save_data()
+            if extracted_result != original_value:
+                # Update the data
+                sentence_data['sentence_obj'][field] = extracted_result
 
-                    self.result_text.insert(tk.END, f"✅ Updated: {original_value} → {extracted_result}\n", "success")
-                    self.result_text.tag_config("success", foreground="green", font=('Arial', 13, 'bold'))
+                # Queue the change; the saver's thread writes the file in coalesced batches
+                self.save_data(sentence_data['key'], field, extracted_result)
 
-                    # Refresh current view
-                    self.load_sentence(sentence_index)
+                self.result_text.insert(tk.END, f"✅ Updated: {original_value} → {extracted_result}\n", "success")
+                self.result_text.tag_config("success", foreground="green", font=('Arial', 13, 'bold'))
 
-                    self.status_label.config(text="✅ Updated and saved", foreground="green")
-                else:
-                    self.result_text.insert(tk.END, f"✓ {field.title()} is correct, no update needed\n", "unchanged")
-                    self.result_text.tag_config("unchanged", foreground="blue", font=('Arial', 13, 'bold'))
-                    self.status_label.config(text="✓ No changes needed", foreground="blue")
+                # Refresh current view
+                self.load_sentence(sentence_index, keep_result=True)
+                self.status_label.config(text="✅ Updated", foreground="green")
+                self._update_save_indicator()
             else:
-                self.result_text.insert(tk.END, f"⚠️ Failed to extract valid {field}\n", "error")
-                self.result_text.tag_config("error", foreground="red", font=('Arial', 13, 'bold'))
-                self.status_label.config(text="⚠️ Extraction failed", foreground="red")
+                self.result_text.insert(tk.END, f"✓ {field.title()} is correct, no update needed\n", "unchanged")
+                self.result_text.tag_config("unchanged", foreground="blue", font=('Arial', 13, 'bold'))
+                self.status_label.config(text="✓ No changes needed", foreground="blue")
+        else:
+            self.result_text.insert(tk.END, f"⚠️ Failed to extract valid {field}\n", "error")
+            self.result_text.tag_config("error", foreground="red", font=('Arial', 13, 'bold'))
+            self.status_label.config(text="⚠️ Extraction failed", foreground="red")
 
-            self.send_button.config(state=tk.NORMAL)
+        self.send_button.config(state=tk.NORMAL)
 
-    def _handle_error(self, error_msg, sentence_index):
+    def _handle_error(self, error_msg, request):
         """Handle error (called on main thread)"""
-        if sentence_index in self.pending_requests:
-            del self.pending_requests[sentence_index]
-
-        if sentence_index == self.current_index:
+        if request['index'] == self.current_index and request['field'] == self.field_combo.get():
             self.result_text.delete(1.0, tk.END)
             self.result_text.insert(1.0, f"Error: {error_msg}")
             self.status_label.config(text="❌ Error", foreground="red")
@@ -461,87 +725,247 @@ class UniversalDataVerifierUI:
 
     def extract_result(self, text, field):
         """Extract the result from Claude's response based on field type"""
-        text = text.strip()
+        return extract_result(text, field)
 
-        # Remove common prefixes
-        text = re.sub(r'^(Your answer|Answer|Response)[:\s]*', '', text, flags=re.IGNORECASE)
+    def _validate_pinyin(self, text):
+        """Validate if text looks like valid pinyin"""
+        return validate_pinyin(text)
 
-        # Split into lines and get first non-empty line
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
+    def _validate_chinese(self, text):
+        """Validate if text looks like valid Chinese"""
+        return validate_chinese(text)
 
-        if not lines:
-            return ""
+    def _validate_translation(self, text):
+        """Validate if text looks like valid translation (Korean, English, Japanese, etc.)"""
+        return validate_translation(text)
 
-        # Take the first line as the result
-        first_line = lines[0]
+    def start_batch(self):
+        """Verify the chosen range for the selected field in the background"""
+        if self.batch or not self.sentences:
+            return
+        field = self.field_combo.get()
+        try:
+            indices = parse_batch_range(self.batch_range_var.get(), self.sentences)
+            workers = max(1, self.batch_workers_var.get())
+        except (ValueError, tk.TclError) as e:
+            messagebox.showwarning("Warning", str(e))
+            return
 
-        # Remove markdown formatting
-        first_line = re.sub(r'\*\*', '', first_line)
-        first_line = re.sub(r'`', '', first_line)
-        first_line = first_line.strip()
+        tasks = []
+        skipped = 0
+        for index in indices:
+            if self.requests.pending(self._request_key(index, field)):
+                continue  # Already being verified by hand or by the look-ahead
+            try:
+                prompt, request = self._build_request(index, field)
+            except (ValueError, KeyError):
+                skipped += 1
+                continue
+            tasks.append({'index': index, 'prompt': prompt, 'request': request})
+        if not tasks:
+            messagebox.showinfo("Info", "Nothing to verify in this range")
+            return
 
-        # Field-specific validation
-        if field == 'pinyin':
-            return self._validate_pinyin(first_line)
-        elif field == 'sentence':
-            return self._validate_chinese(first_line)
-        elif field in ['korean', 'english', 'japanese', 'japanese_romaji', 'translation']:
-            return self._validate_translation(first_line)
-        else:
-            # Generic validation - just return if it's not too short and doesn't contain common error words
-            if (len(first_line) >= 2 and
-                not any(word in first_line.lower() for word in [
-                    'verify', 'check', 'please', 'respond', 'however',
-                    'help', 'want', 'could', 'would', 'should', 'message', 'sorry'
-                ])):
-                return first_line
+        self.batch = {
+            'file': self.current_file, 'tasks': collections.deque(tasks), 'in_flight': set(), 'workers': workers,
+            'total': len(tasks), 'done': 0, 'updated': 0, 'failed': 0, 'skipped': skipped, 'paused': False,
+            'cancelled': False, 'started': time.perf_counter(), 'paused_at': None, 'paused_seconds': 0.0
+        }
+        self.batch_progress.config(maximum=len(tasks), value=0)
+        self.batch_start_button.config(state=tk.DISABLED)
+        self.batch_pause_button.config(state=tk.NORMAL, text="Pause")
+        self.batch_cancel_button.config(state=tk.NORMAL)
+        self._batch_fill(self.batch)
+        self.root.after(200, self._batch_tick)
+
+    def _batch_fill(self, job):
+        """Hand the job's next tasks to the request loop until 'workers' of them are in flight"""
+        while job['tasks'] and len(job['in_flight']) < job['workers'] and not job['paused'] and not job['cancelled']:
+            task = job['tasks'].popleft()
+            request = task['request']
+            submitted = self.requests.submit(request['key'], task['prompt'],
+                                             lambda result, task=task: self._apply_batch_result(job, task, result),
+                                             cache_key=request['cache_key'])
+            if submitted:
+                job['in_flight'].add(request['key'])
+            else:
+                job['done'] += 1  # Verified by hand or by the look-ahead meanwhile
 
-        return ""
+    def toggle_batch_pause(self):
+        """Pause (calls in flight still finish) or resume the batch job"""
+        job = self.batch
+        if not job:
+            return
+        if not job['paused']:
+            job['paused'] = True
+            job['paused_at'] = time.perf_counter()
+            self.batch_pause_button.config(text="Resume")
+        else:
+            job['paused_seconds'] += time.perf_counter() - job['paused_at']
+            job['paused_at'] = None
+            job['paused'] = False
+            self.batch_pause_button.config(text="Pause")
+            self._batch_fill(job)
+
+    def cancel_batch(self):
+        """Stop the batch job, cancelling its requests in flight; results that already arrived are kept"""
+        job = self.batch
+        if not job:
+            return
+        job['cancelled'] = True
+        job['tasks'].clear()
+        for key in job['in_flight']:
+            self.requests.cancel(key)
+        job['in_flight'].clear()
+        self.batch_pause_button.config(state=tk.DISABLED)
+        self.batch_cancel_button.config(state=tk.DISABLED)
+
+    def _apply_batch_result(self, job, task, result):
+        """Apply one batch result to the data (called on main thread)"""
+        job['in_flight'].discard(task['request']['key'])
+        job['done'] += 1
+        self._batch_fill(job)
+        if job['file'] != self.current_file:
+            return
+        index, request = task['index'], task['request']
+        field = request['field']
+        # The sentence on screen shows its outcome like a manual request (it was left on "Request pending")
+        on_screen = index == self.current_index and field == self.field_combo.get()
+        if result.get('error'):
+            job['failed'] += 1
+            if on_screen:
+                self._handle_error(result['error'], request)
+            return
+        output = result['output'] or ""
+        extracted_result = self.extract_result(output, field)
+        if not extracted_result:
+            job['failed'] += 1
+            if on_screen:
+                self._handle_response(output, request, from_cache=result.get('from_cache'))
+            return
 
-    def _validate_pinyin(self, text):
-        """Validate if text looks like valid pinyin"""
-        if (re.match(r'^[a-zA-Zāáǎàēéěèīíǐìōóǒòūúǔùǖǘǚǜ\s\']+$', text) and
-            len(text) >= 3 and
-            not any(word in text.lower() for word in [
-                'verify', 'check', 'correct', 'chinese', 'sentence', 'please',
-                'respond', 'answer', 'provide', 'matches', 'however', 'happy',
-                'help', 'want', 'could', 'would', 'should', 'message'
-            ])):
-            return text
-        return ""
+        sentence_data = self.sentences[index]
+        sentence_obj = sentence_data['sentence_obj']
+        # Skip sentences that were corrected some other way while the job ran
+        if sentence_obj.get(field, '') != request['original_value']:
+            if on_screen:
+                self.load_sentence(index)
+            return
+        if extracted_result != request['original_value']:
+            job['updated'] += 1
+        if on_screen:
+            self._handle_response(output, request, from_cache=result.get('from_cache'))
+            return
+        if not result.get('from_cache'):
+            self.response_cache.put(request['cache_key'], field, output)
+        if extracted_result == request['original_value']:
+            return
+        sentence_obj[field] = extracted_result
+        self.save_data(sentence_data['key'], field, extracted_result)
 
-    def _validate_chinese(self, text):
-        """Validate if text looks like valid Chinese"""
-        # Check if contains Chinese characters
-        if re.search(r'[\u4e00-\u9fff]', text) and len(text) >= 1:
-            return text
-        return ""
+    def _batch_tick(self):
+        """Refresh the batch progress bar and throughput (runs every 200 ms while a job is active)"""
+        job = self.batch
+        if job is None:
+            return
+        paused = job['paused_at'] is not None
+        elapsed = (job['paused_at'] if paused else time.perf_counter()) - job['started'] - job['paused_seconds']
+        rate = job['done'] / elapsed if elapsed > 0 else 0.0
+        self.batch_progress.config(value=job['done'])
+        state = " (paused)" if paused else ""
+        self.batch_label.config(text=f"{job['done']}/{job['total']} · {rate:.1f} sent/s · {job['updated']} updated"
+                                     f" · {job['failed']} failed{state}")
+
+        if not job['tasks'] and not job['in_flight']:
+            outcome = "cancelled" if job['cancelled'] else "done"
+            skipped = f", {job['skipped']} without a value" if job['skipped'] else ""
+            self.batch_label.config(text=f"Batch {outcome}: {job['done']}/{job['total']} verified, "
+                                         f"{job['updated']} updated, {job['failed']} failed{skipped} "
+                                         f"({rate:.1f} sent/s)")
+            self.batch = None
+            self.batch_start_button.config(state=tk.NORMAL)
+            self.batch_pause_button.config(state=tk.DISABLED, text="Pause")
+            self.batch_cancel_button.config(state=tk.DISABLED)
+            return
+        self.root.after(200, self._batch_tick)
 
-    def _validate_translation(self, text):
-        """Validate if text looks like valid translation (Korean, English, Japanese, etc.)"""
-        # Basic validation - just check length and avoid common error words
-        if (len(text) >= 2 and
-            not any(word in text.lower() for word in [
-                'verify', 'check', 'please', 'respond', 'however',
-                'want', 'could', 'would', 'should', 'sorry', 'cannot'
-            ])):
-            return text
-        return ""
-
-    def save_data(self):
-        """Save updated data to JSON file"""
+    def save_data(self, key, field, value):
+        """Queue a change to the loaded file for the saver's thread; returns False if it could not be recorded"""
         try:
-            if not self.current_file:
+            if not self.current_file or not self.saver:
                 messagebox.showerror("Save Error", "No file is currently loaded")
-                return
-            with open(self.current_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=4)
+                return False
+            self.saver.mark_changed(key, field, value)
+            return True
         except Exception as e:
             messagebox.showerror("Save Error", f"Failed to save data: {e}")
+            return False
+
+    def _update_save_indicator(self):
+        saver = self.saver
+        if saver is None:
+            self.save_label.config(text="")
+        elif saver.error is not None:
+            self.save_label.config(text=f"❌ Save failed, {saver.unsaved} unsaved (retrying)", foreground="red")
+        elif saver.unsaved:
+            self.save_label.config(text=f"✎ {saver.unsaved} unsaved", foreground="orange")
+        elif saver.flushes:
+            self.save_label.config(text="💾 Saved", foreground="green")
+        else:
+            self.save_label.config(text="")
+
+    def _save_indicator_tick(self):
+        """Refresh the save indicator (runs every 500 ms)"""
+        self._update_save_indicator()
+        self.root.after(500, self._save_indicator_tick)
+
+    def on_close(self):
+        """Flush pending changes, without blocking the UI, before the window closes"""
+        if self.window_closing:
+            return
+        self.window_closing = True
+        self.cancel_batch()
+        if self.saver:
+            self.saver.stop()
+        self.status_label.config(text="⏳ Saving before closing...", foreground="orange")
+        self._close_when_saved()
+
+    def _close_when_saved(self):
+        """Close the window once every saver has finished; offer to keep it open if a write failed"""
+        if self.closing_savers or (self.saver and not self.saver.stopped()):
+            self.root.after(SAVE_POLL_INTERVAL, self._close_when_saved)
+            return
+        if self.saver:
+            try:
+                self.saver.close()
+            except Exception as e:
+                if not messagebox.askyesno("Save Error", f"Failed to save data: {e}\n\nClose anyway?"):
+                    # Keep editing: a new saver replays the patch log and keeps retrying the write
+                    self.window_closing = False
+                    self.saver = BackgroundSaver(self.current_file)
+                    self.saver.recover(self.index)
+                    self.status_label.config(text="")
+                    return
+        self.requests.close()
+        self.response_cache.close()
+        get_backend().close()
+        self.root.destroy()
 
 def main():
+    parser = argparse.ArgumentParser(description="Universal Data Verifier UI")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignore the response cache and always ask Claude")
+    parser.add_argument('--lookahead', type=int, default=0,
+                        help="keep requests in flight for the next N sentences (default 0: off)")
+    parser.add_argument('--max-concurrent', type=int, default=MAX_CONCURRENT,
+                        help=f"requests running at once, look-ahead and batch included (default {MAX_CONCURRENT})")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+    set_backend(backend_from_args(args))
+
     root = tk.Tk()
-    app = UniversalDataVerifierUI(root)
+    UniversalDataVerifierUI(root, use_cache=not args.no_cache, lookahead=args.lookahead,
+                            max_concurrent=max(1, args.max_concurrent))
     root.mainloop()
 
 if __name__ == "__main__":
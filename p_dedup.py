@@ -0,0 +1,196 @@
+"""
+Cross-file deduplicated verification
+
+The courses repeat many sentences ("你好", common 吧 patterns, ...) across
+files. This groups every sentence under public/data/integrated and
+public/data/currently by normalized Chinese text + current field value,
+verifies each unique group once and fans the answer back out to every
+occurrence, then reports how many verifier calls that saved.
+
+    python p_dedup.py --field pinyin
+    python p_dedup.py --field korean --dry-run
+"""
+
+import argparse
+import glob
+import json
+import re
+import unicodedata
+
+from json_saver import DebouncedSaver
+from p_all import FIELD_OPTIONS
+from rate_limiter import REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE
+from response_extract import extract_clean_response
+from run_journal import RunJournal
+from sentence_index import SentenceIndex
+from verifier_backend import add_backend_arguments, backend_from_args
+from verify_batch import chunk_tasks, make_batch_worker
+from verify_cache import ResponseCache
+from verify_engine import (ThroughputStats, build_prompt_context, get_backend, make_scheduler, run_concurrent,
+                           set_backend)
+
+DEFAULT_FILES = ['public/data/integrated/*.json', 'public/data/currently/*.json']
+MAX_WORKERS = 4  # 동시에 실행할 검증 프로세스 수
+BATCH_SIZE = 10  # 한 번의 호출에 묶어 보낼 문장 수
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_chinese(text):
+    """NFKC (full-width punctuation -> ASCII) and no whitespace"""
+    return WHITESPACE_PATTERN.sub('', unicodedata.normalize('NFKC', text))
+
+
+def normalize_value(text):
+    """NFKC and collapsed whitespace; case is kept because it can be intentional"""
+    return WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def load_files(patterns):
+    """Load every lesson file matching patterns; returns {path: (data, index)}"""
+    files = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if 'contents' not in data:
+                continue  # manifest.json etc.
+            files[path] = (data, SentenceIndex.from_data(data, path))
+    return files
+
+
+def group_sentences(files, field_key):
+    """Group occurrences by (normalized Chinese, normalized field value), in first-seen order"""
+    groups = {}
+    for path, (_, index) in files.items():
+        for entry in index:
+            sentence = entry['sentence_obj']
+            if not sentence.get('sentence'):
+                continue
+            group_key = (normalize_chinese(sentence['sentence']), normalize_value(sentence.get(field_key, '')))
+            groups.setdefault(group_key, []).append((path, entry))
+    return list(groups.values())
+
+
+def parse_args():
+    """Parse command line options"""
+    fields = [option['key'] for option in FIELD_OPTIONS.values()]
+    parser = argparse.ArgumentParser(description="Verify each unique sentence once across all lesson files")
+    parser.add_argument('files', nargs='*', default=DEFAULT_FILES, help="lesson files or globs")
+    parser.add_argument('--field', default='pinyin', choices=fields, help="field to verify (default pinyin)")
+    parser.add_argument('--dry-run', action='store_true', help="only report duplicate groups, call nothing")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignore the response cache and ask Claude about every group")
+    parser.add_argument('--restart', action='store_true',
+                        help="forget journaled progress for this field and verify every group again")
+    parser.add_argument('--rpm', type=int, default=REQUESTS_PER_MINUTE,
+                        help=f"maximum verifier requests per minute (default {REQUESTS_PER_MINUTE})")
+    parser.add_argument('--tpm', type=int, default=TOKENS_PER_MINUTE,
+                        help=f"maximum estimated prompt tokens per minute (default {TOKENS_PER_MINUTE})")
+    add_backend_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    field_key = args.field
+    prompt_template = next(option['prompt_template'] for option in FIELD_OPTIONS.values()
+                           if option['key'] == field_key)
+
+    files = load_files(args.files)
+    # Replay patches from a killed run first so they are grouped and prompted with the rest
+    savers = {path: DebouncedSaver(path, data) for path, (data, _) in files.items()}
+    for path, saver in savers.items():
+        recovered = saver.recover()
+        if recovered:
+            print(f"♻️ Recovered {recovered} unsaved updates in {path}")
+
+    groups = group_sentences(files, field_key)
+    occurrences = sum(len(group) for group in groups)
+    duplicated = [group for group in groups if len(group) > 1]
+
+    print(f"📚 {len(files)} files, {occurrences} sentences, {len(groups)} unique for '{field_key}'")
+    print(f"🔁 {len(duplicated)} groups repeat, covering {sum(len(g) for g in duplicated)} sentences")
+    for group in sorted(duplicated, key=len, reverse=True)[:10]:
+        sentence = group[0][1]['sentence_obj']
+        print(f"   ×{len(group)} {sentence['sentence']} / {sentence.get(field_key, '')}")
+
+    if args.dry_run:
+        batches = -(-len(groups) // BATCH_SIZE)
+        print(f"\n💡 Verifying {len(groups)} unique groups instead of {occurrences} sentences "
+              f"saves {occurrences - len(groups)} verifications (at most {batches} calls of {BATCH_SIZE})")
+        return
+
+    set_backend(backend_from_args(args))
+    journal = RunJournal()
+    if args.restart:
+        for path in files:
+            journal.reset(field_key, path)
+
+    # One task per group; a group is done when every occurrence is journaled
+    tasks = []
+    for group in groups:
+        if all(journal.is_done(field_key, entry['key']) for _, entry in group):
+            continue
+        representative = group[0][1]['sentence_obj']
+        tasks.append({'index': len(tasks), 'group': group, 'sentence': representative,
+                      'prompt': prompt_template.format(**build_prompt_context(representative))})
+    print(f"\n📝 {len(groups) - len(tasks)} groups already verified, {len(tasks)} to go\n")
+
+    cache = ResponseCache(enabled=not args.no_cache)
+    scheduler = make_scheduler(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    worker = make_batch_worker(prompt_template, extract_clean_response, field_key, cache=cache, scheduler=scheduler)
+    stats = ThroughputStats()
+    updated = 0
+    should_exit = False
+
+    for batch, result in run_concurrent(chunk_tasks(tasks, BATCH_SIZE), worker, max_workers=MAX_WORKERS, stats=stats):
+        for task, item in zip(batch, result['items']):
+            if item['via'] == 'rate_limit':
+                print("\n⚠️ Rate limit still in effect after waiting, stopping")
+                should_exit = True
+                break
+
+            value = item['value']
+            outcome = 'updated' if value else ('error' if item['error'] else 'failed')
+            # Fan the answer out to every occurrence of the group
+            for path, entry in task['group']:
+                sentence = entry['sentence_obj']
+                current = sentence.get(field_key, '')
+                if value and value != current:
+                    sentence[field_key] = value
+                    savers[path].mark_changed(entry['key'], field_key, value)
+                    updated += 1
+                    print(f"✏️ {entry['key'][0]} #{entry['key'][-1]} {sentence['sentence']}: {current} → {value}")
+                journal.record(field_key, entry['key'],
+                               'unchanged' if value and value == current else outcome)
+            if not value:
+                print(f"⚠️ Failed to verify: {task['sentence']['sentence']}")
+        if should_exit:
+            break
+
+    for saver in savers.values():
+        saver.close()
+
+    calls = len(stats.latencies)
+    print(f"\n{stats.report()}")
+    print(cache.report())
+    if scheduler:
+        print(scheduler.report())
+    print(f"💡 Dedup: {occurrences} sentences in {len(groups)} groups; "
+          f"{occurrences - len(groups)} per-sentence verifications saved ({calls} calls made)")
+    backend = get_backend()
+    if hasattr(backend, 'report'):
+        print(backend.report())
+    backend.close()
+    cache.close()
+    journal.close()
+
+    if should_exit:
+        print(f"📌 Progress is journaled in {journal.path}; run the script again to resume")
+    else:
+        print(f"\n✅ Done! Updated {updated} sentences across {len(files)} files.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,166 +1,199 @@
+import argparse
 import json
-import subprocess
-import sys
-import re
+
+from json_saver import DebouncedSaver
+from lesson_data import iter_sentences
+from pinyin_precheck import MATCH, PinyinLexicon, PrecheckStats
+from rate_limiter import REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE
+from response_extract import extract_pinyin
+from run_journal import RunJournal
+from verify_batch import chunk_tasks, make_batch_worker
+from verify_cache import ResponseCache
+from verifier_backend import add_backend_arguments, backend_from_args
+from verify_engine import (ThroughputStats, build_prompt_context, get_backend, make_scheduler, run_concurrent,
+                           set_backend)
 
 # Configuration
-START_INDEX = 0  # 시작할 문장 인덱스 (예: 50번째부터 시작하려면 49로 설정)
 INPUT_FILE = 'public/data/integrated/03_고급반_제26-40과.json'
 OUTPUT_FILE = 'public/data/integrated/03_고급반_제26-40과.json'
 DEBUG_PROMPT = True  # 프롬프트 디버깅 모드
-
-# Load the JSON file
-with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-# Function to extract only pinyin from Claude's response
-def extract_pinyin(text):
-    """
-    Extract only the pinyin from Claude's response, removing explanations and other text
-    """
-    text = text.strip()
-
-    # Remove common prefixes
-    text = re.sub(r'^(Your answer|Pinyin|Answer|Response)[:\s]*', '', text, flags=re.IGNORECASE)
-
-    # Split into lines and get first non-empty line
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-
-    if not lines:
-        return ""
-
-    # Take the first line as it should be the pinyin
-    first_line = lines[0]
-
-    # Remove markdown formatting
-    first_line = re.sub(r'\*\*', '', first_line)
-    first_line = re.sub(r'`', '', first_line)
-    first_line = first_line.strip()
-
-    # Check if it looks like valid pinyin:
-    # - Contains only letters (with optional tone marks), spaces, and apostrophes
-    # - Has at least one space (multi-syllable)
-    # - No English words that indicate it's an explanation
-    if (re.match(r'^[a-zA-Zāáǎàēéěèīíǐìōóǒòūúǔùǖǘǚǜ\s\']+$', first_line) and
-        ' ' in first_line and
-        len(first_line) >= 3 and
-        not any(word in first_line.lower() for word in [
-            'verify', 'check', 'correct', 'chinese', 'sentence', 'please',
-            'respond', 'answer', 'provide', 'matches', 'however', 'happy',
-            'help', 'want', 'could', 'would', 'should', 'message'
-        ])):
-        return first_line
-
-    return ""
-
-# Loop through sentences with counter
-count = 0
-sentence_index = 0
-should_exit = False
-
-for content in data['contents']:
-    if should_exit:
-        break
-    for lesson_content in content['content']:
-        if should_exit:
-            break
-        for subcategory in lesson_content['subcategories']:
-            if should_exit:
+MAX_WORKERS = 4  # 동시에 실행할 검증 프로세스 수 (1이면 순차 실행)
+BATCH_SIZE = 10  # 한 번의 호출에 묶어 보낼 문장 수 (1이면 문장별 호출)
+SAVE_EVERY = 20  # 변경 N건마다 저장 (SAVE_INTERVAL초가 지나도 저장)
+SAVE_INTERVAL = 10.0
+
+# Prompt for Claude to verify and correct pinyin
+PROMPT_TEMPLATE = 'Chinese: {chinese_sentence} / Current pinyin: {current_pinyin} / Task: Verify if pinyin is correct. Reply with ONLY the correct pinyin, nothing else.'
+
+def collect_tasks(data, journal):
+    """Turn every sentence not yet verified according to the journal into a task"""
+    tasks = []
+    skipped = 0
+
+    for sentence_index, (key, sentence) in enumerate(iter_sentences(data, INPUT_FILE)):
+        # Already verified in an earlier run
+        if journal.is_done('pinyin', key):
+            skipped += 1
+            continue
+
+        if not sentence.get('sentence', ''):
+            print(f"No Chinese sentence found for sentence #{sentence_index + 1}")
+            continue
+
+        tasks.append({
+            'index': sentence_index,
+            'key': key,
+            'sentence': sentence,
+            'prompt': PROMPT_TEMPLATE.format(**build_prompt_context(sentence))
+        })
+
+    return tasks, skipped
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Verify the pinyin of every sentence with Claude")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignore the response cache and ask Claude about every sentence")
+    parser.add_argument('--no-precheck', action='store_true',
+                        help="send every sentence to Claude instead of confirming dictionary matches locally")
+    parser.add_argument('--restart', action='store_true',
+                        help="forget journaled progress for this file/field and verify every sentence again")
+    parser.add_argument('--rpm', type=int, default=REQUESTS_PER_MINUTE,
+                        help=f"maximum verifier requests per minute (default {REQUESTS_PER_MINUTE})")
+    parser.add_argument('--tpm', type=int, default=TOKENS_PER_MINUTE,
+                        help=f"maximum estimated prompt tokens per minute (default {TOKENS_PER_MINUTE})")
+    add_backend_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    set_backend(backend_from_args(args))
+
+    # Load the JSON file
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Changes are coalesced and written atomically; a patch log covers a kill in between
+    saver = DebouncedSaver(OUTPUT_FILE, data, flush_every=SAVE_EVERY, flush_interval=SAVE_INTERVAL)
+    recovered = saver.recover()
+    if recovered:
+        print(f"♻️ Recovered {recovered} unsaved updates from the last run")
+
+    journal = RunJournal()
+    if args.restart:
+        journal.reset('pinyin', INPUT_FILE)
+
+    tasks, skipped = collect_tasks(data, journal)
+
+    # Sentences whose pinyin matches the only dictionary reading need no remote check
+    precheck = PrecheckStats(BATCH_SIZE)
+    if not args.no_precheck:
+        lexicon = PinyinLexicon.build(exclude=[INPUT_FILE, OUTPUT_FILE])
+        forwarded = []
+        for task in tasks:
+            status = lexicon.check(task['sentence']['sentence'], task['sentence'].get('pinyin', ''))
+            precheck.record(status)
+            if status != MATCH:
+                forwarded.append(task)
+        tasks = forwarded
+        print(precheck.report())
+
+    print(f"📝 Starting verification: {skipped} sentences already verified in {journal.path}, {len(tasks)} to go "
+          f"with {MAX_WORKERS} workers, {BATCH_SIZE} sentences per call...\n")
+    batches = chunk_tasks(tasks, BATCH_SIZE)
+    cache = ResponseCache(enabled=not args.no_cache)
+    scheduler = make_scheduler(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    worker = make_batch_worker(PROMPT_TEMPLATE, extract_pinyin, 'pinyin', cache=cache, scheduler=scheduler)
+
+    count = 0
+    should_exit = False
+    stats = ThroughputStats()
+
+    # Results arrive in sentence order, so updates and saves stay on this thread
+    for batch, result in run_concurrent(batches, worker, max_workers=MAX_WORKERS, stats=stats):
+        for task, item in zip(batch, result['items']):
+            sentence_index = task['index']
+            sentence = task['sentence']
+            chinese_sentence = sentence.get('sentence', '')
+            current_pinyin = sentence.get('pinyin', '')
+
+            print(f"\n[Sentence #{sentence_index + 1}]")
+            print(f"Chinese: {chinese_sentence}")
+            print(f"Current pinyin: {current_pinyin}")
+
+            if DEBUG_PROMPT and sentence_index < 2:
+                print(f"\n📝 Debug - Full prompt being sent:")
+                print(f"'{task['prompt']}'")
+                print(f"📝 End of prompt\n")
+                print(f"📝 Debug - stderr: {item['stderr']}")
+                print(f"📝 Debug - returncode: {item['returncode']}")
+
+            # Check for rate limit message
+            if item['via'] == 'rate_limit':
+                print(f"Claude raw output: {item['output']}")
+                print(f"\n⚠️ Rate limit still in effect after waiting, stopping at sentence #{sentence_index + 1}")
+                should_exit = True
                 break
-            for sentence in subcategory['sentences']:
-                # Skip sentences before START_INDEX
-                if sentence_index < START_INDEX:
-                    sentence_index += 1
-                    continue
-
-                # Get the Chinese sentence and pinyin fields
-                chinese_sentence = sentence.get('sentence', '')
-                current_pinyin = sentence.get('pinyin', '')
-
-                if not chinese_sentence:
-                    print(f"No Chinese sentence found for sentence #{sentence_index + 1}")
-                    sentence_index += 1
-                    continue
-
-                print(f"\n[Sentence #{sentence_index + 1}]")
-                print(f"Chinese: {chinese_sentence}")
-                print(f"Current pinyin: {current_pinyin}")
-
-                # Create prompt for Claude to verify and correct pinyin
-                prompt = f"Chinese: {chinese_sentence} / Current pinyin: {current_pinyin} / Task: Verify if pinyin is correct. Reply with ONLY the correct pinyin, nothing else."
-
-                if DEBUG_PROMPT and sentence_index < 2:
-                    print(f"\n📝 Debug - Full prompt being sent:")
-                    print(f"'{prompt}'")
-                    print(f"📝 End of prompt\n")
-
-                try:
-                    # Try using stdin instead of -p flag
-                    result = subprocess.run(['claude.cmd'],
-                                            input=prompt,
-                                            capture_output=True, text=True,
-                                            encoding='utf-8', errors='ignore')
-
-                    if DEBUG_PROMPT and sentence_index < 2:
-                        print(f"📝 Debug - stderr: {result.stderr}")
-                        print(f"📝 Debug - returncode: {result.returncode}")
-
-                    if result.stdout:
-                        output = result.stdout.strip()
-                        print(f"Claude raw output: {output}")
-
-                        # Check for rate limit message
-                        if "5-hour limit reached" in output or "resets" in output:
-                            print(f"\n⚠️ Rate limit reached at sentence index {sentence_index}")
-                            print(f"Resume from index {sentence_index} by setting START_INDEX = {sentence_index}")
-                            should_exit = True
-                            break
-
-                        # Extract only pinyin from the response
-                        pinyin_result = extract_pinyin(output)
-                        print(f"Extracted pinyin: {pinyin_result}")
-
-                        # Only update if we got a valid result AND it's different
-                        if pinyin_result:
-                            if pinyin_result != current_pinyin:
-                                sentence['pinyin'] = pinyin_result
-                                print(f"✏️ Updated pinyin: {current_pinyin} → {pinyin_result}")
-                                count += 1
-
-                                # Save the updated data after each update
-                                with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                                    json.dump(data, f, ensure_ascii=False, indent=4)
-                                print(f"💾 Saved after updating sentence #{sentence_index + 1}")
-                            else:
-                                print(f"✓ Pinyin is correct, no update needed")
-                        else:
-                            print(f"⚠️ Failed to extract valid pinyin, skipping update")
-                    else:
-                        print("Error: No output received")
 
-                except (FileNotFoundError, UnicodeDecodeError) as e:
-                    print(f"Error: {e}")
+            outcome = 'error'
+            if item['error']:
+                print(f"Error: {item['error']}")
+            elif item['output']:
+                print(f"Claude raw output ({item['via']}): {item['output']}")
+
+                # Extracted in the worker with extract_pinyin
+                pinyin_result = item['value']
+                print(f"Extracted pinyin: {pinyin_result}")
+
+                # Only update if we got a valid result AND it's different
+                outcome = 'failed'
+                if pinyin_result:
+                    outcome = 'updated'
+                    if pinyin_result != current_pinyin:
+                        sentence['pinyin'] = pinyin_result
+                        print(f"✏️ Updated pinyin: {current_pinyin} → {pinyin_result}")
+                        count += 1
+
+                        if saver.mark_changed(task['key'], 'pinyin', pinyin_result):
+                            print(f"💾 Saved after updating sentence #{sentence_index + 1}")
+                    else:
+                        outcome = 'unchanged'
+                        print(f"✓ Pinyin is correct, no update needed")
+                else:
+                    print(f"⚠️ Failed to extract valid pinyin, skipping update")
+            else:
+                print("Error: No output received")
 
-                if should_exit:
-                    break
+            journal.record('pinyin', task['key'], outcome)
+            saver.maybe_flush()
+            print("---")
 
-                sentence_index += 1
-                print("---")
+        if should_exit:
+            break
 
-                # Uncomment to stop after N sentences for testing
-                # if count >= 3:
-                #     print(f"\n⏹️ Stopping after {count} sentences for testing")
-                #     should_exit = True
-                #     break
+    # Save any pending updates back to the JSON file
+    saver.close()
+
+    print(f"\n{stats.report()}")
+    if not args.no_precheck:
+        print(precheck.report())
+    print(cache.report())
+    if scheduler:
+        print(scheduler.report())
+    backend = get_backend()
+    if hasattr(backend, 'report'):
+        print(backend.report())
+    backend.close()
+    cache.close()
+    journal.close()
 
-# Save the updated data back to the JSON file
-with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=4)
+    if should_exit:
+        print(f"\n❗ Execution stopped after recording {journal.recorded} sentences.")
+        print(f"📌 Progress is journaled in {journal.path}; run the script again to resume")
+    else:
+        print(f"\n✅ File processing completed! Updated {count} sentences.")
 
-if should_exit:
-    print(f"\n❗ Execution stopped after processing {sentence_index} sentences.")
-    print(f"📌 To resume, set START_INDEX = {sentence_index} in the script")
-else:
-    print(f"\n✅ File processing completed! Updated {count} sentences.")
+    print(f"💾 File saved: {OUTPUT_FILE}")
 
-print(f"💾 File saved: {OUTPUT_FILE}")
+if __name__ == "__main__":
+    main()
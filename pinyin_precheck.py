@@ -0,0 +1,201 @@
+"""
+Local rule-based pinyin pre-check
+
+Builds a reading lexicon from WORD_DICT (enhance_translations.py) and the
+words/pinyin breakdowns of the other lesson files (never the file being
+checked: its breakdowns were written together with the pinyin under test,
+so a wrong reading in both would confirm itself), segments each sentence (with
+jieba when it is installed, otherwise by longest match over the lexicon)
+and compares the candidate readings with the stored 'pinyin', ignoring
+case, spacing and punctuation. Only sentences that match with a single
+possible reading are settled locally; mismatches, unknown words and
+ambiguous polyphones still go to the remote verifier.
+"""
+
+import glob
+import itertools
+import os
+import re
+import unicodedata
+
+from enhance_translations import WORD_DICT
+from lesson_stream import iter_sentence_records
+from segmenter import get_segmenter, jieba
+
+DEFAULT_LEXICON_FILES = ['public/data/integrated/*.json', 'public/data/currently/*.json']
+MAX_READINGS = 16  # 후보 발음 조합 상한 (초과 시 모호한 것으로 처리)
+
+# 一 and 不 change tone with the next syllable; any of these is accepted without counting as ambiguous
+SANDHI_READINGS = {'一': ('yī', 'yí', 'yì'), '不': ('bù', 'bú')}
+
+SYLLABLE_SPLIT_PATTERN = re.compile(r"[\s'’\-]+")
+HAN_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+MATCH, MISMATCH, AMBIGUOUS, UNKNOWN = 'match', 'mismatch', 'ambiguous', 'unknown'
+
+
+def normalize_syllable(text):
+    """Lowercase NFC letters only, with 'v'/'u:' spelled as 'ü'"""
+    text = unicodedata.normalize('NFC', text.lower().replace('u:', 'ü'))
+    return ''.join('ü' if char == 'v' else char for char in text if char.isalpha())
+
+
+def normalize_pinyin(text):
+    """Pinyin without case, spacing or punctuation, for comparing whole sentences"""
+    return ''.join(normalize_syllable(part) for part in SYLLABLE_SPLIT_PATTERN.split(text))
+
+
+def iter_word_readings(sentence):
+    """(word, pinyin) pairs of a sentence's breakdown, in either lesson file layout"""
+    breakdown = sentence.get('words') or {}
+    if isinstance(breakdown, dict):
+        # integrated: parallel arrays
+        yield from zip(breakdown.get('words', ()), breakdown.get('pinyin', ()))
+    else:
+        # currently: one object per word
+        for word in breakdown:
+            if isinstance(word, dict):
+                yield word.get('chinese', ''), word.get('pinyin', '')
+
+
+def split_syllables(pinyin):
+    return tuple(syllable for syllable in map(normalize_syllable, SYLLABLE_SPLIT_PATTERN.split(pinyin)) if syllable)
+
+
+class PinyinLexicon:
+    """Word -> readings (as syllable tuples), plus per-character readings from syllable-aligned words"""
+
+    def __init__(self):
+        self.words = {}
+        self.chars = {}
+        self.max_word_length = 1
+
+    def add(self, word, pinyin):
+        if not word or not pinyin or '(' in pinyin:  # '(word_pinyin)' placeholders
+            return
+        syllables = split_syllables(pinyin)
+        if not syllables:
+            return
+        self.words.setdefault(word, set()).add(syllables)
+        self.max_word_length = max(self.max_word_length, len(word))
+        if len(syllables) == len(word):
+            for char, syllable in zip(word, syllables):
+                self.chars.setdefault(char, set()).add(syllable)
+
+    @classmethod
+    def build(cls, patterns=DEFAULT_LEXICON_FILES, exclude=()):
+        """
+        Lexicon from WORD_DICT and the word breakdowns of the lesson files
+        matching patterns, except the files in exclude (the ones being checked)
+        """
+        lexicon = cls()
+        for word, entry in WORD_DICT.items():
+            lexicon.add(word, entry['pinyin'])
+        excluded = {os.path.abspath(path) for path in exclude}
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                if os.path.abspath(path) in excluded:
+                    continue
+                for _, sentence in iter_sentence_records(path):
+                    for word, pinyin in iter_word_readings(sentence):
+                        lexicon.add(word, pinyin)
+        return lexicon
+
+    def segment(self, sentence):
+        """Split a sentence into words: jieba if available, else longest match over the lexicon"""
+        if jieba is not None:
+            return get_segmenter().cut(sentence)
+        segments = []
+        position = 0
+        while position < len(sentence):
+            if not HAN_PATTERN.match(sentence[position]):
+                end = position + 1
+                while end < len(sentence) and not HAN_PATTERN.match(sentence[end]):
+                    end += 1
+                segments.append(sentence[position:end])
+                position = end
+                continue
+            for length in range(min(self.max_word_length, len(sentence) - position), 0, -1):
+                word = sentence[position:position + length]
+                if length == 1 or word in self.words:
+                    segments.append(word)
+                    position += length
+                    break
+        return segments
+
+    def readings(self, segment):
+        """
+        Return (readings, ambiguous) for one segment: the accepted reading
+        strings, or None if some character has no known reading.
+        """
+        if not HAN_PATTERN.search(segment):
+            # Punctuation is ignored; Latin words read as themselves; digits need the verifier
+            if any(char.isdigit() for char in segment):
+                return None, False
+            return {normalize_pinyin(segment)}, False
+
+        if segment in self.words:
+            options = self.words[segment]
+        else:
+            per_char = []
+            for char in segment:
+                if not HAN_PATTERN.match(char):
+                    continue
+                char_readings = self.chars.get(char) or {
+                    syllables[0] for syllables in self.words.get(char, ()) if len(syllables) == 1}
+                if not char_readings:
+                    return None, False
+                per_char.append(sorted(char_readings))
+            options = set(itertools.islice(itertools.product(*per_char), MAX_READINGS + 1))
+            segment = ''.join(char for char in segment if HAN_PATTERN.match(char))
+
+        accepted = set()
+        canonical = set()  # Readings that differ only in spacing or tone sandhi are the same reading
+        for syllables in options:
+            variants = [[syllable] for syllable in syllables]
+            if len(syllables) == len(segment):
+                for position, char in enumerate(segment):
+                    if char in SANDHI_READINGS:
+                        variants[position] = SANDHI_READINGS[char]
+            canonical.add(''.join(variant[0] for variant in variants))
+            for combination in itertools.islice(itertools.product(*variants), MAX_READINGS):
+                accepted.add(''.join(combination))
+        return accepted, len(canonical) > 1
+
+    def check(self, chinese, pinyin):
+        """Classify stored pinyin as MATCH, MISMATCH, AMBIGUOUS or UNKNOWN"""
+        target = normalize_pinyin(pinyin)
+        positions = {0}
+        ambiguous = False
+        for segment in self.segment(chinese):
+            accepted, segment_ambiguous = self.readings(segment)
+            if accepted is None:
+                return UNKNOWN
+            ambiguous = ambiguous or segment_ambiguous
+            positions = {position + len(reading) for position in positions for reading in accepted
+                         if target.startswith(reading, position)}
+            if not positions:
+                return MISMATCH
+        if len(target) not in positions:
+            return MISMATCH
+        return AMBIGUOUS if ambiguous else MATCH
+
+
+class PrecheckStats:
+    """Counts of pre-check outcomes and the verifier calls they avoided"""
+
+    def __init__(self, batch_size=1):
+        self.batch_size = max(1, batch_size)
+        self.counts = {MATCH: 0, MISMATCH: 0, AMBIGUOUS: 0, UNKNOWN: 0}
+
+    def record(self, status):
+        self.counts[status] += 1
+
+    def report(self):
+        total = sum(self.counts.values())
+        matched = self.counts[MATCH]
+        calls_avoided = -(-matched // self.batch_size)
+        share = matched / total * 100 if total else 0.0
+        return (f"🔎 Pre-check: {matched}/{total} sentences confirmed locally ({share:.1f}%, "
+                f"~{calls_avoided} calls avoided); forwarded {self.counts[MISMATCH]} mismatches, "
+                f"{self.counts[AMBIGUOUS]} ambiguous polyphones, {self.counts[UNKNOWN]} with unknown words")
@@ -0,0 +1,215 @@
+"""
+Adaptive rate-limit scheduler for verifier calls
+
+Shared by the CLI scripts and the Tk verifier. Every call first reserves
+room in a sliding one-minute window (request count and estimated prompt
+tokens), so we throttle before Claude does. Transient failures (timeouts,
+empty output) are retried with exponential backoff, and a hard usage
+limit ("5-hour limit reached ... resets 3am") pauses every caller until
+the reset time instead of ending the run.
+
+run() blocks the calling thread while it waits; run_async() is the same
+policy for coroutines on an asyncio loop, sharing the same budget.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+REQUESTS_PER_MINUTE = 30  # 분당 최대 요청 수
+TOKENS_PER_MINUTE = 40000  # 분당 최대 추정 프롬프트 토큰 수
+MAX_RETRIES = 4  # 일시적 오류 재시도 횟수
+BACKOFF_BASE = 2.0  # 재시도 대기 시간(초), 시도마다 2배
+BACKOFF_MAX = 120.0
+LIMIT_FALLBACK_WAIT = 15 * 60  # 초기화 시각을 알 수 없을 때 다시 시도하기까지 대기(초)
+MAX_LIMIT_WAIT = 6 * 60 * 60  # 한도 초과 시 최대 대기(초), 넘으면 실행 중단
+
+WINDOW_SECONDS = 60.0
+
+RESET_CLOCK_PATTERN = re.compile(r'resets\s+(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)?', re.IGNORECASE)
+RESET_EPOCH_PATTERN = re.compile(r'\|(\d{10})\b')
+# "5-hour limit reached ∙ resets 3am", "Claude AI usage limit reached|1760000000", ...
+LIMIT_MESSAGE_PATTERN = re.compile(r'\b(?:\d+-hour|usage|weekly|session|opus) limit reached\b', re.IGNORECASE)
+
+
+def is_rate_limited(output):
+    """Claude CLI usage-limit message check used by every verifier (not a verification answer)"""
+    return bool(output) and LIMIT_MESSAGE_PATTERN.search(output) is not None
+
+
+def estimate_tokens(prompt):
+    """Rough token estimate: Chinese/Korean text is about one token per character, Latin text about four"""
+    wide = sum(1 for ch in prompt if ord(ch) > 0x2E80)
+    return wide + (len(prompt) - wide) // 4 + 1
+
+
+def parse_reset_time(output, now=None):
+    """Return the datetime at which the usage limit resets, or None if the message does not say"""
+    now = now or datetime.now()
+    match = RESET_EPOCH_PATTERN.search(output)
+    if match:
+        return datetime.fromtimestamp(int(match.group(1)))
+    match = RESET_CLOCK_PATTERN.search(output)
+    if not match:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridiem = (match.group(3) or '').lower()
+    if meridiem == 'pm' and hour != 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    reset = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if reset <= now:
+        reset += timedelta(days=1)
+    return reset
+
+
+class RateScheduler:
+    """Thread-safe request/token budget with backoff and sleep-until-reset"""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 max_limit_wait=MAX_LIMIT_WAIT, log=print):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_limit_wait = max_limit_wait
+        self.log = log
+        self._window = deque()  # (timestamp, tokens)
+        self._window_tokens = 0
+        self._paused_until = 0.0
+        self._limit_waited = 0.0
+        self._cond = threading.Condition()
+        self.throttled_seconds = 0.0
+        self.retries = 0
+        self.limit_waits = 0
+
+    def _prune(self, now):
+        while self._window and now - self._window[0][0] >= WINDOW_SECONDS:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _reserve(self, tokens, started):
+        """Reserve room for tokens if the budget allows it now; otherwise the seconds to wait (caller holds _cond)"""
+        now = time.monotonic()
+        self._prune(now)
+        wait = self._paused_until - now
+        if wait <= 0 and self._window:
+            if len(self._window) >= self.requests_per_minute or \
+                    self._window_tokens + tokens > self.tokens_per_minute:
+                wait = self._window[0][0] + WINDOW_SECONDS - now
+        if wait <= 0:
+            self._window.append((now, tokens))
+            self._window_tokens += tokens
+            self.throttled_seconds += now - started
+            return 0.0
+        return wait
+
+    def acquire(self, prompt):
+        """Block until the budget has room for this prompt, then reserve it"""
+        tokens = min(estimate_tokens(prompt), self.tokens_per_minute)
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._reserve(tokens, started)
+                if not wait:
+                    return
+                self._cond.wait(timeout=min(wait, 60.0))
+
+    def try_acquire(self, prompt, started=None):
+        """
+        Non-blocking acquire: reserve room for this prompt and return 0.0,
+        or return the seconds to wait before trying again. started is when
+        the caller began waiting (for throttled_seconds).
+        """
+        tokens = min(estimate_tokens(prompt), self.tokens_per_minute)
+        with self._cond:
+            return self._reserve(tokens, time.monotonic() if started is None else started)
+
+    def wait_for_reset(self, output):
+        """Pause all callers until the usage limit resets; returns False once MAX_LIMIT_WAIT is used up"""
+        reset = parse_reset_time(output)
+        wait = (reset - datetime.now()).total_seconds() + 30 if reset else LIMIT_FALLBACK_WAIT
+        wait = max(wait, 1.0)
+        with self._cond:
+            if self._limit_waited + wait > self.max_limit_wait:
+                return False
+            until = time.monotonic() + wait
+            if until > self._paused_until + WINDOW_SECONDS:
+                # First caller to see this limit sets the pause; others join it
+                self._paused_until = until
+                self._limit_waited += wait
+                self.limit_waits += 1
+                resume = reset.strftime('%H:%M') if reset else f"{wait / 60:.0f} min"
+                self.log(f"⏸️ Usage limit reached, sleeping until {resume} before resuming")
+            self._cond.notify_all()
+        return True
+
+    def backoff_delay(self, attempt):
+        """Exponentially growing, jittered delay before retry number attempt + 1"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay *= random.uniform(0.5, 1.0)
+        self.retries += 1
+        self.log(f"🔁 Transient failure, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def backoff(self, attempt):
+        """Sleep for an exponentially growing, jittered delay"""
+        time.sleep(self.backoff_delay(attempt))
+
+    def run(self, prompt, call):
+        """
+        Run call() for prompt under the budget and retry policy.
+
+        call must return a timed_call-style dict ('output', 'error',
+        'retryable'). A result that is still rate limited after
+        MAX_LIMIT_WAIT is returned as is, so the caller can stop cleanly.
+        """
+        attempt = 0
+        while True:
+            self.acquire(prompt)
+            result = call()
+            if result['output'] and is_rate_limited(result['output']):
+                if not self.wait_for_reset(result['output']):
+                    return result
+                continue
+            if result.get('retryable') and attempt < self.max_retries:
+                self.backoff(attempt)
+                attempt += 1
+                continue
+            return result
+
+    async def run_async(self, prompt, call):
+        """run() for a coroutine function call; waits with asyncio.sleep instead of blocking the loop"""
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            while True:
+                wait = self.try_acquire(prompt, started)
+                if not wait:
+                    break
+                await asyncio.sleep(min(wait, 1.0))  # Short naps so a budget freed elsewhere is noticed
+            result = await call()
+            if result['output'] and is_rate_limited(result['output']):
+                if not self.wait_for_reset(result['output']):
+                    return result
+                continue
+            if result.get('retryable') and attempt < self.max_retries:
+                await asyncio.sleep(self.backoff_delay(attempt))
+                attempt += 1
+                continue
+            return result
+
+    def report(self):
+        """One-line summary of throttling during this run"""
+        return (f"🚦 Scheduler: throttled {self.throttled_seconds:.1f}s, {self.retries} retries, "
+                f"{self.limit_waits} usage-limit waits")
@@ -0,0 +1,153 @@
+"""
+Background asyncio loop for the verifier requests of an interactive tool
+
+One event loop runs on a daemon thread for the lifetime of the tool. Every
+request is a coroutine on that loop (timed_call_async: the CLI backend
+runs as an asyncio subprocess, waits for the rate budget are asyncio
+sleeps), so any number of requests can be in flight without a thread per
+request. A semaphore caps how many of them call the backend at once.
+
+Requests are identified by a caller-chosen key; the Tk verifier uses
+(file, sentence key, field), so a result can only ever be applied to the
+sentence and field it was asked for. A key has at most one request in
+flight. Results are handed to the caller through dispatch (the verifier
+passes lambda callback: root.after(0, callback)); cancelled requests never
+call back, even if their result was already on its way.
+
+    requests = RequestLoop(scheduler=scheduler, cache=response_cache,
+                           dispatch=lambda callback: root.after(0, callback))
+    requests.submit(key, prompt, on_result, cache_key=cache_key)
+    requests.cancel_where(lambda key: key[0] == old_file)
+"""
+
+import asyncio
+import threading
+
+from rate_limiter import is_rate_limited
+from verify_engine import timed_call_async
+
+MAX_CONCURRENT = 8  # 동시에 실행할 요청 수
+REQUEST_TIMEOUT = 30  # 요청당 제한 시간(초)
+
+
+class RequestLoop:
+    """Keyed verifier requests on one asyncio loop running on a background thread"""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, timeout=REQUEST_TIMEOUT, scheduler=None, cache=None,
+                 dispatch=None):
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.cache = cache  # ResponseCache checked before calling the backend
+        self.dispatch = dispatch or (lambda callback: callback())
+        self._futures = {}  # key -> concurrent.futures.Future of the request in flight
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = None
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(started,), name="verifier requests",
+                                        daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def _run_loop(self, started):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._loop.call_soon(started.set)
+        self._loop.run_forever()
+        self._loop.close()
+
+    def pending(self, key):
+        with self._lock:
+            return key in self._futures
+
+    def keys(self):
+        """Keys of the requests in flight"""
+        with self._lock:
+            return list(self._futures)
+
+    def submit(self, key, prompt, callback, cache_key=None):
+        """
+        Start a request; callback(result) is dispatched with a timed_call
+        result dict ('output', 'error', 'latency', ... and 'from_cache').
+        Returns False (and does nothing) if key already has one in flight.
+        """
+        with self._lock:
+            if key in self._futures:
+                return False
+            future = asyncio.run_coroutine_threadsafe(self._request(prompt, cache_key), self._loop)
+            self._futures[key] = future
+        future.add_done_callback(lambda done: self._finished(key, done, callback))
+        return True
+
+    async def _request(self, prompt, cache_key):
+        if self.cache is not None and cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached:
+                return {'output': cached, 'error': None, 'from_cache': True}
+        async with self._semaphore:
+            try:
+                result = await timed_call_async(prompt, timeout=self.timeout, scheduler=self.scheduler)
+            except Exception as e:
+                result = {'output': None, 'error': str(e)}
+        if is_rate_limited(result['output']):
+            # The scheduler gave up waiting for the usage limit; the message is not an answer
+            result.update(output=None, error=f"Usage limit reached: {result['output'].strip()}")
+        result['from_cache'] = False
+        return result
+
+    def _finished(self, key, future, callback):
+        """Done callback (loop thread, or the caller's thread for a cancel)"""
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'output': None, 'error': str(e), 'from_cache': False}
+
+        def deliver():
+            with self._lock:
+                # A request cancelled (or replaced) after it finished is dropped here
+                if self._futures.get(key) is not future:
+                    return
+                del self._futures[key]
+            callback(result)
+
+        self.dispatch(deliver)
+
+    def cancel(self, key):
+        """Cancel the request for key; returns False if there was none"""
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is None:
+            return False
+        future.cancel()
+        return True
+
+    def cancel_where(self, predicate):
+        """Cancel every request whose key matches predicate; returns how many"""
+        with self._lock:
+            keys = [key for key in self._futures if predicate(key)]
+        return sum(self.cancel(key) for key in keys)
+
+    def cancel_all(self):
+        return self.cancel_where(lambda key: True)
+
+    async def _cancel_tasks(self):
+        """Cancel the loop's tasks and wait for their cleanup (killing CLI processes)"""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        """Cancel everything in flight and stop the loop"""
+        self.cancel_all()
+        if not self._thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self._loop).result(timeout=5)
+        except Exception:
+            pass  # Stop the loop regardless
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,129 @@
+"""
+Extraction and validation of verifier answers
+
+One place for the rules p_all.py, p_pinyin.py and the verifier UI apply to
+a raw answer: drop a leading "Answer:"-style prefix, take the first
+non-empty line, strip markdown and reject meta-language. Patterns are
+compiled once, each blacklist is a single combined pattern matched in one
+pass, and only the first non-empty line of the output is ever scanned.
+"""
+
+import re
+
+TRANSLATION_FIELDS = ('korean', 'english', 'japanese', 'japanese_romaji', 'translation')
+
+
+def _prefix_pattern(*prefixes):
+    return re.compile(r'^(' + '|'.join(prefixes) + r')[:\s]*', re.IGNORECASE)
+
+
+def _blacklist_pattern(*words):
+    return re.compile('|'.join(re.escape(word) for word in words))
+
+
+# Leading labels removed before the answer, per caller
+CLEAN_PREFIX_PATTERN = _prefix_pattern('Your answer', 'Pinyin', 'Answer', 'Response', 'Korean', 'English',
+                                       'Japanese', 'Chinese')
+PINYIN_PREFIX_PATTERN = _prefix_pattern('Your answer', 'Pinyin', 'Answer', 'Response')
+UI_PREFIX_PATTERN = _prefix_pattern('Your answer', 'Answer', 'Response')
+
+MARKDOWN_PATTERN = re.compile(r'\*\*|`')
+PINYIN_PATTERN = re.compile(r'^[a-zA-Zāáǎàēéěèīíǐìōóǒòūúǔùǖǘǚǜ\s\']+$')
+CHINESE_CHAR_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+# Words that mean the model explained or refused instead of answering (matched on the lowercased line)
+CLEAN_BLACKLIST = _blacklist_pattern('verify', 'check', 'please', 'respond', 'provide', 'however', 'happy', 'help',
+                                     'want', 'could', 'would', 'should')
+PINYIN_BLACKLIST = _blacklist_pattern('verify', 'check', 'correct', 'chinese', 'sentence', 'please', 'respond',
+                                      'answer', 'provide', 'matches', 'however', 'happy', 'help', 'want', 'could',
+                                      'would', 'should', 'message')
+TRANSLATION_BLACKLIST = _blacklist_pattern('verify', 'check', 'please', 'respond', 'however', 'want', 'could',
+                                           'would', 'should', 'sorry', 'cannot')
+GENERIC_BLACKLIST = _blacklist_pattern('verify', 'check', 'please', 'respond', 'however', 'help', 'want', 'could',
+                                       'would', 'should', 'message', 'sorry')
+
+
+def first_answer_line(text, prefix_pattern):
+    """First non-empty line after the prefix, without markdown; stops at that line"""
+    text = prefix_pattern.sub('', text.strip(), count=1)
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        line = text[start:end] if end >= 0 else text[start:]
+        line = line.strip()
+        if line:
+            return MARKDOWN_PATTERN.sub('', line).strip()
+        if end < 0:
+            return ""
+        start = end + 1
+
+
+def validate_pinyin(text):
+    """Validate if text looks like valid pinyin"""
+    if PINYIN_PATTERN.match(text) and len(text) >= 3 and not PINYIN_BLACKLIST.search(text.lower()):
+        return text
+    return ""
+
+
+def validate_chinese(text):
+    """Validate if text looks like valid Chinese"""
+    # Check if contains Chinese characters
+    if CHINESE_CHAR_PATTERN.search(text) and len(text) >= 1:
+        return text
+    return ""
+
+
+def validate_translation(text):
+    """Validate if text looks like valid translation (Korean, English, Japanese, etc.)"""
+    # Basic validation - just check length and avoid common error words
+    if len(text) >= 2 and not TRANSLATION_BLACKLIST.search(text.lower()):
+        return text
+    return ""
+
+
+def validate_field(field, text):
+    """Apply the validation rule of field; fields without a rule only need to be non-empty"""
+    if field == 'pinyin':
+        return validate_pinyin(text)
+    if field == 'sentence':
+        return validate_chinese(text)
+    if field in TRANSLATION_FIELDS:
+        return validate_translation(text)
+    return text
+
+
+def extract_clean_response(text):
+    """
+    Extract clean response from Claude's output, removing explanations and formatting
+    """
+    line = first_answer_line(text, CLEAN_PREFIX_PATTERN)
+    if line and not CLEAN_BLACKLIST.search(line.lower()):
+        return line
+    return ""
+
+
+def extract_pinyin(text):
+    """
+    Extract only the pinyin from Claude's response, removing explanations and other text
+
+    Valid pinyin contains only letters (with optional tone marks), spaces and
+    apostrophes, has at least one space (multi-syllable) and no English words
+    that indicate an explanation.
+    """
+    line = first_answer_line(text, PINYIN_PREFIX_PATTERN)
+    if ' ' in line:
+        return validate_pinyin(line)
+    return ""
+
+
+def extract_result(text, field):
+    """Extract the result from Claude's response based on field type (verifier UI rules)"""
+    line = first_answer_line(text, UI_PREFIX_PATTERN)
+    if not line:
+        return ""
+    if field in ('pinyin', 'sentence') or field in TRANSLATION_FIELDS:
+        return validate_field(field, line)
+    # Generic validation - just return if it's not too short and doesn't contain common error words
+    if len(line) >= 2 and not GENERIC_BLACKLIST.search(line.lower()):
+        return line
+    return ""
@@ -0,0 +1,77 @@
+"""
+Run journal for resumable verification runs
+
+Every processed sentence is appended to a JSONL journal as
+(field, stable sentence key, outcome). On the next run the journal is
+loaded into a set, so already-verified sentences are skipped in O(1) and a
+run stopped by a rate limit resumes exactly where it left off, for any
+number of fields and files.
+"""
+
+import json
+import os
+
+DEFAULT_JOURNAL_FILE = '.verify_journal.jsonl'
+
+# Outcomes that count as verified; failed extractions and errors are retried
+DONE_OUTCOMES = ('updated', 'unchanged')
+
+
+class RunJournal:
+    """Append-only journal of verification outcomes with an in-memory done index"""
+
+    def __init__(self, path=DEFAULT_JOURNAL_FILE):
+        self.path = path
+        self.done = set()
+        self.recorded = 0
+        torn = False
+        if os.path.exists(path):
+            torn = self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+        if torn:
+            # Start on a fresh line so the first record is not glued onto a killed run's partial one
+            self._file.write('\n')
+
+    def _load(self):
+        """Fill the done index; True if the journal ends in a partial line"""
+        raw = '\n'
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for raw in f:
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial last line from a killed run
+                if entry.get('outcome') == 'reset':
+                    self._drop(entry['field'], entry['file'])
+                elif entry.get('outcome') in DONE_OUTCOMES:
+                    self.done.add((entry['field'], tuple(entry['key'])))
+        return not raw.endswith('\n')
+
+    def _drop(self, field, file_name):
+        self.done = {(f, key) for f, key in self.done if not (f == field and key[0] == file_name)}
+
+    def is_done(self, field, key):
+        return (field, tuple(key)) in self.done
+
+    def record(self, field, key, outcome):
+        """Append one outcome and flush it so a crash loses at most this line"""
+        self._file.write(json.dumps({'field': field, 'key': list(key), 'outcome': outcome},
+                                    ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.recorded += 1
+        if outcome in DONE_OUTCOMES:
+            self.done.add((field, tuple(key)))
+
+    def reset(self, field, file_name):
+        """Forget every outcome of field in file_name (used by --restart)"""
+        file_name = os.path.basename(file_name)
+        self._file.write(json.dumps({'field': field, 'file': file_name, 'outcome': 'reset'},
+                                    ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._drop(field, file_name)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,210 @@
+"""
+Cached Chinese word segmentation
+
+One jieba tokenizer per process, with the lesson vocabulary (every word of
+the words.words breakdowns) registered as a user dictionary. The
+initialized prefix dictionary, lesson words included, is serialized to
+.segment_cache/ keyed by the jieba version and the lesson files' mtimes and
+sizes, so later starts load it with a single pickle.load (several times
+faster than jieba's own marshal cache) instead of rebuilding jieba's
+dictionary and re-reading every lesson file. Results are memoized per
+sentence in an LRU.
+
+Without jieba, sentences are segmented by longest match over the word
+dictionary (word_dict.py) and the lesson vocabulary.
+
+    python segmenter.py --sentence 他想见你
+    python segmenter.py public/data/integrated/*.json --workers 4 --output segments.jsonl
+"""
+
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lesson_stream import iter_sentence_records
+from word_dict import WordTrie, iter_breakdown_entries, load_word_dict
+
+try:
+    import jieba
+except ImportError:  # Optional: longest-match segmentation over the word dictionary is used instead
+    jieba = None
+
+DEFAULT_VOCABULARY_FILES = ['public/data/integrated/*.json', 'public/data/currently/*.json']
+SEGMENT_CACHE_DIR = '.segment_cache'
+SEGMENT_CACHE_VERSION = 1
+DEFAULT_LRU_SIZE = 65536
+
+HAN_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+
+def vocabulary_files(patterns):
+    return sorted({path for pattern in patterns for path in glob.glob(pattern)})
+
+
+def load_vocabulary(paths):
+    """Every Chinese word of the lesson breakdowns in paths"""
+    words = set()
+    for path in paths:
+        for _, sentence in iter_sentence_records(path):
+            for word, _ in iter_breakdown_entries(sentence):
+                if word and HAN_PATTERN.search(word) and '(' not in word:
+                    words.add(word.strip())
+    return sorted(words)
+
+
+def _vocabulary_digest(paths):
+    """Changes whenever a lesson file (or the jieba version) does"""
+    stamps = [SEGMENT_CACHE_VERSION, getattr(jieba, '__version__', None)]
+    for path in paths:
+        stat = os.stat(path)
+        stamps.append([os.path.abspath(path), stat.st_mtime_ns, stat.st_size])
+    return hashlib.sha1(json.dumps(stamps, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+class Segmenter:
+    """
+    Sentence -> list of words, with the lesson vocabulary as a user
+    dictionary. The tokenizer is loaded on first use.
+    """
+
+    def __init__(self, patterns=DEFAULT_VOCABULARY_FILES, cache_dir=SEGMENT_CACHE_DIR, lru_size=DEFAULT_LRU_SIZE):
+        self.patterns = patterns
+        self.cache_dir = cache_dir
+        self.loaded_from = None  # 'cache', 'build' or 'trie' once loaded
+        self.load_seconds = 0.0
+        self._tokenizer = None
+        self._trie = None
+        self._cut_cached = functools.lru_cache(maxsize=lru_size)(self._cut)
+
+    def load(self):
+        """Initialize the tokenizer now instead of on the first sentence"""
+        if self._tokenizer is not None or self._trie is not None:
+            return self
+        started = time.perf_counter()
+        paths = vocabulary_files(self.patterns)
+        if jieba is None:
+            entries = load_word_dict()
+            for word in load_vocabulary(paths):
+                entries.setdefault(word, {})
+            self._trie = WordTrie(entries)
+            self.loaded_from = 'trie'
+        else:
+            self._tokenizer = self._load_jieba(paths)
+        self.load_seconds = time.perf_counter() - started
+        return self
+
+    def _load_jieba(self, paths):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = os.path.join(self.cache_dir, f"jieba.{_vocabulary_digest(paths)}.pickle")
+        tokenizer = jieba.Tokenizer()
+        tokenizer.tmp_dir = self.cache_dir  # jieba's own base dictionary cache lives next to ours
+        try:
+            with open(cache_path, 'rb') as f:
+                tokenizer.FREQ, tokenizer.total = pickle.load(f)
+            tokenizer.initialized = True
+            self.loaded_from = 'cache'
+            return tokenizer
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            pass
+
+        tokenizer.initialize()
+        for word in load_vocabulary(paths):
+            tokenizer.add_word(word)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((tokenizer.FREQ, tokenizer.total), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        self.loaded_from = 'build'
+        return tokenizer
+
+    def _cut(self, sentence):
+        self.load()
+        if self._tokenizer is not None:
+            words = self._tokenizer.lcut(sentence)
+        else:
+            words = [piece for piece, _ in self._trie.segment(sentence)]
+        return tuple(word for word in words if word.strip())
+
+    def cut(self, sentence):
+        """Words of sentence (whitespace dropped, punctuation kept)"""
+        return list(self._cut_cached(sentence))
+
+    def cut_many(self, sentences):
+        return [self.cut(sentence) for sentence in sentences]
+
+    def cache_info(self):
+        return self._cut_cached.cache_info()
+
+
+_segmenter = None
+
+
+def get_segmenter():
+    """The shared Segmenter of this process"""
+    global _segmenter
+    if _segmenter is None:
+        _segmenter = Segmenter()
+    return _segmenter
+
+
+def segment(sentence):
+    return get_segmenter().cut(sentence)
+
+
+def segment_file(path):
+    """Segment every sentence of a lesson file; returns {'file', 'records', 'seconds'}"""
+    started = time.perf_counter()
+    segmenter = get_segmenter()
+    records = [{'key': list(key), 'sentence': sentence['sentence'], 'words': segmenter.cut(sentence['sentence'])}
+               for key, sentence in iter_sentence_records(path) if sentence.get('sentence')]
+    return {'file': path, 'records': records, 'seconds': time.perf_counter() - started}
+
+
+def segment_files(paths, workers=1):
+    """segment_file over paths (in input order), spread over worker processes"""
+    get_segmenter().load()  # Build the serialized cache once, before workers start reading it
+    if workers <= 1 or len(paths) <= 1:
+        return [segment_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        return list(executor.map(segment_file, paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment lesson sentences with the cached jieba tokenizer")
+    parser.add_argument('files', nargs='*', default=DEFAULT_VOCABULARY_FILES, help="lesson files or globs")
+    parser.add_argument('--sentence', nargs='+', default=None, help="segment these sentences instead of files")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument('--output', default=None, help="write {key, sentence, words} records as JSONL")
+    args = parser.parse_args()
+
+    segmenter = get_segmenter().load()
+    print(f"✂️ Tokenizer loaded ({segmenter.loaded_from}) in {segmenter.load_seconds:.3f}s")
+    if args.sentence:
+        for sentence in args.sentence:
+            print(f"   {sentence}: {' / '.join(segmenter.cut(sentence))}")
+        return
+
+    started = time.perf_counter()
+    results = segment_files(vocabulary_files(args.files), max(1, args.workers))
+    for result in results:
+        print(f"   {result['file']}: {len(result['records'])} sentences, {result['seconds']:.2f}s")
+    total = sum(len(result['records']) for result in results)
+    print(f"✂️ Segmented {total} sentences in {time.perf_counter() - started:.2f}s")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for result in results:
+                for record in result['records']:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        print(f"📝 Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Shared sentence index for lesson files
+
+Builds, once per file, a flat array of sentence entries with stable keys
+(file, lesson, category, subcategory, id) and their position in the nested
+contents/content/subcategories/sentences tree, plus lookups by key,
+Chinese text and lesson. The index (without the sentence objects) is cached
+on disk keyed by the file's mtime and size, so tools that only need the
+index open instantly; sentence objects are resolved lazily when asked for.
+"""
+
+import hashlib
+import json
+import os
+
+from lesson_data import sentence_key
+
+INDEX_CACHE_DIR = '.index_cache'
+INDEX_VERSION = 1
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size, INDEX_VERSION]
+
+
+def _cache_path(path, cache_dir):
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{digest}.json")
+
+
+class SentenceIndex:
+    """
+    Flat index over one lesson file.
+
+    Each entry is a dict with 'key', 'path' (contents/content/subcategory/
+    sentence positions), 'lesson', 'chinese' and, once resolved,
+    'sentence_obj' (a reference into the loaded document).
+    """
+
+    def __init__(self, file_name, entries, data=None):
+        self.file_name = file_name
+        self.entries = entries
+        self.data = data
+        self.by_key = {}
+        self.by_chinese = {}
+        self.by_lesson = {}
+        for entry in entries:
+            self.by_key[entry['key']] = entry
+            self.by_chinese.setdefault(entry['chinese'], []).append(entry)
+            self.by_lesson.setdefault(entry['lesson'], []).append(entry)
+        if data is not None:
+            self._attach(data)
+
+    @classmethod
+    def from_data(cls, data, file_name):
+        """Index an already loaded document (entries reference its sentence objects)"""
+        entries = []
+        for ci, content in enumerate(data['contents']):
+            lesson = content.get('lesson')
+            for li, lesson_content in enumerate(content['content']):
+                category = lesson_content.get('category', '')
+                for si, subcategory in enumerate(lesson_content['subcategories']):
+                    subcategory_name = subcategory.get('subcategory', '')
+                    for ni, sentence in enumerate(subcategory['sentences']):
+                        entries.append({
+                            'key': sentence_key(file_name, lesson, category, subcategory_name, sentence, ni + 1),
+                            'path': (ci, li, si, ni),
+                            'lesson': lesson,
+                            'chinese': sentence.get('sentence', ''),
+                            'sentence_obj': sentence
+                        })
+        index = cls(file_name, entries)
+        index.data = data
+        return index
+
+    @classmethod
+    def open(cls, path, use_cache=True, cache_dir=INDEX_CACHE_DIR):
+        """Index a file, from the on-disk cache when the file is unchanged"""
+        cache_file = _cache_path(path, cache_dir)
+        stamp = _file_stamp(path)
+        if use_cache and os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached['stamp'] == stamp:
+                    entries = [{'key': tuple(e['key']), 'path': tuple(e['path']),
+                                'lesson': e['lesson'], 'chinese': e['chinese']} for e in cached['entries']]
+                    return cls(path, entries)
+            except (ValueError, KeyError):
+                pass  # Corrupt or old cache: rebuild below
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls.from_data(data, path)
+        if use_cache:
+            index.save_cache(stamp, cache_file)
+        return index
+
+    def save_cache(self, stamp=None, cache_file=None, cache_dir=INDEX_CACHE_DIR):
+        cache_file = cache_file or _cache_path(self.file_name, cache_dir)
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        payload = {
+            'stamp': stamp or _file_stamp(self.file_name),
+            'entries': [{'key': list(e['key']), 'path': list(e['path']),
+                         'lesson': e['lesson'], 'chinese': e['chinese']} for e in self.entries]
+        }
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+
+    def _attach(self, data):
+        self.data = data
+        for entry in self.entries:
+            ci, li, si, ni = entry['path']
+            entry['sentence_obj'] = data['contents'][ci]['content'][li]['subcategories'][si]['sentences'][ni]
+
+    def load(self):
+        """Load the document (if not loaded yet) and resolve every entry's sentence object"""
+        if self.data is None:
+            with open(self.file_name, 'r', encoding='utf-8') as f:
+                self._attach(json.load(f))
+        return self.data
+
+    def sentence(self, entry):
+        """Sentence object of an entry, loading the document on first use"""
+        if 'sentence_obj' not in entry:
+            self.load()
+        return entry['sentence_obj']
+
+    def get(self, key):
+        return self.by_key.get(tuple(key))
+
+    def find_chinese(self, text):
+        return self.by_chinese.get(text, [])
+
+    def lesson(self, lesson):
+        return self.by_lesson.get(lesson, [])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, position):
+        return self.entries[position]
+
+
+def open_indexes(paths, use_cache=True):
+    """Index several lesson files; files without 'contents' (e.g. manifest.json) are skipped"""
+    indexes = []
+    for path in paths:
+        try:
+            indexes.append(SentenceIndex.open(path, use_cache=use_cache))
+        except KeyError:
+            continue
+    return indexes
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from dict_store import DictStore, build_store, is_stale, numbered_to_marks, open_store
+
+
+@pytest.mark.parametrize('syllable, expected', [
+    ('hao3', 'hǎo'),
+    ('ma1', 'mā'),
+    ('xie4', 'xiè'),
+    ('gou3', 'gǒu'),
+    ('shui3', 'shuǐ'),
+    ('xiong2', 'xióng'),
+    ('lu:4', 'lǜ'),
+    ('Zhong1', 'Zhōng'),
+    ('ma5', 'ma'),
+    ('r5', 'r'),
+    ('，', '，'),
+    ('hao', 'hao'),
+])
+def test_numbered_to_marks(syllable, expected):
+    assert numbered_to_marks(syllable) == expected
+
+
+ENTRIES = {
+    '我们': {'pinyin': 'wǒ men', 'korean': '우리'},
+    '我': {'pinyin': 'wǒ', 'korean': '나'},
+    '走': {'pinyin': 'zǒu', 'korean': '가다'},
+    '一边': {'pinyin': 'yī biān', 'korean': '~하면서'},
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / 'words.dict')
+    build_store(path, ENTRIES)
+    with DictStore(path) as store:
+        yield store
+
+
+def test_store_lookup(store):
+    assert len(store) == len(ENTRIES)
+    for word, entry in ENTRIES.items():
+        assert store.get(word) == entry
+        assert word in store
+    assert store.get('你') is None
+    assert store.get('你', 'default') == 'default'
+    assert '你' not in store
+    assert sorted(store.keys()) == sorted(ENTRIES)
+
+
+def test_store_longest_match_and_segment(store):
+    assert store.longest_match('我们走吧') == (2, ENTRIES['我们'])
+    assert store.longest_match('我们走吧', 3) == (0, None)
+    assert store.segment('我们走吧') == [('我们', ENTRIES['我们']), ('走', ENTRIES['走']), ('吧', None)]
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / 'empty.dict')
+    build_store(path, {})
+    with DictStore(path) as store:
+        assert len(store) == 0
+        assert store.get('我') is None
+
+
+def test_open_store_missing(tmp_path):
+    assert open_store(str(tmp_path / 'missing.dict')) is None
+
+
+def test_is_stale_tracks_sources(tmp_path):
+    source = tmp_path / 'word_dict.tsv'
+    source.write_text('我\twǒ\n', encoding='utf-8')
+    path = str(tmp_path / 'words.dict')
+    assert is_stale(path)
+    build_store(path, ENTRIES, sources=[str(source)])
+    assert not is_stale(path)
+    built = os.path.getmtime(path)
+    os.utime(source, (built + 10, built + 10))
+    assert is_stale(path)
@@ -0,0 +1,69 @@
+import json
+
+from enhance_translations import TRANSLATION_DICT, enhance_lesson, sentence_fingerprint
+
+SENTENCE = '我们走吧'
+WORDS = ['我们', '走', '吧']
+
+
+def make_lesson(**fields):
+    sentence = {'id': 1, 'sentence': SENTENCE, 'words': {'words': list(WORDS)}}
+    sentence.update(fields)
+    return {'lesson': 31, 'content': [{'category': '제안', 'subcategories': [{'sentences': [sentence]}]}]}
+
+
+def sentence_of(lesson):
+    return lesson['content'][0]['subcategories'][0]['sentences'][0]
+
+
+def fingerprint_key():
+    return json.dumps(['lesson.json', 31, '제안', '', 1], ensure_ascii=False)
+
+
+def enhance(lesson, fingerprints):
+    return enhance_lesson(lesson, [(31, 90)], 'lesson.json', fingerprints)
+
+
+def test_unchanged_sentence_without_placeholders_is_skipped():
+    lesson = make_lesson(pinyin='wǒ men zǒu ba', korean='우리 가자', english='Shall we go?')
+    fingerprints = {fingerprint_key(): sentence_fingerprint(SENTENCE, WORDS)}
+    result = enhance(lesson, fingerprints)
+    assert (result['sentences'], result['skipped'], result['changes']) == (0, 1, [])
+    assert sentence_of(lesson)['korean'] == '우리 가자'
+
+
+def test_new_sentence_without_placeholders_only_records_its_fingerprint():
+    lesson = make_lesson(pinyin='wǒ men zǒu ba', korean='우리 가자', english='Shall we go?')
+    result = enhance(lesson, {})
+    assert result['skipped'] == 1 and result['changes'] == []
+    assert result['fingerprints'] == {fingerprint_key(): sentence_fingerprint(SENTENCE, WORDS)}
+
+
+def test_placeholders_are_filled_without_touching_written_fields():
+    expected = TRANSLATION_DICT[SENTENCE]
+    for fingerprints in ({}, {fingerprint_key(): sentence_fingerprint(SENTENCE, WORDS)}):
+        lesson = make_lesson(pinyin='', korean='(我们_korean) (走_korean)', english='Shall we go?')
+        result = enhance(lesson, fingerprints)
+        sentence = sentence_of(lesson)
+        assert result['sentences'] == 1
+        assert sentence['pinyin'] == expected['pinyin']
+        assert sentence['korean'] == expected['korean']
+        assert sentence['english'] == 'Shall we go?'
+        assert {change['field'] for change in result['changes']} >= {'pinyin', 'korean'}
+
+
+def test_changed_sentence_overwrites_stale_fields():
+    expected = TRANSLATION_DICT[SENTENCE]
+    lesson = make_lesson(pinyin='wǒ men qù ba', korean='우리 가자', english='Shall we go?')
+    result = enhance(lesson, {fingerprint_key(): 'fingerprint of an earlier text'})
+    sentence = sentence_of(lesson)
+    assert result['sentences'] == 1
+    assert (sentence['pinyin'], sentence['korean'], sentence['english']) == \
+        (expected['pinyin'], expected['korean'], expected['english'])
+
+
+def test_full_run_enhances_everything():
+    lesson = make_lesson(pinyin='wrong', korean='우리 가자', english='Shall we go?')
+    result = enhance(lesson, None)
+    assert result['sentences'] == 1 and result['skipped'] == 0
+    assert sentence_of(lesson)['english'] == TRANSLATION_DICT[SENTENCE]['english']
@@ -0,0 +1,150 @@
+import copy
+import json
+import os
+import time
+
+import pytest
+
+import json_saver
+from json_saver import BackgroundSaver, DebouncedSaver, atomic_write_json, patch_log_path
+from sentence_index import SentenceIndex
+
+DOCUMENT = {
+    'contents': [{
+        'lesson': 1,
+        'content': [{
+            'category': '인사',
+            'subcategories': [{
+                'subcategory': '기본',
+                'sentences': [{'id': 'a', 'sentence': '你好', 'pinyin': ''},
+                              {'id': 'b', 'sentence': '再见', 'pinyin': ''}]
+            }]
+        }]
+    }]
+}
+KEY_A = ('lesson.json', 1, '인사', '기본', 'a')
+KEY_B = ('lesson.json', 1, '인사', '기본', 'b')
+
+
+def sentences(data):
+    return data['contents'][0]['content'][0]['subcategories'][0]['sentences']
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def lesson_file(tmp_path):
+    path = str(tmp_path / 'lesson.json')
+    atomic_write_json(path, DOCUMENT)
+    return path
+
+
+def test_atomic_write_leaves_no_temp_files(lesson_file):
+    assert load(lesson_file) == DOCUMENT
+    assert os.listdir(os.path.dirname(lesson_file)) == ['lesson.json']
+
+
+def test_failed_write_keeps_the_old_file(lesson_file):
+    with pytest.raises(TypeError):
+        atomic_write_json(lesson_file, {'contents': object()})
+    assert load(lesson_file) == DOCUMENT
+    assert os.listdir(os.path.dirname(lesson_file)) == ['lesson.json']
+
+
+def test_changes_are_coalesced(lesson_file):
+    data = copy.deepcopy(DOCUMENT)
+    saver = DebouncedSaver(lesson_file, data, flush_every=2, flush_interval=3600)
+    sentences(data)[0]['pinyin'] = 'nǐ hǎo'
+    assert not saver.mark_changed(KEY_A, 'pinyin', 'nǐ hǎo')
+    assert sentences(load(lesson_file))[0]['pinyin'] == ''
+    assert os.path.exists(patch_log_path(lesson_file))
+
+    sentences(data)[1]['pinyin'] = 'zài jiàn'
+    assert saver.mark_changed(KEY_B, 'pinyin', 'zài jiàn')
+    assert load(lesson_file) == data
+    assert not os.path.exists(patch_log_path(lesson_file))
+    assert saver.flushes == 1
+    saver.close()
+    assert saver.flushes == 1  # Nothing left to write
+
+
+def test_close_writes_outstanding_changes(lesson_file):
+    data = copy.deepcopy(DOCUMENT)
+    saver = DebouncedSaver(lesson_file, data, flush_every=100, flush_interval=3600)
+    sentences(data)[0]['pinyin'] = 'nǐ hǎo'
+    saver.mark_changed(KEY_A, 'pinyin', 'nǐ hǎo')
+    saver.close()
+    assert load(lesson_file) == data
+
+
+def test_patch_log_of_a_killed_run_is_recovered(lesson_file, monkeypatch):
+    monkeypatch.setattr(json_saver.atexit, 'register', lambda func: None)
+    killed = DebouncedSaver(lesson_file, copy.deepcopy(DOCUMENT), flush_every=100, flush_interval=3600)
+    killed.mark_changed(KEY_A, 'pinyin', 'nǐ hǎo')
+    killed.mark_changed(KEY_B, 'pinyin', 'zài jiàn')
+    killed._patch_file.close()  # Killed before any flush
+    with open(patch_log_path(lesson_file), 'a', encoding='utf-8') as f:
+        f.write('{"key": ["lesson.json", 1')
+
+    data = load(lesson_file)
+    saver = DebouncedSaver(lesson_file, data)
+    assert saver.recover() == 2
+    assert [sentence['pinyin'] for sentence in sentences(data)] == ['nǐ hǎo', 'zài jiàn']
+    assert load(lesson_file) == data
+    assert not os.path.exists(patch_log_path(lesson_file))
+    assert saver.recover() == 0
+    saver.close()
+
+
+def test_background_saver_coalesces_writes(lesson_file):
+    saver = BackgroundSaver(lesson_file, flush_delay=0.05)
+    saver.mark_changed(KEY_A, 'pinyin', 'nǐ hǎo')
+    saver.mark_changed(KEY_B, 'pinyin', 'zài jiàn')
+    assert saver.unsaved == 2
+    deadline = time.monotonic() + 5
+    while saver.unsaved and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saver.flushes == 1
+    assert [sentence['pinyin'] for sentence in sentences(load(lesson_file))] == ['nǐ hǎo', 'zài jiàn']
+    assert not os.path.exists(patch_log_path(lesson_file))
+    saver.close()
+
+
+def test_background_saver_stop_writes_what_is_left(lesson_file):
+    saver = BackgroundSaver(lesson_file, flush_delay=3600)
+    saver.mark_changed(KEY_A, 'pinyin', 'nǐ hǎo')
+    saver.stop()
+    deadline = time.monotonic() + 5
+    while not saver.stopped() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saver.stopped()
+    saver.close()
+    assert sentences(load(lesson_file))[0]['pinyin'] == 'nǐ hǎo'
+    with pytest.raises(RuntimeError):
+        saver.mark_changed(KEY_B, 'pinyin', 'zài jiàn')
+
+
+def test_background_saver_keeps_the_patch_log_when_writing_fails(lesson_file, monkeypatch):
+    def fail(path, data):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(json_saver, 'atomic_write_json', fail)
+    saver = BackgroundSaver(lesson_file, flush_delay=0.01)
+    saver.mark_changed(KEY_A, 'pinyin', 'nǐ hǎo')
+    with pytest.raises(OSError):
+        saver.close()
+    assert saver.unsaved == 1
+    assert os.path.exists(patch_log_path(lesson_file))
+    monkeypatch.undo()
+
+    # The next load replays the log into its data and writes it
+    data = load(lesson_file)
+    recovered = BackgroundSaver(lesson_file, flush_delay=0.01)
+    assert recovered.recover(SentenceIndex.from_data(data, lesson_file)) == 1
+    assert sentences(data)[0]['pinyin'] == 'nǐ hǎo'
+    recovered.close()
+    assert sentences(load(lesson_file))[0]['pinyin'] == 'nǐ hǎo'
+    assert not os.path.exists(patch_log_path(lesson_file))
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from lesson_stream import LessonStreamWriter, iter_document, iter_sentence_records, rewrite_lessons
+
+
+def make_document(lessons=3):
+    return {
+        'title': '중국어 패턴',
+        'version': 2,
+        'contents': [{
+            'lesson': number,
+            'content': [{
+                'category': '제안',
+                'subcategories': [{
+                    'subcategory': '기본',
+                    'sentences': [
+                        {'id': 1, 'sentence': '我们走吧', 'pinyin': 'wǒ men zǒu ba', 'score': 1.5},
+                        {'sentence': '一边走一边说话', 'words': {'words': ['一边', '走'], 'pinyin': []}},
+                    ]
+                }]
+            }]
+        } for number in range(1, lessons + 1)],
+        'updated': None
+    }
+
+
+def dumped(document):
+    return json.dumps(document, ensure_ascii=False, indent=4)
+
+
+@pytest.mark.parametrize('document', [make_document(), make_document(0), {'title': 'x'}, {}])
+def test_writer_matches_json_dump(tmp_path, document):
+    path = tmp_path / 'lesson.json'
+    with LessonStreamWriter(str(path)) as writer:
+        for name, value in document.items():
+            if name == 'contents':
+                writer.open_contents()
+                for lesson in value:
+                    writer.write_lesson(lesson)
+            else:
+                writer.write_field(name, value)
+    assert path.read_text(encoding='utf-8') == dumped(document)
+
+
+@pytest.mark.parametrize('chunk_size', [7, 64 * 1024])
+def test_rewrite_round_trip_is_byte_identical(tmp_path, chunk_size):
+    path = tmp_path / 'lesson.json'
+    path.write_text(dumped(make_document()), encoding='utf-8')
+    lessons = [item for kind, item in iter_document(str(path), chunk_size) if kind == 'lesson']
+    assert lessons == make_document()['contents']
+
+    rewrite_lessons(str(path), str(path), lambda lesson: None)
+    assert path.read_text(encoding='utf-8') == dumped(make_document())
+
+
+def test_rewrite_applies_transform(tmp_path):
+    src = tmp_path / 'in.json'
+    dst = tmp_path / 'out.json'
+    src.write_text(dumped(make_document(2)), encoding='utf-8')
+
+    def transform(lesson):
+        lesson['lesson'] += 100
+
+    rewrite_lessons(str(src), str(dst), transform)
+    expected = make_document(2)
+    for lesson in expected['contents']:
+        lesson['lesson'] += 100
+    assert json.loads(dst.read_text(encoding='utf-8')) == expected
+
+
+def test_aborted_writer_leaves_file_untouched(tmp_path):
+    path = tmp_path / 'lesson.json'
+    path.write_text('{"title": "old"}', encoding='utf-8')
+    with pytest.raises(RuntimeError):
+        with LessonStreamWriter(str(path)) as writer:
+            writer.write_field('title', 'new')
+            raise RuntimeError
+    assert path.read_text(encoding='utf-8') == '{"title": "old"}'
+    assert [p.name for p in tmp_path.iterdir()] == ['lesson.json']
+
+
+def test_iter_sentence_records_keys(tmp_path):
+    path = tmp_path / 'lesson.json'
+    path.write_text(dumped(make_document(1)), encoding='utf-8')
+    keys = [key for key, _ in iter_sentence_records(str(path))]
+    assert keys == [('lesson.json', 1, '제안', '기본', 1), ('lesson.json', 1, '제안', '기본', 2)]
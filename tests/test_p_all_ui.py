@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('tkinter')
+
+from p_all_ui import parse_batch_range  # noqa: E402
+
+ENTRIES = [{'lesson': lesson} for lesson in (1, 1, 2, 3, 3, 3, 'review')]
+
+
+def test_parse_batch_range_empty_selects_everything():
+    assert parse_batch_range('', ENTRIES) == list(range(7))
+    assert parse_batch_range('   ', ENTRIES) == list(range(7))
+
+
+def test_parse_batch_range_sentence_numbers_are_one_based():
+    assert parse_batch_range('2-4', ENTRIES) == [1, 2, 3]
+    assert parse_batch_range('1, 6', ENTRIES) == [0, 5]
+    assert parse_batch_range('3 - 3', ENTRIES) == [2]
+
+
+def test_parse_batch_range_open_end_and_overlap():
+    assert parse_batch_range('5-', ENTRIES) == [4, 5, 6]
+    assert parse_batch_range('1-3, 2-4', ENTRIES) == [0, 1, 2, 3]
+    assert parse_batch_range('10-20', ENTRIES) == []
+
+
+def test_parse_batch_range_lessons():
+    assert parse_batch_range('L3', ENTRIES) == [3, 4, 5]
+    assert parse_batch_range('l1-2', ENTRIES) == [0, 1, 2]
+    assert parse_batch_range('L2-', ENTRIES) == [2, 3, 4, 5]  # Non-numeric lessons never match
+
+
+@pytest.mark.parametrize('text', ['abc', '1-2-3', 'L', '1,,2', '-5'])
+def test_parse_batch_range_rejects_garbage(text):
+    with pytest.raises(ValueError):
+        parse_batch_range(text, ENTRIES)
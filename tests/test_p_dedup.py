@@ -0,0 +1,53 @@
+import json
+import sys
+
+import p_dedup
+from p_dedup import group_sentences, load_files, normalize_chinese, normalize_value
+from run_journal import RunJournal
+
+
+def lesson(*sentences):
+    return {'contents': [{'lesson': 1, 'content': [{
+        'category': '인사',
+        'subcategories': [{'subcategory': '기본',
+                           'sentences': [{'sentence': chinese, 'pinyin': pinyin} for chinese, pinyin in sentences]}]
+    }]}]}
+
+
+def write(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def test_normalization():
+    assert normalize_chinese('你好 ！') == normalize_chinese('你好!')
+    assert normalize_value('  Nǐ   hǎo ') == 'Nǐ hǎo'
+    assert normalize_value('Nǐ hǎo') != normalize_value('nǐ hǎo')  # Case can be intentional
+
+
+def test_groups_span_files(tmp_path):
+    write(tmp_path / 'a.json', lesson(('你好！', 'nǐ hǎo'), ('再见', 'zài jiàn')))
+    write(tmp_path / 'b.json', lesson(('你好!', 'nǐ  hǎo'), ('你好', 'ni hao'), ('', '')))
+    write(tmp_path / 'manifest.json', {'files': ['a.json', 'b.json']})
+    files = load_files([str(tmp_path / '*.json')])
+    assert sorted(files) == [str(tmp_path / 'a.json'), str(tmp_path / 'b.json')]
+
+    groups = group_sentences(files, 'pinyin')
+    assert [[entry['chinese'] for _, entry in group] for group in groups] == \
+        [['你好！', '你好!'], ['再见'], ['你好']]
+    assert [path for path, _ in groups[0]] == [str(tmp_path / 'a.json'), str(tmp_path / 'b.json')]
+
+
+def test_each_group_is_verified_once(tmp_path, monkeypatch, capsys):
+    write(tmp_path / 'a.json', lesson(('你好', 'nǐ hǎo'), ('再见', 'zài jiàn')))
+    write(tmp_path / 'b.json', lesson(('你好', 'nǐ hǎo')))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(p_dedup, 'BATCH_SIZE', 1)
+    monkeypatch.setattr(sys, 'argv', ['p_dedup.py', 'a.json', 'b.json', '--backend', 'stub',
+                                      '--stub-latency', '0', '--no-cache'])
+    p_dedup.main()
+    assert '(2 calls made)' in capsys.readouterr().out
+
+    journal = RunJournal()
+    assert len(journal.done) == 3  # Every occurrence, not just the one asked about
+    journal.close()
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import pinyin_precheck
+from pinyin_precheck import (AMBIGUOUS, MATCH, MISMATCH, UNKNOWN, PinyinLexicon, PrecheckStats, normalize_pinyin)
+
+
+@pytest.fixture(autouse=True)
+def longest_match(monkeypatch):
+    # The same segmentation whether jieba is installed or not
+    monkeypatch.setattr(pinyin_precheck, 'jieba', None)
+
+
+@pytest.fixture
+def lexicon():
+    lexicon = PinyinLexicon()
+    for word, pinyin in (('你好', 'nǐ hǎo'), ('我', 'wǒ'), ('是', 'shì'), ('学生', 'xué sheng'),
+                         ('银行', 'yín háng'), ('行', 'xíng'), ('行', 'háng'), ('一', 'yī'), ('个', 'gè'),
+                         ('不', 'bù'), ('去', 'qù'), ('Wi-Fi', '(Wi-Fi_pinyin)')):
+        lexicon.add(word, pinyin)
+    return lexicon
+
+
+def test_normalize_pinyin():
+    assert normalize_pinyin("Nǐ hǎo, wǒ shì xuésheng.") == 'nǐhǎowǒshìxuésheng'
+    assert normalize_pinyin('nv3 lu:') == normalize_pinyin('nü3 lü')
+
+
+def test_matching_pinyin_is_settled_locally(lexicon):
+    assert lexicon.check('你好！我是学生。', 'Nǐ hǎo! Wǒ shì xuésheng.') == MATCH
+    assert lexicon.check('我是学生', 'wo shi xuesheng') == MISMATCH
+    assert lexicon.check('我是老师', 'wǒ shì lǎoshī') == UNKNOWN
+    # Placeholders never enter the lexicon
+    assert 'Wi-Fi' not in lexicon.words
+
+
+def test_polyphones_and_sandhi(lexicon):
+    assert lexicon.check('行', 'xíng') == AMBIGUOUS
+    assert lexicon.check('银行', 'yínháng') == MATCH
+    assert lexicon.check('一个', 'yí gè') == MATCH
+    assert lexicon.check('不去', 'bú qù') == MATCH
+    assert lexicon.check('不去', 'bā qù') == MISMATCH
+
+
+def test_build_excludes_the_checked_files(tmp_path):
+    def write(name, word, pinyin):
+        data = {'contents': [{'lesson': 1, 'content': [{'category': 'a', 'subcategories': [{
+            'subcategory': 'b', 'sentences': [{'sentence': word, 'pinyin': pinyin,
+                                               'words': {'words': [word], 'pinyin': [pinyin]}}]}]}]}]}
+        with open(tmp_path / name, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    write('other.json', '老师', 'lǎo shī')
+    write('checked.json', '学生', 'xué shēng')  # Wrong in the sentence and in its own breakdown
+    lexicon = PinyinLexicon.build([str(tmp_path / '*.json')], exclude=[str(tmp_path / 'checked.json')])
+    assert lexicon.check('老师', 'lǎoshī') == MATCH
+    assert lexicon.check('学生', 'xuéshēng') != MATCH
+
+
+def test_stats_report():
+    stats = PrecheckStats(batch_size=10)
+    for status in (MATCH,) * 11 + (MISMATCH, UNKNOWN):
+        stats.record(status)
+    assert '11/13 sentences confirmed locally' in stats.report()
+    assert '~2 calls avoided' in stats.report()
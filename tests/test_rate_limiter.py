@@ -0,0 +1,125 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import verify_engine
+from rate_limiter import RateScheduler, is_rate_limited, parse_reset_time
+from verifier_backend import HttpBackend, StubBackend
+
+NOW = datetime(2025, 3, 1, 10, 30)
+
+
+def test_parse_reset_time_later_today():
+    assert parse_reset_time("5-hour limit reached ∙ resets 3pm", NOW) == datetime(2025, 3, 1, 15, 0)
+
+
+def test_parse_reset_time_rolls_over_to_tomorrow():
+    assert parse_reset_time("5-hour limit reached ∙ resets 3am", NOW) == datetime(2025, 3, 2, 3, 0)
+    assert parse_reset_time("resets at 10:30", NOW) == datetime(2025, 3, 2, 10, 30)
+
+
+def test_parse_reset_time_noon_and_midnight():
+    assert parse_reset_time("resets 12pm", NOW) == datetime(2025, 3, 1, 12, 0)
+    assert parse_reset_time("resets 12am", NOW) == datetime(2025, 3, 2, 0, 0)
+
+
+def test_parse_reset_time_with_minutes_and_24_hour_clock():
+    assert parse_reset_time("Limit reached, resets at 11:45 PM", NOW) == datetime(2025, 3, 1, 23, 45)
+    assert parse_reset_time("resets 18:05", NOW) == datetime(2025, 3, 1, 18, 5)
+
+
+def test_parse_reset_time_epoch():
+    assert parse_reset_time("Claude AI usage limit reached|1760000000", NOW) == datetime.fromtimestamp(1760000000)
+
+
+def test_parse_reset_time_unknown_or_invalid():
+    assert parse_reset_time("usage limit reached", NOW) is None
+    assert parse_reset_time("resets 25", NOW) is None
+    assert parse_reset_time("resets 10:75", NOW) is None
+
+
+def test_is_rate_limited():
+    assert is_rate_limited("5-hour limit reached ∙ resets 3am")
+    assert is_rate_limited("Claude AI usage limit reached|1760000000")
+    assert not is_rate_limited("")
+    assert not is_rate_limited(None)
+    assert not is_rate_limited("speed limit reached on the highway")
+
+
+def quiet_scheduler(**options):
+    return RateScheduler(backoff_base=0.0, log=lambda message: None, **options)
+
+
+def test_budget_throttles_before_the_limit():
+    scheduler = quiet_scheduler(requests_per_minute=2)
+    assert scheduler.try_acquire('你好') == 0.0
+    assert scheduler.try_acquire('你好') == 0.0
+    assert 0 < scheduler.try_acquire('你好') <= 60
+
+
+def test_transient_failures_are_retried_and_errors_are_not():
+    scheduler = quiet_scheduler(max_retries=2)
+    results = iter([{'output': '', 'retryable': True}, {'output': 'nǐ hǎo', 'retryable': False}])
+    assert scheduler.run('你好', lambda: next(results))['output'] == 'nǐ hǎo'
+    assert scheduler.retries == 1
+
+    calls = []
+    failed = {'output': '', 'error': 'HTTP backend error 401', 'retryable': False}
+    assert scheduler.run('你好', lambda: calls.append(1) or failed) is failed
+    assert len(calls) == 1
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    status = 401
+    calls = 0
+
+    def do_POST(self):
+        type(self).calls += 1
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps({'error': 'invalid x-api-key'}).encode('utf-8')
+        self.send_response(self.status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def status_server():
+    server = HTTPServer(('127.0.0.1', 0), StatusHandler)
+    StatusHandler.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_rejected_http_request_is_not_retried(status_server):
+    backend = HttpBackend(status_server, api='anthropic', api_key='bad')
+    previous = verify_engine.get_backend()
+    verify_engine.set_backend(backend)
+    try:
+        result = verify_engine.timed_call('你好', timeout=5, scheduler=quiet_scheduler())
+    finally:
+        verify_engine.set_backend(previous)
+        backend.close()
+    assert '401' in result['error']
+    assert StatusHandler.calls == 1
+
+
+def test_no_scheduler_for_offline_backends():
+    previous = verify_engine.get_backend()
+    try:
+        verify_engine.set_backend(StubBackend())
+        assert verify_engine.make_scheduler() is None
+        verify_engine.set_backend(HttpBackend('http://127.0.0.1:8765/', api='stub'))
+        assert verify_engine.make_scheduler() is None
+        verify_engine.set_backend(HttpBackend('https://api.anthropic.com/v1/messages', api='anthropic'))
+        assert isinstance(verify_engine.make_scheduler(log=print), RateScheduler)
+    finally:
+        verify_engine.set_backend(previous)
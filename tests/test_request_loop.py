@@ -0,0 +1,141 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+import verify_engine
+from request_loop import RequestLoop
+from verify_cache import ResponseCache
+
+
+class AsyncBackend:
+    """Answers 'echo <prompt>' after delay seconds, counting calls in flight"""
+
+    name = 'async test'
+    offline = True
+
+    def __init__(self, delay=0.0, output=None):
+        self.delay = delay
+        self.output = output
+        self.calls = []
+        self.cancelled = []
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    async def send_async(self, prompt, timeout=None):
+        with self._lock:
+            self.calls.append(prompt)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(prompt)
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+        return (self.output or f"echo {prompt}"), '', 0
+
+    def send(self, prompt, timeout=None):
+        raise AssertionError("the request loop must use send_async")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def backend_factory():
+    previous = verify_engine.get_backend()
+
+    def install(**options):
+        backend = AsyncBackend(**options)
+        verify_engine.set_backend(backend)
+        return backend
+
+    yield install
+    verify_engine.set_backend(previous)
+
+
+@pytest.fixture
+def results():
+    return queue.Queue()
+
+
+def collect(results, key):
+    return lambda result: results.put((key, result))
+
+
+def test_results_are_delivered_per_key(backend_factory, results):
+    backend = backend_factory(delay=0.05)
+    requests = RequestLoop()
+    try:
+        assert requests.submit('a', 'first', collect(results, 'a'))
+        assert not requests.submit('a', 'again', collect(results, 'a'))  # One request per key
+        assert requests.submit('b', 'second', collect(results, 'b'))
+        delivered = dict(results.get(timeout=5) for _ in range(2))
+    finally:
+        requests.close()
+    assert delivered['a']['output'] == 'echo first'
+    assert delivered['b']['output'] == 'echo second'
+    assert not delivered['a']['from_cache']
+    assert sorted(backend.calls) == ['first', 'second']
+    assert requests.keys() == []
+
+
+def test_cancelled_requests_never_call_back(backend_factory, results):
+    backend = backend_factory(delay=5)
+    requests = RequestLoop()
+    try:
+        requests.submit(('old.json', 1), 'slow', collect(results, 'old'))
+        requests.submit(('new.json', 1), 'slow too', collect(results, 'new'))
+        while len(backend.calls) < 2:
+            time.sleep(0.01)
+        assert requests.cancel_where(lambda key: key[0] == 'old.json') == 1
+        assert requests.keys() == [('new.json', 1)]
+    finally:
+        requests.close()
+    assert results.empty()
+    assert sorted(backend.cancelled) == ['slow', 'slow too']
+
+
+def test_concurrency_is_capped(backend_factory, results):
+    backend = backend_factory(delay=0.02)
+    requests = RequestLoop(max_concurrent=2)
+    try:
+        for number in range(6):
+            requests.submit(number, f"prompt {number}", collect(results, number))
+        for _ in range(6):
+            results.get(timeout=5)
+    finally:
+        requests.close()
+    assert backend.peak == 2
+
+
+def test_cached_answers_skip_the_backend(backend_factory, results, tmp_path):
+    backend = backend_factory()
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    cache.put('cache key', 'pinyin', 'nǐ hǎo')
+    requests = RequestLoop(cache=cache)
+    try:
+        requests.submit('a', 'prompt', collect(results, 'a'), cache_key='cache key')
+        _, result = results.get(timeout=5)
+    finally:
+        requests.close()
+        cache.close()
+    assert result['output'] == 'nǐ hǎo' and result['from_cache']
+    assert backend.calls == []
+
+
+def test_usage_limit_is_an_error_not_an_answer(backend_factory, results):
+    backend_factory(output='5-hour limit reached ∙ resets 3am')
+    requests = RequestLoop()
+    try:
+        requests.submit('a', 'prompt', collect(results, 'a'))
+        _, result = results.get(timeout=5)
+    finally:
+        requests.close()
+    assert result['output'] is None
+    assert result['error'].startswith('Usage limit reached')
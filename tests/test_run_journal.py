@@ -0,0 +1,59 @@
+from run_journal import RunJournal
+
+KEY_A = ('lesson1.json', 1, 'dialogue', 0, 0)
+KEY_B = ('lesson1.json', 1, 'dialogue', 0, 1)
+KEY_OTHER_FILE = ('lesson2.json', 1, 'dialogue', 0, 0)
+
+
+def test_resumes_from_the_journal(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record('pinyin', KEY_A, 'updated')
+    journal.record('pinyin', KEY_B, 'extract_failed')
+    journal.record('korean', KEY_B, 'unchanged')
+    journal.close()
+
+    resumed = RunJournal(path)
+    assert resumed.is_done('pinyin', list(KEY_A))
+    assert not resumed.is_done('pinyin', KEY_B)  # Failed outcomes are retried
+    assert resumed.is_done('korean', KEY_B)
+    assert not resumed.is_done('korean', KEY_A)
+    resumed.close()
+
+
+def test_reset_forgets_one_field_of_one_file(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    for key in (KEY_A, KEY_OTHER_FILE):
+        journal.record('pinyin', key, 'updated')
+        journal.record('korean', key, 'updated')
+    journal.reset('pinyin', 'public/data/integrated/lesson1.json')
+    assert not journal.is_done('pinyin', KEY_A)
+    assert journal.is_done('korean', KEY_A)
+    assert journal.is_done('pinyin', KEY_OTHER_FILE)
+    # Verified again after the reset
+    journal.record('pinyin', KEY_B, 'updated')
+    journal.close()
+
+    resumed = RunJournal(path)
+    assert not resumed.is_done('pinyin', KEY_A)
+    assert resumed.is_done('pinyin', KEY_B)
+    assert resumed.is_done('pinyin', KEY_OTHER_FILE)
+    resumed.close()
+
+
+def test_partial_last_line_is_ignored(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = RunJournal(str(path))
+    journal.record('pinyin', KEY_A, 'updated')
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"field": "pinyin", "key": ["lesson1.js')
+
+    resumed = RunJournal(str(path))
+    assert resumed.is_done('pinyin', KEY_A)
+    assert len(resumed.done) == 1
+    resumed.record('pinyin', KEY_B, 'updated')
+    resumed.close()
+
+    assert RunJournal(str(path)).done == {('pinyin', KEY_A), ('pinyin', KEY_B)}
@@ -0,0 +1,79 @@
+import copy
+import json
+
+from sentence_index import SentenceIndex
+
+DOCUMENT = {
+    'contents': [{
+        'lesson': 1,
+        'content': [{
+            'category': '인사',
+            'subcategories': [{
+                'subcategory': '기본',
+                'sentences': [
+                    {'id': 'a', 'sentence': '你好'},
+                    {'id': 'b', 'sentence': '再见'},
+                    {'id': 'c', 'sentence': '谢谢'},
+                ]
+            }]
+        }]
+    }, {
+        'lesson': 2,
+        'content': [{
+            'category': '제안',
+            'subcategories': [{'subcategory': '기본', 'sentences': [{'sentence': '我们走吧'}]}]
+        }]
+    }]
+}
+
+
+def keys_by_sentence(index):
+    return {entry['chinese']: entry['key'] for entry in index}
+
+
+def test_keys_use_ids_and_ignore_directory():
+    index = SentenceIndex.from_data(copy.deepcopy(DOCUMENT), 'public/data/integrated/lesson.json')
+    assert index[0]['key'] == ('lesson.json', 1, '인사', '기본', 'a')
+    # Without an id the 1-based position is the last part of the key
+    assert index[3]['key'] == ('lesson.json', 2, '제안', '기본', 1)
+    assert keys_by_sentence(index) == keys_by_sentence(SentenceIndex.from_data(copy.deepcopy(DOCUMENT),
+                                                                               'lesson.json'))
+
+
+def test_keys_survive_reordering():
+    reordered = copy.deepcopy(DOCUMENT)
+    reordered['contents'][0]['content'][0]['subcategories'][0]['sentences'].reverse()
+    reordered['contents'].reverse()
+    assert keys_by_sentence(SentenceIndex.from_data(reordered, 'lesson.json')) == \
+        keys_by_sentence(SentenceIndex.from_data(copy.deepcopy(DOCUMENT), 'lesson.json'))
+
+
+def test_lookups_find_the_sentence_objects():
+    data = copy.deepcopy(DOCUMENT)
+    index = SentenceIndex.from_data(data, 'lesson.json')
+    entry = index.get(['lesson.json', 1, '인사', '기본', 'b'])  # Keys read back from JSON are lists
+    assert entry['sentence_obj'] is data['contents'][0]['content'][0]['subcategories'][0]['sentences'][1]
+    assert [e['key'][-1] for e in index.lesson(1)] == ['a', 'b', 'c']
+    assert index.find_chinese('我们走吧')[0]['lesson'] == 2
+    assert index.find_chinese('没有') == []
+
+
+def test_cached_index_has_the_same_keys(tmp_path):
+    path = tmp_path / 'lesson.json'
+    path.write_text(json.dumps(DOCUMENT, ensure_ascii=False), encoding='utf-8')
+    cache_dir = str(tmp_path / 'cache')
+    fresh = SentenceIndex.open(str(path), cache_dir=cache_dir)
+    cached = SentenceIndex.open(str(path), cache_dir=cache_dir)
+    assert 'sentence_obj' not in cached[0]  # Served from the cache, document not loaded
+    assert [e['key'] for e in cached] == [e['key'] for e in fresh]
+    assert cached.sentence(cached[1])['sentence'] == '再见'
+
+
+def test_resaved_file_keeps_keys(tmp_path):
+    path = tmp_path / 'lesson.json'
+    path.write_text(json.dumps(DOCUMENT, ensure_ascii=False), encoding='utf-8')
+    before = keys_by_sentence(SentenceIndex.open(str(path), use_cache=False))
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data['contents'][0]['content'][0]['subcategories'][0]['sentences'][0]['pinyin'] = 'nǐ hǎo'
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding='utf-8')
+    assert keys_by_sentence(SentenceIndex.open(str(path), use_cache=False)) == before
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from verifier_backend import BackendError
+from verifier_pool import ProcessPoolBackend, stub_worker_command
+
+
+def make_pool(latency, **options):
+    return ProcessPoolBackend(stub_worker_command(latency), protocol='jsonl', offline=True, **options)
+
+
+def test_workers_are_reused_and_closed():
+    pool = make_pool(0, size=1)
+    for _ in range(3):
+        output, _, returncode = pool.send('verify this')
+        assert returncode == 0 and output
+    assert pool.spawns == 1
+    worker = pool._idle.queue[0]
+    pool.close()
+    assert worker.proc.poll() is not None
+    assert not pool._workers
+
+
+def test_close_kills_checked_out_workers():
+    pool = make_pool(30, size=2)
+    errors = []
+
+    def call():
+        try:
+            pool.send('slow prompt', timeout=60)
+        except BackendError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not pool._workers and time.monotonic() < deadline:
+        time.sleep(0.05)
+    busy = next(iter(pool._workers))
+    while busy.requests == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    started = time.monotonic()
+    pool.close()
+    assert busy.proc.poll() is not None
+    assert time.monotonic() - started < 10
+    thread.join(10)
+    assert not thread.is_alive()
+    assert errors
+    # A worker handed back after close never returns to the pool
+    assert pool._idle.empty() and not pool._workers
+
+
+def test_close_without_workers():
+    pool = make_pool(0)
+    pool.close()
+    assert pool.spawns == 0
+
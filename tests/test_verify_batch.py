@@ -0,0 +1,33 @@
+from verify_batch import build_batch_prompt, chunk_tasks, parse_batch_response, split_template
+
+
+def test_parse_batch_response_accepts_numbering_styles():
+    output = "1: wǒ men\n2. nǐ hǎo\n[3] zǒu ba\n(4) xiè xie"
+    assert parse_batch_response(output, 4) == {1: 'wǒ men', 2: 'nǐ hǎo', 3: 'zǒu ba', 4: 'xiè xie'}
+
+
+def test_parse_batch_response_skips_noise_and_out_of_range_ids():
+    output = "Here are the answers:\n\n1: a\n7: not asked\n0: nor this\n3: c"
+    assert parse_batch_response(output, 3) == {1: 'a', 3: 'c'}
+
+
+def test_parse_batch_response_keeps_first_answer_per_id():
+    assert parse_batch_response("1: first\n1: second", 1) == {1: 'first'}
+
+
+def test_parse_batch_response_strips_whitespace():
+    assert parse_batch_response("  2 :   padded answer   \r", 2) == {2: 'padded answer'}
+
+
+def test_chunk_tasks():
+    assert chunk_tasks(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    assert chunk_tasks([1, 2], 0) == [[1], [2]]
+
+
+def test_split_template_and_batch_prompt():
+    template = 'Chinese: {chinese_sentence} / Task: Verify the pinyin.'
+    assert split_template(template) == ('Chinese: {chinese_sentence}', 'Verify the pinyin.')
+    prompt = build_batch_prompt(template, [{'sentence': '你好'}, {'sentence': '再见'}])
+    lines = prompt.split('\n')
+    assert lines[0].startswith('Task: Verify the pinyin.')
+    assert lines[1:] == ['1: Chinese: 你好', '2: Chinese: 再见']
@@ -0,0 +1,61 @@
+import time
+
+from verify_cache import ResponseCache, make_cache_key
+
+LIMIT_MESSAGE = '5-hour limit reached ∙ resets 3am'
+
+
+def test_key_covers_everything_that_shapes_the_answer():
+    key = make_cache_key('pinyin', 'template', '你好', 'nǐ hǎo')
+    assert key == make_cache_key('pinyin', 'template', '你好', 'nǐ hǎo')
+    assert key != make_cache_key('pinyin', 'template', '你好', 'ni hao')
+    assert key != make_cache_key('pinyin', 'other template', '你好', 'nǐ hǎo')
+    assert key != make_cache_key('korean', 'template', '你好', 'nǐ hǎo')
+
+
+def test_get_and_put(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    assert cache.get('a') is None
+    cache.put('a', 'pinyin', 'nǐ hǎo')
+    assert cache.get('a') == 'nǐ hǎo'
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    reopened = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    assert reopened.get('a') == 'nǐ hǎo'
+    reopened.close()
+
+
+def test_rate_limit_messages_are_never_answers(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    cache.put('a', 'pinyin', LIMIT_MESSAGE)
+    cache.put('b', 'pinyin', '')
+    assert cache.get('a') is None and cache.get('b') is None
+    # Stored by an older version: dropped on read
+    cache._conn.execute("INSERT INTO responses VALUES ('c', 'pinyin', ?, 10, 0)", (LIMIT_MESSAGE,))
+    assert cache.get('c') is None
+    assert cache._conn.execute("SELECT COUNT(*) FROM responses WHERE key = 'c'").fetchone()[0] == 0
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_bytes=100)
+    for key in 'abc':
+        cache.put(key, 'english', 'x' * 29)  # 30 bytes each
+        time.sleep(0.01)
+    assert cache.get('a') is not None  # 'b' is now the oldest
+    time.sleep(0.01)
+    cache.put('d', 'english', 'x' * 29)
+    assert cache.evicted >= 1
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('d') is not None
+    assert cache._total_bytes <= 100
+    cache.close()
+
+
+def test_disabled_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), enabled=False)
+    cache.put('a', 'pinyin', 'nǐ hǎo')
+    assert cache.get('a') is None
+    assert 'disabled' in cache.report()
+    assert not (tmp_path / 'cache.sqlite').exists()
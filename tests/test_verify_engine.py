@@ -0,0 +1,65 @@
+import random
+import threading
+import time
+
+from verify_engine import ThroughputStats, run_concurrent
+
+
+def test_results_come_back_in_task_order():
+    def worker(task):
+        time.sleep(random.uniform(0, 0.01))
+        return task * 2
+
+    pairs = list(run_concurrent(range(20), worker, max_workers=4))
+    assert pairs == [(task, task * 2) for task in range(20)]
+
+
+def test_calls_in_flight_are_bounded():
+    lock = threading.Lock()
+    running = peak = 0
+
+    def worker(task):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return task
+
+    list(run_concurrent(range(16), worker, max_workers=3))
+    assert 1 < peak <= 3
+
+
+def test_closing_early_cancels_pending_calls():
+    started = []
+
+    def worker(task):
+        started.append(task)
+        time.sleep(0.01)
+        return task
+
+    results = run_concurrent(range(100), worker, max_workers=2)
+    assert next(results) == (0, 0)
+    results.close()
+    # Only the look-ahead window was ever submitted
+    assert len(started) <= 2 * 2 + 1
+
+
+def test_throughput_stats():
+    stats = ThroughputStats()
+    stats.record_result({'output': 'ok', 'latency': 1.0})
+    stats.record_result({'calls': [2.0, 3.0], 'items': [{}, {}, {}]})
+    stats.record_result(None)
+    assert stats.sentences == 4
+    assert stats.percentile(50) == 2.0
+    assert stats.percentile(95) == 3.0
+    assert ThroughputStats().percentile(50) == 0.0
+    assert '4 sentences / 3 calls' in stats.report()
+
+
+def test_stats_collected_while_running():
+    stats = ThroughputStats()
+    list(run_concurrent(range(5), lambda task: {'latency': 0.5}, max_workers=2, stats=stats))
+    assert stats.sentences == 5 and stats.latencies == [0.5] * 5
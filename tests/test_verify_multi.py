@@ -0,0 +1,89 @@
+import pytest
+
+import verify_engine
+from response_extract import extract_clean_response
+from verify_cache import ResponseCache
+from verify_multi import build_multi_prompt, cached_value, make_multi_worker, parse_multi_response
+
+SENTENCE = {'sentence': '我能帮你吗', 'pinyin': 'wǒ néng bāng nǐ ma', 'english': 'Can I help you?'}
+TEMPLATES = {
+    'pinyin': 'Chinese: {chinese_sentence} / Current pinyin: {current_pinyin} / Task: Verify the pinyin.',
+    'english': 'Chinese: {chinese_sentence} / Current English: {current_english} / Task: Verify the English.',
+}
+
+
+class ScriptedBackend:
+    """Answers every prompt with the next scripted reply and records the prompts"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def send(self, prompt, timeout=None):
+        self.prompts.append(prompt)
+        return self.replies.pop(0), '', 0
+
+
+@pytest.fixture
+def backend():
+    previous = verify_engine.get_backend()
+    yield lambda *replies: verify_engine.set_backend(ScriptedBackend(*replies)) or verify_engine.get_backend()
+    verify_engine.set_backend(previous)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / 'cache.sqlite'))
+    yield cache
+    cache.close()
+
+
+def make_task():
+    return {'sentence': dict(SENTENCE), 'context': verify_engine.build_prompt_context(SENTENCE)}
+
+
+def test_build_multi_prompt_lists_every_field():
+    lines = build_multi_prompt(SENTENCE, ['pinyin', 'english']).split('\n')
+    assert lines[0].startswith('Chinese: 我能帮你吗 / Task:')
+    assert lines[1:] == ['pinyin: wǒ néng bāng nǐ ma', 'english: Can I help you?']
+
+
+def test_parse_multi_response_json_and_lines():
+    output = 'Sure:\n```json\n{"pinyin": "wǒ néng bāng nǐ ma", "english": "**Can I help you?**"}\n```'
+    assert parse_multi_response(output, ['pinyin', 'english']) == \
+        {'pinyin': 'wǒ néng bāng nǐ ma', 'english': 'Can I help you?'}
+    assert parse_multi_response('pinyin: "wǒ néng bāng nǐ ma",\nenglish: 1', ['pinyin', 'english']) == \
+        {'pinyin': 'wǒ néng bāng nǐ ma'}
+
+
+def test_parse_multi_response_drops_invalid_values():
+    assert parse_multi_response('{"pinyin": "我能", "english": ""}', ['pinyin', 'english']) == {}
+
+
+def test_cached_value_takes_the_answer_line_without_rejudging():
+    assert cached_value('english', 'Can I help you?') == 'Can I help you?'
+    assert cached_value('english', 'Answer: **Can I help you?**\nextra') == 'Can I help you?'
+    assert cached_value('pinyin', 'not pinyin!') == ''
+
+
+def test_worker_falls_back_to_single_calls(backend, cache):
+    # The combined reply only validates pinyin; english falls back to its own prompt
+    scripted = backend('{"pinyin": "wǒ néng bāng nǐ ma", "english": "I would verify"}', 'May I assist you?')
+    worker = make_multi_worker(('pinyin', 'english'), TEMPLATES, extract_clean_response, cache=cache)
+    item = worker(make_task())['items'][0]
+    assert item['values'] == {'pinyin': 'wǒ néng bāng nǐ ma', 'english': 'May I assist you?'}
+    assert item['via'] == {'pinyin': 'multi', 'english': 'single'}
+    assert len(scripted.prompts) == 2
+
+
+def test_worker_reuses_its_cached_answers(backend, cache):
+    backend('{"pinyin": "wǒ néng bāng nǐ ma", "english": "Can I help you?"}')
+    worker = make_multi_worker(('pinyin', 'english'), TEMPLATES, extract_clean_response, cache=cache)
+    assert worker(make_task())['items'][0]['via'] == {'pinyin': 'multi', 'english': 'multi'}
+
+    # 'help' is on extract_clean_response's blacklist, but the cached answer was validated once already
+    scripted = backend()
+    item = worker(make_task())['items'][0]
+    assert item['via'] == {'pinyin': 'cache', 'english': 'cache'}
+    assert item['values']['english'] == 'Can I help you?'
+    assert scripted.prompts == []
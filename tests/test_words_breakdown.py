@@ -0,0 +1,74 @@
+import json
+
+from words_breakdown import MISALIGNED, MISSING, TEXT, breakdown_layout, check_breakdown, process_file, \
+    rebuild_breakdown
+
+
+def lesson(number, *sentences):
+    return {'lesson': number, 'content': [{'category': '', 'subcategories': [{'sentences': list(sentences)}]}]}
+
+
+def write(tmp_path, *lessons):
+    path = tmp_path / 'lesson.json'
+    path.write_text(json.dumps({'contents': list(lessons)}, ensure_ascii=False, indent=4), encoding='utf-8')
+    return str(path)
+
+
+def sentences_of(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [sentence for content in data['contents'] for block in content['content']
+            for subcategory in block['subcategories'] for sentence in subcategory['sentences']]
+
+
+ALIGNED = {'sentence': '我们走吧', 'words': {'words': ['我们', '走', '吧'], 'pinyin': ['wǒ men', 'zǒu', 'ba'],
+                                           'korean': ['우리', '가다', '하자'], 'traditional': ['我們', '走', '吧'],
+                                           'meaning_and_reading': ['', '', '']}}
+OBJECTS = {'sentence': '我们走吧', 'words': [{'chinese': '我们'}, {'chinese': '走'}, {'chinese': '吧'}]}
+
+
+def test_check_breakdown():
+    assert check_breakdown(ALIGNED) == []
+    assert check_breakdown({'sentence': '我们走吧'}) == [(MISSING, '')]
+    misaligned = {'sentence': '我们走吧', 'words': {'words': ['我们', '走', '吧'], 'pinyin': ['wǒ men']}}
+    assert [issue for issue, _ in check_breakdown(misaligned)] == [MISALIGNED]
+    wrong_text = {'sentence': '我们走吧', 'words': {'words': ['我们', '走']}}
+    assert TEXT in [issue for issue, _ in check_breakdown(wrong_text)]
+
+
+def test_breakdown_layout():
+    assert breakdown_layout([{'sentence': '你好'}, ALIGNED]) == 'arrays'
+    assert breakdown_layout([{'sentence': '你好'}, OBJECTS]) == 'objects'
+    assert breakdown_layout([{'sentence': '你好'}]) is None
+
+
+def test_rebuild_keeps_aligned_values_and_tolerates_missing_columns():
+    rebuilt = rebuild_breakdown({'sentence': '我们走吧', 'words': {'words': ['我们', '走', '吧'],
+                                                              'korean': ['우리', '가다', '하자']}})
+    assert rebuilt['words'] == ['我们', '走', '吧']
+    assert rebuilt['korean'] == ['우리', '가다', '하자']
+    assert len({len(rebuilt[column]) for column in rebuilt}) == 1
+
+
+def test_missing_breakdown_before_an_objects_lesson_is_not_rebuilt(tmp_path):
+    path = write(tmp_path, lesson(1, {'sentence': '你好'}), lesson(2, dict(OBJECTS)))
+    result = process_file(path, fix=True)
+    assert result['fixed'] == 0 and result['remaining'] == 1
+    assert 'words' not in sentences_of(path)[0]
+
+
+def test_missing_breakdown_before_an_arrays_lesson_gets_arrays(tmp_path):
+    path = write(tmp_path, lesson(1, {'sentence': '我们走吧'}), lesson(2, json.loads(json.dumps(ALIGNED))))
+    result = process_file(path, fix=True)
+    assert result['fixed'] == 1 and result['remaining'] == 0
+    assert sentences_of(path)[0]['words']['words'] == ['我们', '走', '吧']
+
+
+def test_check_only_leaves_the_file_alone(tmp_path):
+    path = write(tmp_path, lesson(1, {'sentence': '我们走吧'}))
+    with open(path, 'rb') as f:
+        before = f.read()
+    result = process_file(path)
+    assert [offender['issue'] for offender in result['offenders']] == [MISSING]
+    with open(path, 'rb') as f:
+        assert f.read() == before
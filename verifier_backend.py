@@ -0,0 +1,336 @@
+"""
+Pluggable verifier backends
+
+Every verifier call goes through a backend with a single method,
+send(prompt, timeout) -> (output, stderr, returncode):
+
+- SubprocessBackend: the Claude CLI ('claude.cmd' on Windows), one process per call
+- ProcessPoolBackend (verifier_pool.py): warm, recycled worker processes
+- HttpBackend: persistent keep-alive HTTP connections, either to the local
+  stub server or to the Anthropic Messages API
+- StubBackend: deterministic canned answers with configurable latency, for
+  benchmarking and testing the pipeline on machines without Claude
+
+Backends raise BackendTimeout when a call times out and BackendError when
+the backend cannot be used at all or rejected the request (HTTP 4xx other
+than 429), which is not worth retrying. Offline backends (offline = True:
+the stub, the stub server, pooled stub workers) have no usage limits, so
+the verifiers don't throttle them (verify_engine.make_scheduler). SubprocessBackend and StubBackend also
+have send_async(prompt, timeout), a coroutine with the same result for
+asyncio callers (verify_engine.call_claude_async); cancelling it kills the
+CLI process.
+"""
+
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import re
+import signal
+import subprocess
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_COMMAND = ['claude.cmd']
+DEFAULT_STUB_LATENCY = 0.5  # 스텁 응답 지연(초)
+ANTHROPIC_API_URL = 'https://api.anthropic.com/v1/messages'
+ANTHROPIC_MODEL = 'claude-sonnet-4-5'
+
+
+class BackendTimeout(Exception):
+    """The backend did not answer within the timeout"""
+
+
+class BackendError(Exception):
+    """The backend is unavailable (missing CLI, bad URL, ...)"""
+
+
+class SubprocessBackend:
+    """Claude CLI fed through stdin, one process per prompt"""
+
+    name = 'cli'
+    offline = False
+
+    def __init__(self, command=None):
+        self.command = command or DEFAULT_COMMAND
+
+    def send(self, prompt, timeout=None):
+        try:
+            result = subprocess.run(self.command,
+                                    input=prompt,
+                                    capture_output=True, text=True,
+                                    encoding='utf-8', errors='ignore',
+                                    timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            raise BackendTimeout('Request timed out') from e
+        except (FileNotFoundError, UnicodeDecodeError) as e:
+            raise BackendError(str(e)) from e
+        return (result.stdout or '').strip(), result.stderr, result.returncode
+
+    async def _kill_tree(self, process):
+        """Kill the CLI and what it started ('claude.cmd' runs node under cmd.exe), so its pipes close"""
+        try:
+            if os.name == 'nt':
+                killer = await asyncio.create_subprocess_exec('taskkill', '/F', '/T', '/PID', str(process.pid),
+                                                              stdout=asyncio.subprocess.DEVNULL,
+                                                              stderr=asyncio.subprocess.DEVNULL)
+                await killer.wait()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass  # Already gone, or taskkill is missing
+        if process.returncode is None:
+            process.kill()
+
+    async def send_async(self, prompt, timeout=None):
+        try:
+            # Own process group, so a timeout can kill everything the CLI started
+            process = await asyncio.create_subprocess_exec(*self.command, stdin=asyncio.subprocess.PIPE,
+                                                           stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.PIPE,
+                                                           start_new_session=os.name != 'nt')
+        except FileNotFoundError as e:
+            raise BackendError(str(e)) from e
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(prompt.encode('utf-8')), timeout)
+        except asyncio.TimeoutError as e:
+            raise BackendTimeout('Request timed out') from e
+        finally:
+            # Timed out or cancelled: don't leave the CLI running, and reap it
+            if process.returncode is None:
+                await self._kill_tree(process)
+                await process.wait()
+        return (stdout.decode('utf-8', errors='ignore').strip(), stderr.decode('utf-8', errors='ignore'),
+                process.returncode)
+
+    def close(self):
+        pass
+
+
+class HttpBackend:
+    """
+    Keep-alive HTTP client with a small connection pool.
+
+    api='stub' speaks the stub server protocol (POST {"prompt"} -> {"output"});
+    api='anthropic' calls the Messages API with ANTHROPIC_API_KEY.
+    """
+
+    name = 'http'
+
+    def __init__(self, url, api='stub', pool_size=8, model=ANTHROPIC_MODEL, api_key=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise BackendError(f"Invalid backend URL: {url}")
+        self.url = url
+        self.api = api
+        self.offline = api == 'stub'  # The local stub server
+        self.model = model
+        self.api_key = api_key or os.environ.get('ANTHROPIC_API_KEY', '')
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path or '/'
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self.connections_opened = 0
+
+    def _connect(self, timeout):
+        conn_class = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+        self.connections_opened += 1
+        return conn_class(self._host, self._port, timeout=timeout)
+
+    def _request_body(self, prompt):
+        if self.api == 'anthropic':
+            headers = {'content-type': 'application/json', 'x-api-key': self.api_key,
+                       'anthropic-version': '2023-06-01'}
+            body = {'model': self.model, 'max_tokens': 1024,
+                    'messages': [{'role': 'user', 'content': prompt}]}
+        else:
+            headers = {'content-type': 'application/json'}
+            body = {'prompt': prompt}
+        return headers, json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+    def _parse(self, payload):
+        if self.api == 'anthropic':
+            return ''.join(block.get('text', '') for block in payload.get('content', ())
+                           if block.get('type') == 'text')
+        return payload.get('output', '')
+
+    def _exchange(self, conn, headers, body):
+        try:
+            conn.request('POST', self._path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response, response.read()
+        except BaseException:
+            conn.close()
+            raise
+
+    def send(self, prompt, timeout=None):
+        headers, body = self._request_body(prompt)
+        try:
+            conn = self._pool.get_nowait()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            reused = True
+        except queue.Empty:
+            conn = self._connect(timeout)
+            reused = False
+        try:
+            try:
+                response, raw = self._exchange(conn, headers, body)
+            except TimeoutError:
+                raise
+            except (OSError, http.client.HTTPException):
+                if not reused:
+                    raise
+                # The server closed the idle keep-alive connection; retry once on a fresh one
+                conn = self._connect(timeout)
+                response, raw = self._exchange(conn, headers, body)
+        except TimeoutError as e:
+            raise BackendTimeout('Request timed out') from e
+        except (OSError, http.client.HTTPException) as e:
+            raise BackendError(f"HTTP backend error: {e}") from e
+
+        try:
+            self._pool.put_nowait(conn)  # Keep the connection alive for the next call
+        except queue.Full:
+            conn.close()
+
+        text = raw.decode('utf-8', errors='ignore')
+        if 400 <= response.status < 500 and response.status != 429:
+            # Bad request, key or URL: the same request will fail again
+            raise BackendError(f"HTTP backend error {response.status}: {text.strip()[:200]}")
+        if response.status != 200:
+            return '', text, response.status
+        try:
+            return self._parse(json.loads(text)).strip(), '', 0
+        except json.JSONDecodeError:
+            return '', text, response.status
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# "Current pinyin: wǒ men / Task" -> "wǒ men"; "Chinese: 我们 / Task" -> "我们"
+CURRENT_VALUE_PATTERN = re.compile(r'Current [^:]+: (.*?)(?: / Task|$)')
+CHINESE_PATTERN = re.compile(r'Chinese: (.*?)(?: / |$)')
+BATCH_ITEM_PATTERN = re.compile(r'^(\d+): (.*)$')
+MULTI_FIELD_PATTERN = re.compile(r'^([a-z_]+): (.*)$')
+
+
+def stub_answer(prompt):
+    """Deterministic answer: the current value (or the Chinese sentence) echoed back, per batch item or field"""
+    def answer_line(text):
+        match = CURRENT_VALUE_PATTERN.search(text) or CHINESE_PATTERN.search(text)
+        return match.group(1) if match else 'OK'
+
+    if 'JSON object' in prompt:
+        # Multi-field prompt (verify_multi.py): echo every "field: value" line back as JSON
+        fields = dict(match.groups() for match in map(MULTI_FIELD_PATTERN.match, prompt.split('\n')[1:]) if match)
+        return json.dumps(fields, ensure_ascii=False)
+
+    items = []
+    for line in prompt.split('\n'):
+        match = BATCH_ITEM_PATTERN.match(line)
+        if match:
+            items.append(f"{match.group(1)}: {answer_line(match.group(2))}")
+    return '\n'.join(items) if items else answer_line(prompt)
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+class StubBackend:
+    """
+    Offline backend: replays recorded answers (JSONL of {"prompt" or "hash", "output"})
+    and otherwise echoes the current value, after a configurable latency.
+    """
+
+    name = 'stub'
+    offline = True
+
+    def __init__(self, answers_file=None, latency=DEFAULT_STUB_LATENCY, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self.answers = {}
+        if answers_file:
+            with open(answers_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        key = entry.get('hash') or prompt_hash(entry['prompt'])
+                        self.answers[key] = entry['output']
+
+    def _delay(self):
+        return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _answer(self, prompt):
+        output = self.answers.get(prompt_hash(prompt))
+        if output is None:
+            output = stub_answer(prompt)
+        return output, '', 0
+
+    def send(self, prompt, timeout=None):
+        delay = self._delay()
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise BackendTimeout('Request timed out')
+        time.sleep(delay)
+        return self._answer(prompt)
+
+    async def send_async(self, prompt, timeout=None):
+        delay = self._delay()
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise BackendTimeout('Request timed out')
+        await asyncio.sleep(delay)
+        return self._answer(prompt)
+
+    def close(self):
+        pass
+
+
+def add_backend_arguments(parser):
+    """Add --backend and its options to an argparse parser"""
+    parser.add_argument('--backend', choices=('cli', 'pool', 'http', 'anthropic', 'stub'), default='cli',
+                        help="verifier backend: Claude CLI per call (default), warm pool of CLI sessions, "
+                             "HTTP stub server, Anthropic API, or offline stub")
+    parser.add_argument('--backend-url', default='http://127.0.0.1:8765/',
+                        help="URL for --backend http (default: local stub server)")
+    parser.add_argument('--stub-latency', type=float, default=DEFAULT_STUB_LATENCY,
+                        help=f"seconds per call for --backend stub (default {DEFAULT_STUB_LATENCY})")
+    parser.add_argument('--stub-answers', default=None,
+                        help="JSONL file of recorded answers for --backend stub")
+    parser.add_argument('--pool-worker', choices=('claude', 'stub'), default='claude',
+                        help="processes for --backend pool: Claude CLI stream-json sessions (default) "
+                             "or verifier_worker.py stubs for benchmarking")
+    parser.add_argument('--pool-size', type=int, default=4, help="warm processes for --backend pool (default 4)")
+    parser.add_argument('--pool-max-requests', type=int, default=None,
+                        help="prompts per process before it is recycled (default 10 per Claude session, "
+                             "50 per stub worker; 1 keeps every verification in a fresh session)")
+
+
+def backend_from_args(args):
+    """Build the backend selected by add_backend_arguments options"""
+    if args.backend == 'http':
+        return HttpBackend(args.backend_url)
+    if args.backend == 'anthropic':
+        return HttpBackend(ANTHROPIC_API_URL, api='anthropic')
+    if args.backend == 'pool':
+        from verifier_pool import ProcessPoolBackend, stub_worker_command
+        if args.pool_worker == 'stub':
+            return ProcessPoolBackend(stub_worker_command(args.stub_latency), protocol='jsonl',
+                                      size=args.pool_size, max_requests=args.pool_max_requests, offline=True)
+        return ProcessPoolBackend(size=args.pool_size, max_requests=args.pool_max_requests)
+    if args.backend == 'stub':
+        return StubBackend(answers_file=args.stub_answers, latency=args.stub_latency)
+    return SubprocessBackend()
@@ -0,0 +1,236 @@
+"""
+Warm pool of long-lived verifier processes
+
+Instead of forking a fresh 'claude.cmd' for every sentence, a few worker
+processes are started once and fed prompts over stdin/stdout, one JSON
+object per line. Workers are recycled after a number of prompts or after
+any error/timeout.
+
+A claude-stream worker is one Claude session: every prompt it answers is
+appended to the same conversation, so earlier sentences (and answers) are
+in context for later ones and can bias them. Those sessions are therefore
+recycled after CLAUDE_STREAM_MAX_REQUESTS prompts, much sooner than the
+stateless jsonl workers (MAX_REQUESTS_PER_WORKER); pass max_requests=1
+for fully independent verifications.
+
+Spawn time is measured up to the point a worker can answer: its
+{"ready"} line for jsonl, and the session's first event (the init
+message, or the first result) for claude-stream, which only starts up
+once it has a prompt.
+
+Two line protocols are supported:
+- 'jsonl':         {"id", "prompt"} -> {"id", "output", "stderr", "returncode"}
+                   (verifier_worker.py, wrapping any backend)
+- 'claude-stream': the Claude CLI's --input-format/--output-format stream-json
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+from verifier_backend import BackendError, BackendTimeout
+
+POOL_SIZE = 4  # 상시 실행할 검증 프로세스 수
+MAX_REQUESTS_PER_WORKER = 50  # 프로세스당 처리 후 재시작할 요청 수
+CLAUDE_STREAM_MAX_REQUESTS = 10  # Claude 세션당 요청 수 (대화 맥락이 쌓이므로 작게 유지)
+STARTUP_TIMEOUT = 60.0
+
+CLAUDE_STREAM_COMMAND = ['claude.cmd', '-p', '--input-format', 'stream-json',
+                         '--output-format', 'stream-json', '--verbose']
+
+
+def stub_worker_command(latency):
+    """Command for a verifier_worker.py process answering from the offline stub"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'verifier_worker.py')
+    return [sys.executable, script, '--backend', 'stub', '--stub-latency', str(latency)]
+
+
+class _Worker:
+    """One persistent process plus a reader thread that queues its stdout lines"""
+
+    def __init__(self, command, protocol):
+        self.protocol = protocol
+        self.requests = 0
+        self.spawn_seconds = None  # Known once the process has shown it is up
+        self._started = time.perf_counter()
+        try:
+            self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, text=True,
+                                         encoding='utf-8', errors='ignore', bufsize=1)
+        except FileNotFoundError as e:
+            raise BackendError(str(e)) from e
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        if protocol == 'jsonl':
+            try:
+                self._read_message(STARTUP_TIMEOUT)  # {"ready": true}
+            except (BackendTimeout, BackendError):
+                self.proc.kill()
+                raise
+
+    def _read(self):
+        for line in self.proc.stdout:
+            self.lines.put(line)
+        self.lines.put(None)  # EOF
+
+    def _read_message(self, timeout):
+        deadline = time.monotonic() + (timeout if timeout is not None else 1e9)
+        while True:
+            try:
+                line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise BackendTimeout('Request timed out')
+            if line is None:
+                raise BackendError(f"Verifier worker exited (code {self.proc.poll()})")
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Stray log output
+            if self.spawn_seconds is None:
+                self.spawn_seconds = time.perf_counter() - self._started
+            return message
+
+    def send(self, prompt, timeout):
+        self.requests += 1
+        if self.protocol == 'claude-stream':
+            message = {'type': 'user', 'message': {'role': 'user', 'content': [{'type': 'text', 'text': prompt}]}}
+        else:
+            message = {'id': self.requests, 'prompt': prompt}
+        try:
+            self.proc.stdin.write(json.dumps(message, ensure_ascii=False) + '\n')
+            self.proc.stdin.flush()
+        except OSError as e:
+            raise BackendError(f"Verifier worker pipe closed: {e}") from e
+
+        if self.protocol == 'claude-stream':
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            while True:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                event = self._read_message(remaining)
+                if event.get('type') == 'result':
+                    return (event.get('result') or '').strip(), '', 1 if event.get('is_error') else 0
+
+        reply = self._read_message(timeout)
+        return reply.get('output', '').strip(), reply.get('stderr', ''), reply.get('returncode', 0)
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        try:
+            self.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class ProcessPoolBackend:
+    """Backend that hands prompts to a bounded pool of warm worker processes"""
+
+    name = 'pool'
+
+    def __init__(self, command=None, protocol='claude-stream', size=POOL_SIZE, max_requests=None, offline=False):
+        self.command = command or CLAUDE_STREAM_COMMAND
+        self.protocol = protocol
+        self.offline = offline  # Workers answer from a stub, no usage limits to respect
+        self.size = size
+        if max_requests is None:
+            max_requests = CLAUDE_STREAM_MAX_REQUESTS if protocol == 'claude-stream' else MAX_REQUESTS_PER_WORKER
+        self.max_requests = max_requests
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._workers = set()  # Every live worker, idle or checked out, so close() can reach them all
+        self._closed = False
+        self.spawns = 0
+        self.measured_spawns = 0  # Spawns whose start-up time is known (see _Worker.spawn_seconds)
+        self.spawn_seconds = 0.0
+        self.requests = 0
+        self.recycled = 0
+
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            worker = _Worker(self.command, self.protocol)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.spawns += 1
+            self._workers.add(worker)
+        return worker
+
+    def _checkin(self, worker, healthy):
+        if worker.requests == 1 and worker.spawn_seconds is not None:
+            with self._lock:
+                self.spawn_seconds += worker.spawn_seconds
+                self.measured_spawns += 1
+        if healthy and worker.requests < self.max_requests and not self._closed:
+            self._idle.put(worker)
+        else:
+            worker.close()
+            with self._lock:
+                self.recycled += 1
+                self._workers.discard(worker)
+        self._slots.release()
+
+    def send(self, prompt, timeout=None):
+        worker = self._checkout()
+        healthy = False
+        try:
+            reply = worker.send(prompt, timeout)
+            healthy = True
+            return reply
+        finally:
+            with self._lock:
+                self.requests += 1
+            self._checkin(worker, healthy)
+
+    def report(self):
+        """Spawn cost actually paid versus one process per call"""
+        avg_spawn = self.spawn_seconds / self.measured_spawns if self.measured_spawns else 0.0
+        saved = max(0, self.requests - self.spawns) * avg_spawn
+        return (f"♨️ Worker pool: {self.requests} requests on {self.spawns} spawns "
+                f"(avg spawn {avg_spawn:.2f}s, {self.recycled} recycled), "
+                f"~{saved:.1f}s of spawn time saved vs one process per call")
+
+    def close(self):
+        """
+        Stop every worker: idle ones are closed normally, ones still checked
+        out (a call that timed out or was interrupted) are killed, and
+        workers returned afterwards are not put back in the pool
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.close()
+            with self._lock:
+                self._workers.discard(worker)
+        with self._lock:
+            busy = list(self._workers)
+            self._workers.clear()
+        for worker in busy:
+            worker.kill()
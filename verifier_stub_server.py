@@ -0,0 +1,67 @@
+"""
+Local stub verifier server for offline benchmarking
+
+Serves StubBackend answers over HTTP (POST {"prompt": ...} -> {"output": ...})
+so the verifier scripts can run end to end against --backend http without
+any live service:
+
+    python verifier_stub_server.py --latency 0.8
+    python p_all.py --backend http
+"""
+
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from verifier_backend import DEFAULT_STUB_LATENCY, StubBackend
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like a real API endpoint
+    backend = None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            prompt = json.loads(self.rfile.read(length).decode('utf-8'))['prompt']
+        except (ValueError, KeyError):
+            self._reply(400, {'error': 'expected JSON body with "prompt"'})
+            return
+        output, _, _ = self.backend.send(prompt)
+        self._reply(200, {'output': output})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Quiet: one line per request would swamp the benchmark output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub verifier server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=DEFAULT_STUB_LATENCY,
+                        help=f"seconds per answer (default {DEFAULT_STUB_LATENCY})")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency up to this many seconds")
+    parser.add_argument('--answers', default=None, help="JSONL file of recorded answers to replay")
+    args = parser.parse_args()
+
+    StubHandler.backend = StubBackend(answers_file=args.answers, latency=args.latency, jitter=args.jitter)
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"🧪 Stub verifier listening on http://{args.host}:{args.port}/ (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping stub server")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
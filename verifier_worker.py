@@ -0,0 +1,44 @@
+"""
+Persistent verifier worker for verifier_pool.ProcessPoolBackend
+
+Reads {"id", "prompt"} JSON lines from stdin and answers each with
+{"id", "output", "stderr", "returncode"} on stdout, using any backend from
+verifier_backend.py. Started once and reused for many prompts, so
+interpreter start-up and HTTP connections are paid once per worker.
+"""
+
+import argparse
+import io
+import json
+import sys
+
+from verifier_backend import BackendError, BackendTimeout, add_backend_arguments, backend_from_args
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent verifier worker (JSON lines over stdin/stdout)")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+    backend = backend_from_args(args)
+
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
+    stdout.write(json.dumps({'ready': True}) + '\n')
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        reply = {'id': request.get('id')}
+        try:
+            reply['output'], reply['stderr'], reply['returncode'] = backend.send(request['prompt'],
+                                                                                 timeout=request.get('timeout'))
+        except (BackendTimeout, BackendError) as e:
+            reply.update(output='', stderr=str(e), returncode=1)
+        stdout.write(json.dumps(reply, ensure_ascii=False) + '\n')
+
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
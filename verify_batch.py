@@ -0,0 +1,121 @@
+"""
+Batched multi-sentence prompts for the verifier scripts
+
+Packs several sentences into one prompt built from the same
+'prompt_template' used for single-sentence calls, parses the "<id>: <answer>"
+reply per id, and falls back to single-sentence calls only for ids whose
+answer is missing or fails validation.
+"""
+
+import re
+
+from rate_limiter import is_rate_limited
+from verify_cache import make_cache_key
+from verify_engine import build_prompt_context, timed_call
+
+BATCH_TASK_SUFFIX = (' Do this for each numbered item below. Reply with ONLY one line per item '
+                     'in the form "<id>: <answer>", in the same order, nothing else.')
+
+# "3: answer", "3. answer", "[3] answer", "(3) answer"
+BATCH_LINE_PATTERN = re.compile(r'^\s*[\[(]?(\d+)[\])]?\s*[:.)\]-]?\s*(.*?)\s*$')
+
+
+def chunk_tasks(tasks, size):
+    """Split tasks into consecutive batches of at most size tasks"""
+    size = max(1, size)
+    return [tasks[i:i + size] for i in range(0, len(tasks), size)]
+
+
+def split_template(prompt_template):
+    """Split a single-sentence template into its per-item part and its ' / Task: ...' part"""
+    item_part, sep, task_part = prompt_template.partition(' / Task:')
+    if not sep:
+        return prompt_template, 'Verify each item.'
+    return item_part, task_part.strip()
+
+
+def build_batch_prompt(prompt_template, sentences):
+    """Build one prompt covering every sentence, numbered 1..K"""
+    item_template, task = split_template(prompt_template)
+    lines = [f"Task: {task}{BATCH_TASK_SUFFIX}"]
+    for item_id, sentence in enumerate(sentences, start=1):
+        lines.append(f"{item_id}: {item_template.format(**build_prompt_context(sentence))}")
+    return '\n'.join(lines)
+
+
+def parse_batch_response(output, count):
+    """Map item id (1..count) to its raw answer line; ids not answered are left out"""
+    answers = {}
+    for line in output.split('\n'):
+        match = BATCH_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        item_id = int(match.group(1))
+        if 1 <= item_id <= count and item_id not in answers:
+            answers[item_id] = match.group(2)
+    return answers
+
+
+def make_batch_worker(prompt_template, extract_fn, field_key, cache=None, scheduler=None, timeout=None):
+    """
+    Return a run_concurrent worker that verifies a list of tasks in one call.
+
+    Each task needs a 'sentence' dict and a single-sentence 'prompt'. The
+    worker returns {'items': [...], 'calls': [...latencies]}, where every item
+    carries 'output' (raw answer), 'value' (extracted answer or ''), 'error'
+    and 'via' ('cache', 'batch', 'single' or 'rate_limit'). When a
+    ResponseCache is given, cached answers are reused and newly validated
+    answers are stored; with a RateScheduler every call goes through its
+    budget and retry policy, so 'rate_limit' only appears once it gave up.
+    """
+    def worker(batch):
+        calls = []
+        items = [{'output': '', 'value': '', 'error': None, 'stderr': '', 'returncode': None, 'via': 'batch'}
+                 for _ in batch]
+        keys = [make_cache_key(field_key, prompt_template, task['sentence'].get('sentence', ''),
+                               task['sentence'].get(field_key, '')) for task in batch]
+
+        if cache is not None:
+            for key, item in zip(keys, items):
+                cached = cache.get(key)
+                if cached:
+                    item.update(output=cached, value=extract_fn(cached), via='cache')
+
+        pending = [(task, item) for task, item in zip(batch, items) if not item['value']]
+
+        if len(pending) > 1:
+            prompt = build_batch_prompt(prompt_template, [task['sentence'] for task, _ in pending])
+            result = timed_call(prompt, timeout=timeout, scheduler=scheduler)
+            calls.append(result['latency'])
+            if result['output'] and is_rate_limited(result['output']):
+                for _, item in pending:
+                    item.update(output=result['output'], stderr=result['stderr'],
+                                returncode=result['returncode'], via='rate_limit')
+                return {'items': items, 'calls': calls}
+            answers = parse_batch_response(result['output'], len(pending)) if not result['error'] else {}
+            for item_id, (_, item) in enumerate(pending, start=1):
+                raw = answers.get(item_id, '')
+                item.update(output=raw, stderr=result['stderr'], returncode=result['returncode'], via='batch')
+                item['value'] = extract_fn(raw) if raw else ''
+
+        # Fall back to single-sentence calls for ids the batch reply did not validate
+        for task, item in pending:
+            if item['value']:
+                continue
+            result = timed_call(task['prompt'], timeout=timeout, scheduler=scheduler)
+            calls.append(result['latency'])
+            item.update(output=result['output'], error=result['error'], stderr=result['stderr'],
+                        returncode=result['returncode'], via='single')
+            if result['output'] and is_rate_limited(result['output']):
+                item['via'] = 'rate_limit'
+                break
+            item['value'] = extract_fn(result['output']) if result['output'] else ''
+
+        if cache is not None:
+            for key, item in zip(keys, items):
+                if item['value'] and item['via'] in ('batch', 'single'):
+                    cache.put(key, field_key, item['output'])
+
+        return {'items': items, 'calls': calls}
+
+    return worker
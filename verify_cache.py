@@ -0,0 +1,110 @@
+"""
+Persistent content-addressed cache for verifier responses
+
+Answers are stored in a small SQLite file keyed by a hash of
+(field, prompt template, Chinese sentence, current field value), so
+re-running a verifier after a crash or on a regenerated file only asks
+Claude about sentences that actually changed. Only answers that passed
+extraction/validation are stored.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from rate_limiter import is_rate_limited
+
+DEFAULT_CACHE_FILE = '.verify_cache.sqlite'
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 응답 캐시 최대 크기 (초과 시 오래 안 쓴 항목부터 삭제)
+
+
+def make_cache_key(field, prompt_template, chinese_sentence, current_value):
+    """Hash of everything that determines the verifier's answer"""
+    payload = json.dumps([field, prompt_template, chinese_sentence, current_value], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe SQLite response cache with hit/miss stats and size-based LRU eviction"""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, field TEXT, response TEXT, size INTEGER, last_used REAL)')
+            self._conn.commit()
+            self._total_bytes = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, key):
+        """Return the cached response for key, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if is_rate_limited(row[0]):
+                # A usage-limit message stored by an older version is not an answer
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, field, response):
+        """Store a validated response and evict old entries if the cache grew too large"""
+        if not self.enabled or not response or is_rate_limited(response):
+            return
+        size = len(response.encode('utf-8')) + len(key)
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, field, response, size, last_used) VALUES (?, ?, ?, ?, ?)',
+                (key, field, response, size, time.time()))
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute('SELECT key, size FROM responses ORDER BY last_used').fetchall()
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._total_bytes -= size
+            self.evicted += 1
+
+    def report(self):
+        """One-line hit/miss summary"""
+        if not self.enabled:
+            return "🗃️ Cache: disabled (--no-cache)"
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return (f"🗃️ Cache: {self.hits} hits / {self.misses} misses ({hit_rate:.1f}% hit rate), "
+                f"{self.evicted} evicted, {self._total_bytes / 1024:.1f} KB on disk")
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+            self.enabled = False
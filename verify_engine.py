@@ -0,0 +1,196 @@
+"""
+Concurrent verification engine shared by the verifier scripts
+
+Runs verifier calls on a bounded pool of worker threads (each call is a
+blocking subprocess or HTTP request, so threads spend almost all their
+time waiting) and hands results back in the original sentence order.
+timed_call_async is the same call for coroutines on an asyncio loop
+(request_loop.py); backends without send_async run on the loop's default
+executor.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limiter import RateScheduler
+from verifier_backend import BackendError, BackendTimeout, SubprocessBackend
+
+_backend = SubprocessBackend()
+
+
+def build_prompt_context(sentence):
+    """Prepare context data for a 'prompt_template' from a sentence object"""
+    return {
+        'chinese_sentence': sentence.get('sentence', ''),
+        'current_pinyin': sentence.get('pinyin', ''),
+        'current_korean': sentence.get('korean', ''),
+        'current_english': sentence.get('english', ''),
+        'current_japanese': sentence.get('japanese', ''),
+        'current_japanese_romaji': sentence.get('japanese_romaji', ''),
+        'current_translation': sentence.get('translation', '')
+    }
+
+
+def set_backend(backend):
+    """Select the verifier backend used by every following call (see verifier_backend.py)"""
+    global _backend
+    _backend = backend
+
+
+def get_backend():
+    return _backend
+
+
+def make_scheduler(**options):
+    """
+    RateScheduler(**options) for calls to the current backend, or None for an
+    offline backend: a stub has no usage limit, throttling it only slows runs
+    """
+    if getattr(_backend, 'offline', False):
+        return None
+    return RateScheduler(**options)
+
+
+def call_claude(prompt, timeout=None):
+    """Send one prompt to the current backend; returns (output, stderr, returncode)"""
+    return _backend.send(prompt, timeout=timeout)
+
+
+async def call_claude_async(prompt, timeout=None):
+    """call_claude for coroutines"""
+    backend = _backend
+    if hasattr(backend, 'send_async'):
+        return await backend.send_async(prompt, timeout=timeout)
+    return await asyncio.get_running_loop().run_in_executor(None, lambda: backend.send(prompt, timeout=timeout))
+
+
+def _timed_call_once(prompt, timeout=None):
+    started = time.perf_counter()
+    result = {'output': '', 'stderr': '', 'returncode': None, 'error': None, 'retryable': False}
+    try:
+        result['output'], result['stderr'], result['returncode'] = call_claude(prompt, timeout=timeout)
+        # An empty answer is usually a hiccup of the backend, worth another try
+        result['retryable'] = not result['output']
+    except BackendTimeout as e:
+        result['error'] = str(e)
+        result['retryable'] = True
+    except BackendError as e:
+        result['error'] = str(e)
+    result['latency'] = time.perf_counter() - started
+    return result
+
+
+def timed_call(prompt, timeout=None, scheduler=None):
+    """
+    Call Claude and return a result dict with output, stderr, returncode, error and latency.
+
+    With a RateScheduler the call waits for budget, is retried on transient
+    failures and sleeps through usage limits.
+    """
+    if scheduler is None:
+        return _timed_call_once(prompt, timeout=timeout)
+    return scheduler.run(prompt, lambda: _timed_call_once(prompt, timeout=timeout))
+
+
+async def _timed_call_once_async(prompt, timeout=None):
+    started = time.perf_counter()
+    result = {'output': '', 'stderr': '', 'returncode': None, 'error': None, 'retryable': False}
+    try:
+        result['output'], result['stderr'], result['returncode'] = await call_claude_async(prompt, timeout=timeout)
+        result['retryable'] = not result['output']
+    except BackendTimeout as e:
+        result['error'] = str(e)
+        result['retryable'] = True
+    except BackendError as e:
+        result['error'] = str(e)
+    result['latency'] = time.perf_counter() - started
+    return result
+
+
+async def timed_call_async(prompt, timeout=None, scheduler=None):
+    """timed_call for coroutines; the scheduler's waits don't block the event loop"""
+    if scheduler is None:
+        return await _timed_call_once_async(prompt, timeout=timeout)
+    return await scheduler.run_async(prompt, lambda: _timed_call_once_async(prompt, timeout=timeout))
+
+
+class ThroughputStats:
+    """Collect per-call latencies and report sentences/sec and p50/p95 latency"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.latencies = []
+        self.sentences = 0
+
+    def record(self, latency, sentences=1):
+        self.latencies.append(latency)
+        self.sentences += sentences
+
+    def record_result(self, result):
+        """Record a worker result: a single timed_call dict or a batch dict with 'calls'/'items'"""
+        if not isinstance(result, dict):
+            return
+        if 'calls' in result:
+            self.latencies.extend(result['calls'])
+            self.sentences += len(result.get('items', ()))
+        elif 'latency' in result:
+            self.record(result['latency'])
+
+    def percentile(self, pct):
+        """Nearest-rank percentile of recorded latencies (0 if nothing recorded)"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, math.ceil(pct * len(ordered) / 100))
+        return ordered[rank - 1]
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        """Return a multi-line summary of this run"""
+        elapsed = self.elapsed()
+        rate = self.sentences / elapsed if elapsed > 0 else 0.0
+        return (f"📊 Throughput: {self.sentences} sentences / {len(self.latencies)} calls in {elapsed:.1f}s "
+                f"({rate:.2f} sentences/sec)\n"
+                f"⏱️ Latency per call: p50 {self.percentile(50):.2f}s / p95 {self.percentile(95):.2f}s")
+
+
+def run_concurrent(tasks, worker, max_workers=4, stats=None):
+    """
+    Run worker(task) for every task with at most max_workers calls in flight.
+
+    Yields (task, result) pairs in the same order as tasks, so the caller can
+    apply results to its data on the main thread exactly as the sequential
+    loop did. Closing the generator early (e.g. on a rate limit) cancels the
+    calls that have not started yet.
+    """
+    max_workers = max(1, max_workers)
+    task_iter = iter(tasks)
+    in_flight = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit_next():
+        for task in task_iter:
+            in_flight.append((task, executor.submit(worker, task)))
+            return True
+        return False
+
+    try:
+        # Keep a small look-ahead window so cancellation loses little work
+        while len(in_flight) < max_workers * 2 and submit_next():
+            pass
+        while in_flight:
+            task, future = in_flight.popleft()
+            result = future.result()
+            if stats is not None:
+                stats.record_result(result)
+            submit_next()
+            yield task, result
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,140 @@
+"""
+Multi-field verification in one call per sentence
+
+Instead of one pass (and one call) per field, a single prompt lists every
+selected field of a sentence and asks for a JSON object mapping field name
+to its correct value. Each value is validated with the same per-field rules
+as the verifier UI; fields missing from the reply or failing validation
+fall back to that field's single-field prompt.
+"""
+
+import json
+import re
+
+from rate_limiter import is_rate_limited
+from response_extract import CLEAN_PREFIX_PATTERN, first_answer_line, validate_field
+from verify_cache import make_cache_key
+from verify_engine import timed_call
+
+MULTI_TASK = ('Task: Verify each field below for this Chinese sentence. Reply with ONLY a JSON object '
+              'mapping every field name to its correct value, nothing else.')
+
+JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+FIELD_LINE_PATTERN = re.compile(r'^\s*"?([a-z_]+)"?\s*:\s*"?(.*?)"?,?\s*$')
+
+
+def build_multi_prompt(sentence, fields):
+    """One prompt listing the current value of every field"""
+    lines = [f"Chinese: {sentence.get('sentence', '')} / {MULTI_TASK}"]
+    for field in fields:
+        lines.append(f"{field}: {sentence.get(field, '')}")
+    return '\n'.join(lines)
+
+
+def clean_value(value):
+    """First line of an answer value, without markdown"""
+    if not isinstance(value, str):
+        return ''
+    lines = [line.strip() for line in value.replace('**', '').replace('`', '').split('\n') if line.strip()]
+    return lines[0] if lines else ''
+
+
+def parse_multi_response(output, fields):
+    """Map field -> validated value; fields not answered or not valid are left out"""
+    answers = {}
+    match = JSON_OBJECT_PATTERN.search(output)
+    if match:
+        try:
+            payload = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            payload = None
+        if isinstance(payload, dict):
+            answers = {field: payload.get(field) for field in fields}
+    if not answers:
+        # Not JSON after all: accept "field: value" lines
+        for line in output.split('\n'):
+            line_match = FIELD_LINE_PATTERN.match(line)
+            if line_match and line_match.group(1) in fields:
+                answers.setdefault(line_match.group(1), line_match.group(2))
+
+    values = {}
+    for field, raw in answers.items():
+        value = validate_field(field, clean_value(raw))
+        if value:
+            values[field] = value
+    return values
+
+
+def cached_value(field, cached):
+    """
+    Value of a cached answer. Cached answers passed validation when they were
+    stored, so they are not judged by extract_fn again (its meta-language
+    blacklist rejects valid answers such as "Can I help you?"); only the
+    answer line is taken, since the single-field scripts store raw replies
+    """
+    return validate_field(field, first_answer_line(cached, CLEAN_PREFIX_PATTERN))
+
+
+def make_multi_worker(fields, templates, extract_fn, cache=None, scheduler=None, timeout=None):
+    """
+    Return a run_concurrent worker that verifies every field of one task in one call.
+
+    templates maps each field to its single-field prompt template, used for
+    the fallback calls and for the cache keys, which are the same keys the
+    single-field scripts use, so both modes reuse each other's answers.
+    The worker returns {'items': [{'values', 'outputs', 'via', 'error'}], 'calls': [...]},
+    with 'via' mapping each field to 'cache', 'multi', 'single' or 'rate_limit'.
+    """
+    def worker(task):
+        sentence = task['sentence']
+        calls = []
+        item = {'values': {}, 'outputs': {}, 'via': {}, 'error': None, 'output': ''}
+        keys = {field: make_cache_key(field, templates[field], sentence.get('sentence', ''), sentence.get(field, ''))
+                for field in fields}
+
+        if cache is not None:
+            for field in fields:
+                cached = cache.get(keys[field])
+                value = cached_value(field, cached) if cached else ''
+                if value:
+                    item['values'][field] = value
+                    item['via'][field] = 'cache'
+
+        pending = [field for field in fields if field not in item['values']]
+        if len(pending) > 1:
+            result = timed_call(build_multi_prompt(sentence, pending), timeout=timeout, scheduler=scheduler)
+            calls.append(result['latency'])
+            item['output'] = result['output']
+            item['error'] = result['error']
+            if result['output'] and is_rate_limited(result['output']):
+                item['via'].update((field, 'rate_limit') for field in pending)
+                return {'items': [item], 'calls': calls}
+            for field, value in parse_multi_response(result['output'], pending).items():
+                item['values'][field] = value
+                item['via'][field] = 'multi'
+
+        # Single-field calls only for fields the combined reply did not validate
+        for field in fields:
+            if field in item['values']:
+                continue
+            prompt = templates[field].format(**task['context'])
+            result = timed_call(prompt, timeout=timeout, scheduler=scheduler)
+            calls.append(result['latency'])
+            item['outputs'][field] = result['output']
+            item['error'] = result['error'] or item['error']
+            if result['output'] and is_rate_limited(result['output']):
+                item['via'][field] = 'rate_limit'
+                break
+            value = validate_field(field, extract_fn(result['output'])) if result['output'] else ''
+            if value:
+                item['values'][field] = value
+                item['via'][field] = 'single'
+
+        if cache is not None:
+            for field, value in item['values'].items():
+                if item['via'][field] in ('multi', 'single'):
+                    cache.put(keys[field], field, value)
+
+        return {'items': [item], 'calls': calls}
+
+    return worker
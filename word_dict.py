@@ -0,0 +1,162 @@
+"""
+Word dictionary with longest-match lookup for enhance_translations.py
+
+Entries (word, pinyin, korean, traditional, meaning) are kept in a compact
+tab-separated file sorted by word and loaded into a character trie, so a
+sentence or an unknown multi-character word is segmented greedily into the
+longest known words in a single left-to-right pass.
+
+    python word_dict.py                 # rebuild dictionaries/word_dict.tsv from the lesson files
+    python word_dict.py --output x.tsv public/data/integrated/*.json
+"""
+
+import argparse
+import collections
+import glob
+import os
+
+from lesson_stream import iter_sentence_records
+
+DEFAULT_WORD_DICT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dictionaries', 'word_dict.tsv')
+DEFAULT_SOURCE_FILES = ['public/data/integrated/*.json', 'public/data/currently/*.json']
+FIELDS = ('pinyin', 'korean', 'traditional', 'meaning')
+
+_END = ''  # Trie key holding the entry of the word ending at a node (never a character)
+
+
+class WordTrie:
+    """Character trie mapping words to their entry dicts"""
+
+    def __init__(self, entries=None):
+        self.root = {}
+        self.size = 0
+        for word, entry in (entries or {}).items():
+            self.add(word, entry)
+
+    def add(self, word, entry):
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = entry
+
+    def get(self, word):
+        node = self.root
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(_END)
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def __len__(self):
+        return self.size
+
+    def longest_match(self, text, start=0):
+        """(length, entry) of the longest word starting at text[start], or (0, None)"""
+        node = self.root
+        best = (0, None)
+        for position in range(start, len(text)):
+            node = node.get(text[position])
+            if node is None:
+                break
+            if _END in node:
+                best = (position - start + 1, node[_END])
+        return best
+
+    def segment(self, text):
+        return segment_longest(self, text)
+
+
+def segment_longest(dictionary, text):
+    """
+    Split text into (piece, entry) pairs with dictionary.longest_match,
+    longest known word first; unknown characters stand alone.
+    """
+    pieces = []
+    position = 0
+    while position < len(text):
+        length, entry = dictionary.longest_match(text, position)
+        if not length:
+            length = 1
+        pieces.append((text[position:position + length], entry))
+        position += length
+    return pieces
+
+
+def load_word_dict(path=DEFAULT_WORD_DICT_FILE):
+    """{word: {'pinyin', 'korean', 'traditional', 'meaning'}} from a word_dict.tsv file ({} if missing)"""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            word, *values = line.rstrip('\n').split('\t')
+            values += [''] * (len(FIELDS) - len(values))
+            entries[word] = dict(zip(FIELDS, values))
+    return entries
+
+
+def write_word_dict(path, entries):
+    """Write entries as a word-sorted TSV, the format load_word_dict reads"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('# word\t' + '\t'.join(FIELDS) + '\n')
+        for word in sorted(entries):
+            values = (entries[word].get(field, '').replace('\t', ' ').replace('\n', ' ') for field in FIELDS)
+            f.write(word + '\t' + '\t'.join(values) + '\n')
+    os.replace(tmp_path, path)
+
+
+def iter_breakdown_entries(sentence):
+    """(word, entry) pairs from a sentence's 'words' breakdown, in either lesson file layout"""
+    breakdown = sentence.get('words') or {}
+    if isinstance(breakdown, dict):
+        # integrated: parallel arrays
+        columns = [breakdown.get(name) or [] for name in ('words', 'pinyin', 'korean', 'traditional',
+                                                           'meaning_and_reading')]
+        for word, pinyin, korean, traditional, meaning in zip(*columns):
+            yield word, {'pinyin': pinyin, 'korean': korean, 'traditional': traditional, 'meaning': meaning}
+    else:
+        # currently: one object per word
+        for word in breakdown:
+            if isinstance(word, dict):
+                yield word.get('chinese', ''), {'pinyin': word.get('pinyin', ''), 'korean': word.get('korean', ''),
+                                                'traditional': word.get('chinese_trad', ''),
+                                                'meaning': word.get('chinese_trad_m', '')}
+
+
+def harvest_lesson_words(patterns=DEFAULT_SOURCE_FILES):
+    """Most frequent complete entry of every word in the lesson breakdowns"""
+    counts = collections.defaultdict(collections.Counter)
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            for _, sentence in iter_sentence_records(path):
+                for word, entry in iter_breakdown_entries(sentence):
+                    values = tuple(entry[field] for field in FIELDS)
+                    # Skip '(word_pinyin)' placeholders left by earlier enhancement runs
+                    if not word or not all(values) or any('_pinyin)' in v or '_korean)' in v for v in values):
+                        continue
+                    counts[word][values] += 1
+    return {word: dict(zip(FIELDS, counter.most_common(1)[0][0])) for word, counter in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the word dictionary from lesson word breakdowns")
+    parser.add_argument('files', nargs='*', default=DEFAULT_SOURCE_FILES, help="lesson files or globs")
+    parser.add_argument('--output', default=DEFAULT_WORD_DICT_FILE, help="TSV file to write")
+    args = parser.parse_args()
+
+    entries = harvest_lesson_words(args.files)
+    write_word_dict(args.output, entries)
+    print(f"📖 Wrote {len(entries)} words to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
-import jieba
 import sys
 import io
 
+from segmenter import segment
+
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 sentence = '他想见你'
-words = list(jieba.cut(sentence))
-print(words)
\ No newline at end of file
+words = segment(sentence)
+print(words)
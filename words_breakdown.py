@@ -0,0 +1,231 @@
+"""
+Consistency check and regeneration of sentence word breakdowns
+
+The frontend renders Sentence.words column by column: words[i] next to
+pinyin[i], korean[i], traditional[i] and meaning_and_reading[i]. This
+stage checks every sentence of every lesson file in one streaming pass:
+
+    missing     no breakdown, or an empty words array
+    misaligned  the parallel arrays are not all the same length
+    text        the words joined together are not the sentence
+                (punctuation and spacing ignored)
+
+With --fix, missing and misaligned breakdowns are rebuilt: missing words
+are segmented from the sentence (segmenter.py), columns that still line up
+with the words are kept, and the rest is filled from the enhancement
+dictionary (enhance_translations.lookup_word). A missing breakdown is only
+built in files that use the parallel-array layout; in list-of-objects
+files it is reported instead. Text mismatches often carry
+hand-written values and are only reported, unless --resegment asks for
+their sentences to be segmented again as well.
+
+    python words_breakdown.py                         # report offenders in all lesson files
+    python words_breakdown.py --fix --report offenders.jsonl
+"""
+
+import argparse
+import collections
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+from enhance_translations import generate_word_analysis_enhanced
+from lesson_data import iter_lesson_sentences
+from lesson_stream import LessonStreamWriter, iter_document, iter_sentence_records
+from segmenter import segment
+from word_dict import iter_breakdown_entries
+
+DEFAULT_FILES = ['public/data/integrated/*.json', 'public/data/currently/*.json']
+COLUMNS = ('words', 'pinyin', 'korean', 'traditional', 'meaning_and_reading')
+MISSING, MISALIGNED, TEXT = 'missing', 'misaligned', 'text'
+FIXABLE = (MISSING, MISALIGNED)
+
+NON_WORD_PATTERN = re.compile(r'[\W_]+')  # Punctuation, spaces and '...' in pattern words like 又...又...
+
+
+def spelled_text(text):
+    return NON_WORD_PATTERN.sub('', text)
+
+
+def breakdown_words(sentence):
+    breakdown = sentence.get('words')
+    if isinstance(breakdown, dict):
+        return breakdown.get('words') or []
+    return [word for word, _ in iter_breakdown_entries(sentence)]
+
+
+def check_breakdown(sentence):
+    """(issue, detail) pairs for one sentence; empty if its breakdown is consistent"""
+    breakdown = sentence.get('words')
+    words = breakdown_words(sentence)
+    if not words:
+        return [(MISSING, '')]
+    issues = []
+    if isinstance(breakdown, dict):
+        lengths = {column: len(breakdown.get(column) or []) for column in COLUMNS}
+        if len(set(lengths.values())) > 1:
+            issues.append((MISALIGNED, ', '.join(f"{column} {length}" for column, length in lengths.items())))
+    joined = spelled_text(''.join(words))
+    expected = spelled_text(sentence.get('sentence', ''))
+    if joined != expected:
+        issues.append((TEXT, f"{joined} != {expected}"))
+    return issues
+
+
+def breakdown_layout(sentences):
+    """'arrays' (integrated parallel arrays), 'objects' (currently, one object per word) or None if unknown"""
+    for sentence in sentences:
+        breakdown = sentence.get('words')
+        if isinstance(breakdown, dict) and breakdown.get('words'):
+            return 'arrays'
+        if isinstance(breakdown, list) and breakdown:
+            return 'objects'
+    return None
+
+
+def rebuild_breakdown(sentence, resegment=False):
+    """
+    Aligned parallel-array breakdown for a sentence: its words (with
+    resegment, only if they spell the sentence), otherwise a new
+    segmentation; values of the old breakdown are kept where they still
+    line up, the rest comes from the dictionary
+    """
+    chinese = sentence['sentence']
+    old = sentence.get('words') if isinstance(sentence.get('words'), dict) else {}
+    old_words = breakdown_words(sentence)
+    words = old_words
+    if not words or (resegment and spelled_text(''.join(words)) != spelled_text(chinese)):
+        words = [word for word in segment(chinese) if spelled_text(word)]
+
+    rebuilt = generate_word_analysis_enhanced(words)
+    if words == old_words and old:
+        # Same words: keep every old column that has one value per word
+        for column in COLUMNS[1:]:
+            if len(old.get(column) or []) == len(words):
+                rebuilt[column] = list(old[column])
+    elif old and len({len(old.get(column) or []) for column in COLUMNS}) == 1:
+        # New segmentation of an aligned breakdown: keep the old values of words that survived
+        known = {values[0]: values[1:] for values in zip(*(old.get(column) or [] for column in COLUMNS))}
+        for position, word in enumerate(words):
+            if word in known:
+                for column, value in zip(COLUMNS[1:], known[word]):
+                    rebuilt[column][position] = value
+    return rebuilt
+
+
+def process_file(path, fix=False, resegment=False):
+    """
+    Check (and with fix, repair in place) every sentence of a lesson file in
+    one pass. Returns {'file', 'sentences', 'offenders', 'fixed',
+    'remaining', 'placeholders'}: offenders are {'file', 'key', 'sentence',
+    'issue', 'detail'} dicts found before fixing, remaining counts the
+    sentences still inconsistent afterwards.
+    """
+    result = {'file': path, 'sentences': 0, 'offenders': [], 'fixed': 0, 'remaining': 0, 'placeholders': 0}
+    # First pass (up to the first breakdown): the layout of the whole file, before anything is rebuilt
+    file_layout = breakdown_layout(sentence for _, sentence in iter_sentence_records(path)) if fix else None
+    writer = LessonStreamWriter(path) if fix else None
+    try:
+        for kind, item in iter_document(path):
+            if kind != 'lesson':
+                if writer is None:
+                    continue
+                if item[0] == 'contents':
+                    writer.open_contents()
+                else:
+                    writer.write_field(*item)
+                continue
+            for key, sentence in iter_lesson_sentences(item, path):
+                result['sentences'] += 1
+                issues = check_breakdown(sentence)
+                if not issues:
+                    continue
+                for issue, detail in issues:
+                    result['offenders'].append({'file': path, 'key': list(key),
+                                                'sentence': sentence.get('sentence', ''),
+                                                'issue': issue, 'detail': detail})
+                # Only the parallel-array layout is rebuilt; a missing breakdown only in files that use it,
+                # so list-of-objects files never get a second layout mixed in
+                breakdown = sentence.get('words')
+                rebuildable = sentence.get('sentence') and (
+                    isinstance(breakdown, dict) or (not breakdown and file_layout == 'arrays'))
+                kinds = {issue for issue, _ in issues}
+                if fix and rebuildable and (kinds & set(FIXABLE) or resegment):
+                    sentence['words'] = rebuild_breakdown(sentence, resegment)
+                    result['fixed'] += 1
+                    result['placeholders'] += sum(1 for pinyin in sentence['words']['pinyin']
+                                                  if pinyin.endswith('_pinyin)'))
+                    if resegment or TEXT not in kinds:
+                        continue
+                result['remaining'] += 1
+            if writer is not None:
+                writer.write_lesson(item)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        # Files without anything to fix are left untouched
+        if result['fixed']:
+            writer.close()
+        else:
+            writer.abort()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and rebuild the words breakdowns of lesson files")
+    parser.add_argument('files', nargs='*', default=DEFAULT_FILES, help="lesson files or globs")
+    parser.add_argument('--fix', action='store_true', help="rebuild missing and misaligned breakdowns in place")
+    parser.add_argument('--resegment', action='store_true',
+                        help="with --fix, also rebuild breakdowns whose words do not spell the sentence")
+    parser.add_argument('--report', default=None, help="write every offender as JSONL to this file")
+    parser.add_argument('--show', type=int, default=10, help="offenders to print per issue (default 10)")
+    args = parser.parse_args()
+
+    files = []
+    for pattern in args.files:
+        files.extend(path for path in sorted(glob.glob(pattern)) if os.path.basename(path) != 'manifest.json')
+    files = list(dict.fromkeys(files))
+
+    started = time.perf_counter()
+    results = [process_file(path, args.fix, args.resegment) for path in files]
+    offenders = [offender for result in results for offender in result['offenders']]
+
+    print(f"🔎 Checked {sum(r['sentences'] for r in results)} sentences in {len(files)} files "
+          f"({time.perf_counter() - started:.2f}s)")
+    for result in results:
+        counts = collections.Counter(offender['issue'] for offender in result['offenders'])
+        summary = ', '.join(f"{issue} {counts[issue]}" for issue in (MISSING, MISALIGNED, TEXT) if counts[issue])
+        fixed = f", {result['fixed']} rebuilt ({result['placeholders']} words without a dictionary entry)" \
+            if result['fixed'] else ''
+        print(f"   {result['file']}: {summary or 'ok'}{fixed}")
+
+    by_issue = collections.defaultdict(list)
+    for offender in offenders:
+        by_issue[offender['issue']].append(offender)
+    for issue in (MISSING, MISALIGNED, TEXT):
+        if by_issue[issue] and args.show:
+            print(f"\n{issue} ({len(by_issue[issue])}):")
+            for offender in by_issue[issue][:args.show]:
+                print(f"   {os.path.basename(offender['file'])} lesson {offender['key'][1]} "
+                      f"#{offender['key'][4]} {offender['sentence']}  {offender['detail']}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            for offender in offenders:
+                f.write(json.dumps(offender, ensure_ascii=False) + '\n')
+        print(f"\n📝 {len(offenders)} offenders written to {args.report}")
+
+    fixed = sum(result['fixed'] for result in results)
+    if fixed:
+        print(f"🔧 Rebuilt {fixed} breakdowns")
+    # Non-zero while anything the frontend would render wrongly is left
+    sys.exit(1 if any(result['remaining'] for result in results) else 0)
+
+
+if __name__ == "__main__":
+    main()